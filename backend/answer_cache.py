@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCache:
+    """Bounded LRU cache of /ask responses with a TTL per answer route
+
+    Entries are keyed on the normalized question and language. Only routes
+    listed in `ttls` are cached, so cheap or transient answers (greetings,
+    fallbacks, error notices) never take up space. Expiry uses wall-clock time
+    so entries persisted to disk keep their age across restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttls: Optional[Dict[str, float]] = None, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttls = ttls or {}
+        self.path = path or None
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(normalized_question: str, language: str) -> str:
+        return f"{language}\x1f{normalized_question}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a cached response, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            response, route, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: str, response: dict, route: str) -> bool:
+        """Cache a response if its route is cacheable; returns whether it was stored"""
+        ttl = self.ttls.get(route)
+        if not ttl or self.max_entries <= 0:
+            return False
+
+        with self._lock:
+            self._entries[key] = (response, route, time.time() + ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "ttls": dict(self.ttls),
+                "persistent": self.path is not None,
+            }
+
+    def load(self) -> int:
+        """Load unexpired entries from the persistence file, if configured"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read answer cache file {self.path}: {str(e)}")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            # Stored oldest-first, so replaying keeps the LRU order
+            for key, response, route, expires_at in stored.get("entries", []):
+                if expires_at > now and route in self.ttls:
+                    self._entries[key] = (response, route, expires_at)
+                    loaded += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        logger.info(f"Loaded {loaded} cached answers from {self.path}")
+        return loaded
+
+    def save(self) -> int:
+        """Write unexpired entries to the persistence file, if configured"""
+        if not self.path:
+            return 0
+
+        now = time.time()
+        with self._lock:
+            entries = [
+                [key, response, route, expires_at]
+                for key, (response, route, expires_at) in self._entries.items()
+                if expires_at > now
+            ]
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not write answer cache file {self.path}: {str(e)}")
+            return 0
+
+        logger.info(f"Saved {len(entries)} cached answers to {self.path}")
+        return len(entries)
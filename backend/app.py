@@ -1,14 +1,44 @@
+import asyncio
+import bisect
+import hmac
+import itertools
+import json
 import logging
+import multiprocessing
+import os
 import re
+import signal
+import threading
+import time
 import traceback
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import quote_plus
-from fastapi import FastAPI, HTTPException
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+from fastapi import FastAPI, File, Header, HTTPException, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from answer_cache import AnswerCache
+from canned_answers import DEFAULT_CANNED_ANSWERS_PATH, load_canned_answers
+from batching import BatchQueueFullError, MicroBatcher
+from decoding_policy import DecodingPolicy
+from document_batch import BatchSummary, analyze_bytes
+from document_processor import STREAM_CHUNK_SIZE, STREAM_OVERLAP, DocumentProcessor, iter_file_chunks
+from executors import BoundedExecutor, PoolSaturatedError
+from keyword_matcher import KeywordMatcher
+from metrics import Registry
+from profiling import RequestProfiler
+from retrieval import DEFAULT_DATASET_PATH, DEFAULT_INDEX_DIR, load_or_build_index
+from search_cache import FRESH, STALE, SearchCache
+from search_client import DEFAULT_DUCKDUCKGO_URL, SearchClient, SearchPoolTimeout
+from search_parser import parse_search_results
+from speculation import FallbackPredictor
+
+# torch and transformers are imported by the background model loader, not here,
+# so the API starts serving the fast paths without waiting for them
+IMPORT_STARTED = time.perf_counter()
 
 # Configure logging
 logging.basicConfig(
@@ -30,29 +60,401 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Model setup and loading
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+# Model setup: loaded on a background thread at startup
+MODEL_PATH = os.environ.get("MODEL_PATH", "./legal_chatbot_model")
+# Opt-in CPU inference mode: "int8" applies dynamic quantization to the Linear layers
+MODEL_QUANTIZATION = os.environ.get("MODEL_QUANTIZATION", "")
+# "torch" runs the model in PyTorch; "onnx" runs the graphs exported by onnx_backend.py on ONNX Runtime
+# (install requirements-onnx.txt for it)
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch").strip().lower()
+ONNX_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", "./legal_chatbot_model_onnx")
 MODEL = None
 TOKENIZER = None
+device = None
+# Set once the model has loaded and answered a warm-up question
+MODEL_READY = threading.Event()
+MODEL_LOAD_ERROR = None
+MODEL_READY_SECONDS = None
 
-# Update model loading section
-try:
-    MODEL_PATH = "distilgpt2"  # Use a small model for testing
-    # Or use your own model if you've uploaded it to Hugging Face
-    # MODEL_PATH = "YOUR_USERNAME/cameroon-legal-model"
-    
-    MODEL = AutoModelForCausalLM.from_pretrained(MODEL_PATH).to(device)
-    TOKENIZER = AutoTokenizer.from_pretrained(MODEL_PATH)
-    logger.info("Model loaded successfully")
-except Exception as e:
-    logger.error(f"Error loading model: {str(e)}")
-    logger.warning("Application will run with limited functionality")
+def load_model():
+    """Import torch/transformers, load the T5 model and tokenizer and warm them up
+
+    Runs on a background thread. MODEL is only assigned once loading has
+    succeeded, so every `MODEL is None` check keeps routing around the model
+    until then.
+    """
+    global MODEL, TOKENIZER, device, MODEL_LOAD_ERROR, MODEL_READY_SECONDS
+
+    start = time.perf_counter()
+    try:
+        import torch
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+        logger.info(f"torch and transformers imported in {time.perf_counter() - start:.1f}s")
+
+        if INFERENCE_BACKEND == "onnx":
+            from onnx_backend import OnnxSeq2SeqModel, verify_parity
+
+            # Only serve graphs whose answers were checked against PyTorch on every tier
+            verify_parity(ONNX_MODEL_DIR, DECODING_POLICY.tiers)
+            model = OnnxSeq2SeqModel(ONNX_MODEL_DIR)
+            tokenizer = AutoTokenizer.from_pretrained(ONNX_MODEL_DIR)
+        else:
+            from quantization import apply_quantization
+
+            # model.safetensors is memory-mapped, so weights are paged in from the
+            # file instead of being unpickled into a second copy
+            model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_PATH, use_safetensors=True).eval()
+            if torch.cuda.is_available():
+                model = model.to("cuda")
+            model = apply_quantization(model, MODEL_QUANTIZATION)
+            tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+
+        # Quantized kernels are CPU only, so follow the model to wherever it ended up
+        model_device = model.device
+        logger.info(f"Model loaded in {time.perf_counter() - start:.1f}s ({INFERENCE_BACKEND} backend, {model_device})")
+
+        # Run one short generation so the first real question does not pay for lazy initialization
+        encoded = tokenizer("question: What is the constitution of Cameroon?", return_tensors="pt")
+        with torch.no_grad():
+            model.generate(
+                input_ids=encoded.input_ids.to(model_device),
+                attention_mask=encoded.attention_mask.to(model_device),
+                max_length=8,
+            )
+
+        TOKENIZER, device = tokenizer, model_device
+        MODEL = model
+        MODEL_READY_SECONDS = time.perf_counter() - IMPORT_STARTED
+        MODEL_READY.set()
+        logger.info(
+            f"Model ready {time.perf_counter() - start:.1f}s after loading started "
+            f"({MODEL_READY_SECONDS:.1f}s after import)"
+        )
+    except Exception as e:
+        MODEL_LOAD_ERROR = str(e)
+        logger.error(f"Error loading model: {str(e)}")
+        logger.warning("Application will run with limited functionality")
+
+# Micro-batching configuration for model generation
+MODEL_BATCH_SIZE = int(os.environ.get("MODEL_BATCH_SIZE", "8"))
+MODEL_BATCH_WAIT_MS = float(os.environ.get("MODEL_BATCH_WAIT_MS", "10"))
+MODEL_QUEUE_SIZE = int(os.environ.get("MODEL_QUEUE_SIZE", "64"))
+# Token-length bucket edges; only questions in the same bucket share a batch
+MODEL_LENGTH_BUCKETS = sorted(int(b) for b in os.environ.get("MODEL_LENGTH_BUCKETS", "16,32,64,128").split(","))
+
+# Decoding policy: trade beam width for latency when the model is under load
+DECODING_P95_TARGET_MS = float(os.environ.get("DECODING_P95_TARGET_MS", "3000"))
+DECODING_COOLDOWN_S = float(os.environ.get("DECODING_COOLDOWN_S", "5"))
+
+DECODING_POLICY = DecodingPolicy(
+    target_p95_ms=DECODING_P95_TARGET_MS,
+    queue_high=2 * MODEL_BATCH_SIZE,
+    queue_low=MODEL_BATCH_SIZE // 4,
+    cooldown_s=DECODING_COOLDOWN_S,
+)
+
+# Streaming answers decode one question at a time, greedily unless sampling is enabled
+STREAM_DO_SAMPLE = os.environ.get("STREAM_DO_SAMPLE", "0") == "1"
+
+# Executor pools that keep blocking work off the event loop
+INFERENCE_POOL_SIZE = int(os.environ.get("INFERENCE_POOL_SIZE", str(MODEL_BATCH_SIZE)))
+INFERENCE_QUEUE_LIMIT = int(os.environ.get("INFERENCE_QUEUE_LIMIT", "32"))
+SEARCH_POOL_SIZE = int(os.environ.get("SEARCH_POOL_SIZE", "4"))
+SEARCH_QUEUE_LIMIT = int(os.environ.get("SEARCH_QUEUE_LIMIT", "16"))
+POOL_RETRY_AFTER = int(os.environ.get("POOL_RETRY_AFTER", "2"))
+
+INFERENCE_POOL = BoundedExecutor("inference", INFERENCE_POOL_SIZE, INFERENCE_QUEUE_LIMIT, retry_after=POOL_RETRY_AFTER)
+SEARCH_POOL = BoundedExecutor("search", SEARCH_POOL_SIZE, SEARCH_QUEUE_LIMIT, retry_after=POOL_RETRY_AFTER)
+
+# Uploaded documents are analyzed in overlapping windows of DOCUMENT_WINDOW_SIZE
+# characters; DOCUMENT_POOL_SIZE + DOCUMENT_QUEUE_LIMIT analyses run at once
+DOCUMENT_WINDOW_SIZE = int(os.environ.get("DOCUMENT_WINDOW_SIZE", str(STREAM_CHUNK_SIZE)))
+DOCUMENT_WINDOW_OVERLAP = int(os.environ.get("DOCUMENT_WINDOW_OVERLAP", str(STREAM_OVERLAP)))
+DOCUMENT_POOL_SIZE = int(os.environ.get("DOCUMENT_POOL_SIZE", "2"))
+DOCUMENT_QUEUE_LIMIT = int(os.environ.get("DOCUMENT_QUEUE_LIMIT", "4"))
+# Events sent to the client per pool task
+DOCUMENT_EVENT_BATCH = 256
+# /documents/analyze/batch fans documents out over this many worker processes
+# in each server process; by default the CPUs are split between the server
+# processes (WEB_CONCURRENCY), and never more than the CPU count
+DOCUMENT_BATCH_WORKERS = min(
+    os.cpu_count() or 1,
+    int(os.environ.get("DOCUMENT_BATCH_WORKERS", "0"))
+    or max(1, (os.cpu_count() or 1) // max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))),
+)
+DOCUMENT_BATCH_MAX_FILES = int(os.environ.get("DOCUMENT_BATCH_MAX_FILES", "100"))
+
+DOCUMENT_POOL = BoundedExecutor("document", DOCUMENT_POOL_SIZE, DOCUMENT_QUEUE_LIMIT, retry_after=POOL_RETRY_AFTER)
+DOCUMENT_PROCESSOR = DocumentProcessor()
+
+# Outbound DuckDuckGo requests share one pooled async client
+DUCKDUCKGO_URL = os.environ.get("DUCKDUCKGO_URL", DEFAULT_DUCKDUCKGO_URL)
+SEARCH_MAX_CONNECTIONS = int(os.environ.get("SEARCH_MAX_CONNECTIONS", "8"))
+SEARCH_CONNECT_TIMEOUT = float(os.environ.get("SEARCH_CONNECT_TIMEOUT", "3"))
+SEARCH_READ_TIMEOUT = float(os.environ.get("SEARCH_READ_TIMEOUT", "5"))
+SEARCH_POOL_TIMEOUT = float(os.environ.get("SEARCH_POOL_TIMEOUT", "2"))
+
+SEARCH_CLIENT = SearchClient(
+    DUCKDUCKGO_URL,
+    max_connections=SEARCH_MAX_CONNECTIONS,
+    connect_timeout=SEARCH_CONNECT_TIMEOUT,
+    read_timeout=SEARCH_READ_TIMEOUT,
+    pool_timeout=SEARCH_POOL_TIMEOUT,
+)
+
+# Search result cache: stale results are served while a background refresh runs,
+# and empty or failed searches are remembered briefly
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "512"))
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_STALE_TTL = float(os.environ.get("SEARCH_CACHE_STALE_TTL", "86400"))
+SEARCH_CACHE_NEGATIVE_TTL = float(os.environ.get("SEARCH_CACHE_NEGATIVE_TTL", "60"))
+
+SEARCH_CACHE = SearchCache(
+    max_entries=SEARCH_CACHE_SIZE,
+    fresh_ttl=SEARCH_CACHE_TTL,
+    stale_ttl=SEARCH_CACHE_STALE_TTL,
+    negative_ttl=SEARCH_CACHE_NEGATIVE_TTL,
+)
+# Background refresh tasks, referenced here so they are not garbage collected mid-flight
+SEARCH_REFRESH_TASKS = set()
+
+# Opt-in hedging: start the search alongside generation when the model answer is likely to be rejected
+SPECULATIVE_SEARCH = os.environ.get("SPECULATIVE_SEARCH", "0") == "1"
+SPECULATIVE_SEARCH_THRESHOLD = float(os.environ.get("SPECULATIVE_SEARCH_THRESHOLD", "0.5"))
+
+
+# Largest number of questions accepted by one /ask/batch request
+ASK_BATCH_MAX_QUESTIONS = int(os.environ.get("ASK_BATCH_MAX_QUESTIONS", "100"))
+
+# Answer cache for repeated questions; search answers go stale sooner than model answers
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_MODEL_TTL = float(os.environ.get("ANSWER_CACHE_MODEL_TTL", "86400"))
+ANSWER_CACHE_SEARCH_TTL = float(os.environ.get("ANSWER_CACHE_SEARCH_TTL", "3600"))
+ANSWER_CACHE_FILE = os.environ.get("ANSWER_CACHE_FILE", "")
+
+ANSWER_CACHE = AnswerCache(
+    max_entries=ANSWER_CACHE_SIZE,
+    ttls={
+        "model": ANSWER_CACHE_MODEL_TTL,
+        "search": ANSWER_CACHE_SEARCH_TTL,
+        # Low-quality model answer used because search failed; retry it as often as search
+        "model_last_resort": ANSWER_CACHE_SEARCH_TTL,
+    },
+    path=ANSWER_CACHE_FILE,
+)
+
+# Retrieval index over the curated legal Q&A dataset
+LEGAL_DATASET_PATH = os.environ.get("LEGAL_DATASET_PATH", DEFAULT_DATASET_PATH)
+RETRIEVAL_INDEX_DIR = os.environ.get("RETRIEVAL_INDEX_DIR", DEFAULT_INDEX_DIR)
+RETRIEVAL_MIN_SCORE = float(os.environ.get("RETRIEVAL_MIN_SCORE", "0.8"))
+RETRIEVAL_INDEX = load_or_build_index(RETRIEVAL_INDEX_DIR, LEGAL_DATASET_PATH)
+if RETRIEVAL_INDEX is None:
+    logger.warning(f"Retrieval unavailable: no index in {RETRIEVAL_INDEX_DIR} and no dataset to build one; questions go straight to the model")
+
+# Canned answers file, reloaded on SIGHUP or POST /admin/canned-answers/reload
+CANNED_ANSWERS_PATH = os.environ.get("CANNED_ANSWERS_PATH", DEFAULT_CANNED_ANSWERS_PATH)
+# Token for the admin endpoints, sent as X-Admin-Token; they are disabled while it is empty
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Request profiling, off unless a sample rate or header tokens are set
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+# Comma-separated tokens of the clients allowed to request a profile with the X-Profile header
+PROFILE_TOKENS = [token.strip() for token in os.environ.get("PROFILE_TOKENS", "").split(",") if token.strip()]
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "./profiles")
+
+PROFILER = RequestProfiler(PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_TOKENS)
+PROFILE_WRITE_TASKS = set()
 
 # Request models
 class QuestionRequest(BaseModel):
     question: str
     language: str = "en"  # Default to English
 
+class BatchQuestionRequest(BaseModel):
+    questions: List[QuestionRequest]
+
+# ----- METRICS -----
+# Served in Prometheus text format on /metrics. Recording is a lock and a
+# bisect per observation; queue depths are read only when scraped. Each
+# worker process keeps its own metrics.
+METRICS = Registry()
+STAGE_SECONDS = METRICS.histogram(
+    "legal_assistant_stage_seconds", "Time spent in each stage of answering a question", ["stage"]
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "legal_assistant_request_seconds", "Time to answer a question, by endpoint and the route that answered", ["endpoint", "route"]
+)
+ROUTES_TOTAL = METRICS.counter(
+    "legal_assistant_routes_total", "Questions answered, by endpoint and the route that answered", ["endpoint", "route"]
+)
+MODEL_GENERATE_SECONDS = METRICS.histogram(
+    "legal_assistant_model_generate_seconds", "Duration of MODEL.generate calls, by decoding tier", ["tier"]
+)
+MODEL_BATCH_QUESTIONS = METRICS.histogram(
+    "legal_assistant_model_batch_questions", "Questions per batched generate call", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+MODEL_ERRORS_TOTAL = METRICS.counter(
+    "legal_assistant_model_errors_total", "Questions that got no model answer because of an error", ["reason"]
+)
+SEARCH_SECONDS = METRICS.histogram(
+    "legal_assistant_search_seconds", "Duration of duckduckgo_search calls, by search cache state", ["cache"]
+)
+SEARCH_ERRORS_TOTAL = METRICS.counter(
+    "legal_assistant_search_errors_total", "Failed DuckDuckGo searches", ["reason"]
+)
+METRICS.gauge("legal_assistant_model_ready", "1 once the model is loaded", lambda: int(MODEL is not None))
+METRICS.gauge("legal_assistant_model_queue_depth", "Questions waiting for the model batcher", lambda: MODEL_BATCHER.queue_depth())
+METRICS.gauge(
+    "legal_assistant_pool_in_flight", "Tasks running or queued on each executor pool",
+    lambda: {(pool.name,): pool.in_flight() for pool in (INFERENCE_POOL, SEARCH_POOL, DOCUMENT_POOL)}, ["pool"]
+)
+METRICS.gauge("legal_assistant_search_in_flight", "Outbound DuckDuckGo requests in flight", lambda: SEARCH_CLIENT.in_flight)
+# The caches already count their lookups, so these are read from them when scraped
+METRICS.counter_callback(
+    "legal_assistant_answer_cache_lookups_total", "Answer cache lookups, by result",
+    lambda: {("hit",): ANSWER_CACHE.hits, ("miss",): ANSWER_CACHE.misses}, ["result"]
+)
+METRICS.counter_callback(
+    "legal_assistant_search_cache_lookups_total", "Search cache lookups, by result",
+    lambda: {
+        ("fresh",): SEARCH_CACHE.hits, ("stale",): SEARCH_CACHE.stale_hits,
+        ("negative",): SEARCH_CACHE.negative_hits, ("miss",): SEARCH_CACHE.misses,
+    },
+    ["result"],
+)
+
+def record_route(endpoint, route, start):
+    """Count the route that answered a question and the time since `start`"""
+    ROUTES_TOTAL.inc(endpoint, route)
+    REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint, route)
+
+# ----- KEYWORD ROUTING -----
+# Term lists for the routing checks; all of them are matched against the
+# question in one pass, together with the canned answer keys, by the matcher of
+# CANNED_ANSWERS, and against the answer by ANSWER_MATCHER
+
+GREETINGS = ["hello", "hi", "hey", "greetings", "good morning", "good afternoon",
+             "good evening", "bonjour", "salut", "hola", "what's up"]
+
+# Questions about violence get the safe override response before anything else
+VIOLENCE_TERMS = ["kill", "killing", "murder", "suicide", "bomb", "weapon", "terror"]
+
+GEOGRAPHY_TERMS = ["located", "where is", "continent", "map", "border", "capital city",
+                   "geography", "population", "climate", "country location"]
+
+NON_LEGAL_TOPICS = [
+    "recipe", "cook", "food", "sport", "football", "soccer", "basketball",
+    "movie", "music", "song", "artist", "celebrity", "weather", "bitcoin",
+    "cryptocurrency", "investment", "dating", "relationship", "game", "gaming",
+    "technology", "computer", "phone", "android", "iphone", "travel", "vacation",
+    "hotel", "flight", "tourism"
+]
+
+COUNTRIES = ["usa", "america", "american", "united states", "canada", "canadian",
+             "uk", "britain", "british", "england", "france", "french", "germany",
+             "german", "nigeria", "nigerian", "south africa", "ghana", "kenya",
+             "egypt", "morocco", "algeria", "australia", "china", "chinese",
+             "japan", "japanese", "rwanda", "russia", "india"]
+
+# Only flag as other country if explicitly asking about another country's laws
+LEGAL_TERMS = ["law", "legal", "court", "right", "constitution", "legislation", "judiciary"]
+
+# Out-of-domain questions answered with the foreign law response
+FOREIGN_LAW_COUNTRIES = ["usa", "america", "uk", "france", "nigeria", "rwanda"]
+FOREIGN_LAW_TERMS = ["law", "legal", "right"]
+
+# Question terms that make an affirmative model answer unsafe
+SAFETY_VIOLENCE_TERMS = ["kill", "killing", "murder", "hurt", "harm", "attack"]
+AFFIRMATIVE_STARTS = ("yes", "sure", "definitely", "absolutely", "of course")
+
+# Block dangerous responses about killing/violence
+DANGEROUS_PATTERNS = [
+    "killing is good", "i will kill", "how to kill", "murder",
+    "commit suicide", "make a bomb", "weapon", "terror", "yes, and i will kill",
+    "yes, killing is", "killing is not bad", "harmful", "illegal activity"
+]
+
+# Common incorrect patterns in model's responses
+PROBLEMATIC_PATTERNS = [
+    # Generic article 1 response to unrelated questions
+    "article 1 of the constitution affirms",
+    # Incomplete or incorrect protest information
+    "right to protest against racism",
+    # Clearly wrong information
+    "cameroon is the first to approve",
+    # Generic yes/no with little substance
+    "yes, cameroon has",
+    # Incorrect references
+    "national law no. 2010012",
+    "1951 peace treaty",
+    # Too simplistic/uninformative
+    "cameroon has compiled a list"
+]
+
+# Question topic -> words the answer must mention to be on topic
+TOPIC_ANSWER_TERMS = {
+    "child": ["child", "minor"],
+    "protest": ["protest", "assembly"],
+    "judicial reform": ["reform"],
+}
+
+# Source labels for model answers, first matching topic wins
+MODEL_SOURCE_TOPICS = [
+    ("Constitutional Law", ["constitution"]),
+    ("Judiciary", ["court", "judge", "judicial"]),
+    ("Government", ["president", "minister", "government"]),
+    ("Children's Rights", ["child"]),
+    ("Criminal Law", ["criminal", "penal"]),
+]
+
+ROUTING_TERMS = {
+    "greeting": GREETINGS,
+    "violence": VIOLENCE_TERMS,
+    "geography": GEOGRAPHY_TERMS,
+    "non_legal_topic": NON_LEGAL_TOPICS,
+    "country": COUNTRIES,
+    "legal_term": LEGAL_TERMS,
+    "cameroon": ["cameroon"],
+    "foreign_law_country": FOREIGN_LAW_COUNTRIES,
+    "foreign_law_term": FOREIGN_LAW_TERMS,
+    "safety_violence": SAFETY_VIOLENCE_TERMS,
+    **{f"topic:{topic}": [topic] for topic in TOPIC_ANSWER_TERMS},
+    **{f"source:{label}": terms for label, terms in MODEL_SOURCE_TOPICS},
+}
+
+# Canned answers for common questions; their keys are compiled into the same
+# matcher as ROUTING_TERMS, and reload_canned_answers swaps in a new store
+CANNED_ANSWERS = load_canned_answers(CANNED_ANSWERS_PATH, ROUTING_TERMS)
+CANNED_ANSWERS_LOCK = threading.Lock()
+# Reloads started by SIGHUP, kept until they finish
+CANNED_ANSWERS_RELOAD_TASKS = set()
+logger.info(f"Canned answers loaded from {CANNED_ANSWERS_PATH}: {CANNED_ANSWERS.stats()['answers']}")
+
+ANSWER_MATCHER = KeywordMatcher({
+    "dangerous": DANGEROUS_PATTERNS,
+    "problematic": PROBLEMATIC_PATTERNS,
+    **{f"on_topic:{topic}": terms for topic, terms in TOPIC_ANSWER_TERMS.items()},
+})
+
+def match_question(question):
+    """Scan the lowercased question once for every routing term list and canned answer key"""
+    return CANNED_ANSWERS.scan(question)
+
+def reload_canned_answers(only_if_changed=False):
+    """Load the canned answer file again and swap it in atomically
+
+    Raises OSError or ValueError, keeping the current store, if the file
+    cannot be read or is malformed.
+    """
+    global CANNED_ANSWERS
+    with CANNED_ANSWERS_LOCK:
+        if only_if_changed and os.path.getmtime(CANNED_ANSWERS_PATH) == CANNED_ANSWERS.mtime:
+            return CANNED_ANSWERS
+        store = load_canned_answers(CANNED_ANSWERS_PATH, ROUTING_TERMS)
+        CANNED_ANSWERS = store
+    logger.info(f"Canned answers reloaded from {CANNED_ANSWERS_PATH}: {store.stats()['answers']}")
+    return store
+
 # ----- CORE UTILITY FUNCTIONS -----
 
 def preprocess_text(text):
@@ -65,116 +467,63 @@ def preprocess_text(text):
     
     return text
 
-def safety_filter(question, answer):
+def safety_filter(question, answer, matches=None):
     """Critical safety filter to prevent harmful content"""
-    question_lower = question.lower()
+    if matches is None:
+        matches = match_question(question)
     answer_lower = answer.lower()
     
-    # Block dangerous responses about killing/violence
-    dangerous_patterns = [
-        "killing is good", "i will kill", "how to kill", "murder", 
-        "commit suicide", "make a bomb", "weapon", "terror", "yes, and i will kill", 
-        "yes, killing is", "killing is not bad", "harmful", "illegal activity"
-    ]
-    
     # Check if answer contains dangerous content
-    for pattern in dangerous_patterns:
-        if pattern in answer_lower:
-            return True
+    if ANSWER_MATCHER.scan(answer_lower).has("dangerous"):
+        return True
             
     # Check if question is about violence and answer is affirmative
-    violence_terms = ["kill", "killing", "murder", "hurt", "harm", "attack"]
-    affirmative_starts = ["yes", "sure", "definitely", "absolutely", "of course"]
-    
-    if any(term in question_lower for term in violence_terms):
-        if any(answer_lower.startswith(start) for start in affirmative_starts):
-            return True
+    if matches.has("safety_violence") and answer_lower.startswith(AFFIRMATIVE_STARTS):
+        return True
     
     return False
 
-def is_greeting(text):
+def is_greeting(text, matches=None):
     """Check if the input text is a greeting"""
-    greetings = ["hello", "hi", "hey", "greetings", "good morning", "good afternoon", 
-                "good evening", "bonjour", "salut", "hola", "what's up"]
-    
-    text_lower = text.lower().strip()
+    if matches is None:
+        matches = match_question(text)
+    if not matches.has("greeting"):
+        return False
     
-    # Check if text contains only a greeting
-    if text_lower in greetings:
-        return True
-        
-    # Check if text starts with a greeting followed by punctuation
-    for greeting in greetings:
-        if text_lower.startswith(greeting + " ") or text_lower == greeting:
+    # The greeting must open the stripped text and be the whole of it or followed by a space
+    text_lower = matches.text
+    start = len(text_lower) - len(text_lower.lstrip())
+    end = len(text_lower.rstrip())
+    for greeting in GREETINGS:
+        stop = start + len(greeting)
+        if text_lower.startswith(greeting, start) and (stop == end or text_lower[stop:stop + 1] == " "):
             return True
             
     return False
 
-def is_out_of_domain(question):
+def is_out_of_domain(question, matches=None):
     """Check if question is outside of Cameroonian law and governance"""
-    question_lower = question.lower()
+    if matches is None:
+        matches = match_question(question)
     
-    # Check for geography questions
-    geography_terms = ["located", "where is", "continent", "map", "border", "capital city", 
-                      "geography", "population", "climate", "country location"]
-    if any(term in question_lower for term in geography_terms):
+    # Check for geography questions and non-legal topics
+    if matches.has("geography") or matches.has("non_legal_topic"):
         return True
     
-    # Check for non-legal topics
-    non_legal_topics = [
-        "recipe", "cook", "food", "sport", "football", "soccer", "basketball", 
-        "movie", "music", "song", "artist", "celebrity", "weather", "bitcoin",
-        "cryptocurrency", "investment", "dating", "relationship", "game", "gaming",
-        "technology", "computer", "phone", "android", "iphone", "travel", "vacation",
-        "hotel", "flight", "tourism"
-    ]
-    
-    for topic in non_legal_topics:
-        if topic in question_lower:
-            return True
-    
     # Check for questions about other countries' laws (excluding Cameroon)
-    countries = ["usa", "america", "american", "united states", "canada", "canadian", 
-                "uk", "britain", "british", "england", "france", "french", "germany", 
-                "german", "nigeria", "nigerian", "south africa", "ghana", "kenya", 
-                "egypt", "morocco", "algeria", "australia", "china", "chinese", 
-                "japan", "japanese", "rwanda", "russia", "india"]
-    
-    # Only flag as other country if explicitly asking about another country's laws
-    legal_terms = ["law", "legal", "court", "right", "constitution", "legislation", "judiciary"]
-    
-    if "cameroon" not in question_lower:
-        for country in countries:
-            if country in question_lower:
-                # If asking about another country's law specifically
-                if any(term in question_lower for term in legal_terms):
-                    return True
+    if not matches.has("cameroon") and matches.has("country") and matches.has("legal_term"):
+        return True
     
     return False
 
-def is_low_quality_answer(question, answer):
+def is_low_quality_answer(question, answer, matches=None):
     """Better detection of poor quality model responses"""
+    if matches is None:
+        matches = match_question(question)
     answer_lower = answer.lower()
-    question_lower = question.lower()
-    
-    # Check for common incorrect patterns in model's responses
-    problematic_patterns = [
-        # Generic article 1 response to unrelated questions
-        "article 1 of the constitution affirms",
-        # Incomplete or incorrect protest information
-        "right to protest against racism",
-        # Clearly wrong information
-        "cameroon is the first to approve",
-        # Generic yes/no with little substance
-        "yes, cameroon has",
-        # Incorrect references
-        "national law no. 2010012", 
-        "1951 peace treaty",
-        # Too simplistic/uninformative
-        "cameroon has compiled a list"
-    ]
+    answer_matches = ANSWER_MATCHER.scan(answer_lower)
     
-    if any(pattern in answer_lower for pattern in problematic_patterns):
+    if answer_matches.has("problematic"):
         return True
         
     # The answer is way too short
@@ -186,14 +535,9 @@ def is_low_quality_answer(question, answer):
         return True
         
     # Answers don't match the question topic
-    if "child" in question_lower and "child" not in answer_lower and "minor" not in answer_lower:
-        return True
-        
-    if "protest" in question_lower and "protest" not in answer_lower and "assembly" not in answer_lower:
-        return True
-        
-    if "judicial reform" in question_lower and "reform" not in answer_lower:
-        return True
+    for topic in TOPIC_ANSWER_TERMS:
+        if matches.has(f"topic:{topic}") and not answer_matches.has(f"on_topic:{topic}"):
+            return True
         
     return False
 
@@ -301,107 +645,235 @@ def get_safe_override_response(language="en"):
             "Le système juridique est conçu pour protéger la vie humaine et la sécurité."
         ), "Droit Pénal"
 
+def nearest_dataset_question(question):
+    """(similarity, doc) of the closest curated dataset question, (0.0, None) if there is none"""
+    if RETRIEVAL_INDEX is None:
+        return 0.0, None
+    results = RETRIEVAL_INDEX.search(question, top_k=1)
+    return results[0] if results else (0.0, None)
+
+def closest_dataset_match(question, language):
+    """(similarity, doc) of the closest curated dataset question, None if retrieval does not apply"""
+    # The curated dataset is English only
+    if RETRIEVAL_INDEX is None or language != "en":
+        return None
+    return nearest_dataset_question(question)
+
+def get_retrieval_answer(closest):
+    """Return a curated dataset answer when the closest dataset question matches closely enough"""
+    if closest is None or closest[0] < RETRIEVAL_MIN_SCORE:
+        return None
+
+    score, doc = closest
+    logger.info(f"Retrieval match ({score:.2f}): '{doc['question']}'")
+
+    answer = f"## Cameroon Legal Information\n\n{doc['answer']}"
+    if doc["article_reference"]:
+        answer += f"\n\n**Reference:** {doc['article_reference']}"
+
+    return answer, doc["category"] or "Cameroonian Law"
+
+def get_fallback_answer(language="en"):
+    """Response used when no answer source produced anything"""
+    if language == 'en':
+        return (
+            "## Cameroon Legal Information\n\n"
+            "I don't have specific information about that aspect of Cameroonian law. "
+            "For the most accurate information on this topic, I would recommend consulting "
+            "the Cameroonian legal code or reaching out to a qualified legal professional in Cameroon."
+        )
+    else:
+        return (
+            "## Information Juridique du Cameroun\n\n"
+            "Je n'ai pas d'informations spécifiques sur cet aspect du droit camerounais. "
+            "Pour des informations plus précises sur ce sujet, je vous recommande de consulter "
+            "le code juridique camerounais ou de contacter un professionnel du droit qualifié au Cameroun."
+        )
+
+def get_technical_error_response(language="en"):
+    """Response used when answering a question failed with an unexpected error"""
+    if language == 'en':
+        response = "## Technical Notice\n\nI apologize for the technical difficulties. Please try asking your question about Cameroonian law in a different way."
+        return response, "System Notice"
+    else:
+        response = "## Avis Technique\n\nJe m'excuse pour les difficultés techniques. Veuillez essayer de poser votre question sur le droit camerounais d'une manière différente."
+        return response, "System Notice"
+
 # ----- MODEL AND SEARCH FUNCTIONS -----
 
-def get_answer_from_model(question, language):
-    """Get answer from the model"""
-    try:
-        if MODEL is None or TOKENIZER is None:
-            logger.warning("Model not available")
-            return None, None
-            
-        # Preprocess the question
-        processed_question = preprocess_text(question)
-        input_text = "question: " + processed_question
+def tokenize_question(question):
+    """Tokenize a question for the model without padding"""
+    input_text = "question: " + preprocess_text(question)
+    return TOKENIZER(input_text, max_length=128, truncation=True).input_ids
+
+def length_bucket(input_ids):
+    """Index of the smallest length bucket that fits the tokenized question"""
+    return bisect.bisect_left(MODEL_LENGTH_BUCKETS, len(input_ids))
+
+def generate_answers(batch_input_ids):
+    """Run one generate call for a batch of tokenized questions, padded to the longest
 
-        # Generate answer
-        input_ids = TOKENIZER(input_text, return_tensors="pt", max_length=128, padding="max_length", truncation=True).input_ids.to(device)
+    Returns (answer, decoding tier name) for each question.
+    """
+    encoded = TOKENIZER.pad({"input_ids": batch_input_ids}, padding="longest", return_tensors="pt")
+    tier = DECODING_POLICY.select(MODEL_BATCHER.queue_depth())
 
+    import torch
+
+    MODEL_BATCH_QUESTIONS.observe(len(batch_input_ids))
+    with torch.no_grad(), MODEL_GENERATE_SECONDS.time(tier.name):
         outputs = MODEL.generate(
-            input_ids=input_ids,
-            max_length=256,
-            num_beams=4,
-            early_stopping=True,
+            input_ids=encoded.input_ids.to(device),
+            attention_mask=encoded.attention_mask.to(device),
+            max_length=tier.max_length,
+            num_beams=tier.num_beams,
+            early_stopping=tier.num_beams > 1,
             no_repeat_ngram_size=2
         )
 
-        answer = TOKENIZER.decode(outputs[0], skip_special_tokens=True)
-        
+    answers = TOKENIZER.batch_decode(outputs, skip_special_tokens=True)
+    return [(answer, tier.name) for answer in answers]
+
+MODEL_BATCHER = MicroBatcher(
+    generate_answers,
+    max_batch_size=MODEL_BATCH_SIZE,
+    max_wait_ms=MODEL_BATCH_WAIT_MS,
+    max_queue_size=MODEL_QUEUE_SIZE,
+    name="model",
+    bucket_fn=length_bucket,
+)
+
+def get_answer_from_model(question, language, profile=None):
+    """Get answer from the model
+
+    Returns (answer, source, decoding tier name), or Nones if no answer is available.
+    A profiled question is generated on its own, outside the batcher, so its
+    operator profile covers only its own generate call.
+    """
+    try:
+        if MODEL is None or TOKENIZER is None:
+            logger.warning("Model not available")
+            return None, None, None
+
+        # Tokenize here so the batcher can bucket by length, then queue the
+        # question; concurrent questions of similar length share one generate call
+        start = time.perf_counter()
+        if profile is not None:
+            # Generate unbatched on this thread, which is the only one the profilers see
+            answer, tier = profile.generate(generate_answers, [tokenize_question(question)])[0]
+        else:
+            answer, tier = MODEL_BATCHER.submit(tokenize_question(question)).result()
+        DECODING_POLICY.record(tier, (time.perf_counter() - start) * 1000)
+
         # Determine appropriate source
         source = "Cameroonian Law"
         
-        # Return the answer and source
-        return answer, source
+        # Return the answer, source and the decoding tier that produced it
+        return answer, source, tier
         
+    except BatchQueueFullError as e:
+        MODEL_ERRORS_TOTAL.inc("queue_full")
+        logger.warning(f"Model queue full, skipping model answer: {str(e)}")
+        return None, None, None
     except Exception as e:
+        MODEL_ERRORS_TOTAL.inc("error")
         logger.error(f"Error getting model answer: {str(e)}")
         traceback.print_exc()
-        return None, None
+        return None, None, None
+
+def generate_streaming(question, streamer):
+    """Generate an answer for one question, pushing text to the streamer as it is decoded"""
+    import torch
+    from transformers import StoppingCriteriaList
+    from streaming import CancelledByStreamer
+
+    encoded = TOKENIZER("question: " + preprocess_text(question), max_length=128, truncation=True, return_tensors="pt")
+
+    try:
+        with torch.no_grad(), MODEL_GENERATE_SECONDS.time("stream"):
+            MODEL.generate(
+                input_ids=encoded.input_ids.to(device),
+                attention_mask=encoded.attention_mask.to(device),
+                max_length=256,
+                num_beams=1,
+                do_sample=STREAM_DO_SAMPLE,
+                no_repeat_ngram_size=2,
+                streamer=streamer,
+                stopping_criteria=StoppingCriteriaList([CancelledByStreamer(streamer)]),
+            )
+    except Exception:
+        MODEL_ERRORS_TOTAL.inc("error")
+        # Make sure the consumer is not left waiting for more text
+        streamer.end()
+        raise
 
-def duckduckgo_search(query, max_results=5):
+async def fetch_search_results(search_query, max_results):
+    """Fetch and parse one DuckDuckGo result page, bypassing the cache
+
+    Raises SearchPoolTimeout if the search client had no free connection.
+    """
+    logger.info(f"Searching DuckDuckGo for: {search_query}")
+    html = await SEARCH_CLIENT.fetch(search_query)
+    if html is None:
+        SEARCH_ERRORS_TOTAL.inc("fetch")
+        return []
+    
+    # Parsing is CPU-bound, so it runs on the search pool rather than the event loop
+    results = await SEARCH_POOL.run(parse_search_results, html, max_results)
+    
+    logger.info(f"Found {len(results)} results from DuckDuckGo")
+    return results
+
+async def refresh_search_results(cache_key, search_query, max_results):
+    """Re-run a stale search in the background and update the cache"""
+    try:
+        results = await fetch_search_results(search_query, max_results)
+    except SearchPoolTimeout:
+        # Our own connections were busy; leave the entry as it was and retry on the next stale hit
+        SEARCH_CACHE.cancel_refresh(cache_key)
+    except Exception as e:
+        logger.error(f"Background search refresh failed: {str(e)}")
+        SEARCH_CACHE.end_refresh(cache_key, [])
+    else:
+        SEARCH_CACHE.end_refresh(cache_key, results)
+
+async def duckduckgo_search(query, max_results=5):
     """Enhanced and robust DuckDuckGo search implementation"""
+    start = time.perf_counter()
     try:
         # Add Cameroon context to all searches
         search_query = f"{query} Cameroon law legal"
-        encoded_query = quote_plus(search_query)
         
-        url = f"https://html.duckduckgo.com/html/?q={encoded_query}"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml",
-            "Accept-Language": "en-US,en;q=0.9"
-        }
-        
-        logger.info(f"Searching DuckDuckGo for: {search_query}")
-        response = requests.get(url, headers=headers, timeout=10)
+        cache_key = SEARCH_CACHE.make_key(search_query, max_results)
+        cached, state = SEARCH_CACHE.get(cache_key)
+        if state == FRESH:
+            logger.info(f"Using cached search results ({len(cached)} results)")
+            SEARCH_SECONDS.observe(time.perf_counter() - start, "fresh")
+            return cached
+        if state == STALE:
+            # Answer now with the old results and refresh them for the next request
+            if SEARCH_CACHE.begin_refresh(cache_key):
+                task = asyncio.create_task(refresh_search_results(cache_key, search_query, max_results))
+                SEARCH_REFRESH_TASKS.add(task)
+                task.add_done_callback(SEARCH_REFRESH_TASKS.discard)
+            logger.info(f"Using stale cached search results ({len(cached)} results), refreshing")
+            SEARCH_SECONDS.observe(time.perf_counter() - start, "stale")
+            return cached
         
-        if response.status_code != 200:
-            logger.error(f"DuckDuckGo search failed with status: {response.status_code}")
-            return []
-            
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        results = []
-        
-        # Try multiple selector patterns to find results
-        selectors = ['.result__body', '.result', '.results_links', '.web-result']
-        
-        for selector in selectors:
-            search_results = soup.select(selector)
-            if search_results:
-                for result in search_results[:max_results]:
-                    # Try different selectors for title and snippet
-                    title_element = (
-                        result.select_one('.result__title') or 
-                        result.select_one('.result__a') or
-                        result.select_one('h2') or
-                        result.select_one('.title')
-                    )
-                    
-                    snippet_element = (
-                        result.select_one('.result__snippet') or
-                        result.select_one('.snippet') or
-                        result.select_one('.result__body') or
-                        result.select_one('.result-snippet')
-                    )
-                    
-                    if not title_element or not snippet_element:
-                        continue
-                        
-                    title = title_element.get_text() if title_element else ""
-                    snippet = snippet_element.get_text() if snippet_element else ""
-                    
-                    if len(snippet.strip()) > 20:  # Only include substantial results
-                        results.append({
-                            "title": title.strip(),
-                            "snippet": snippet.strip()
-                        })
-                break
-        
-        logger.info(f"Found {len(results)} results from DuckDuckGo")
+        results = await fetch_search_results(search_query, max_results)
+        SEARCH_CACHE.put(cache_key, results)
+        SEARCH_SECONDS.observe(time.perf_counter() - start, "miss")
         return results
         
+    except SearchPoolTimeout:
+        # Local saturation says nothing about the query, so it is not negatively cached
+        SEARCH_ERRORS_TOTAL.inc("pool_timeout")
+        return []
+    except PoolSaturatedError:
+        SEARCH_ERRORS_TOTAL.inc("saturated")
+        raise
     except Exception as e:
+        SEARCH_ERRORS_TOTAL.inc("exception")
         logger.error(f"DuckDuckGo search error: {str(e)}")
         traceback.print_exc()
         return []
@@ -421,132 +893,329 @@ def format_search_results(results, language):
     
     return response
 
-def get_hardcoded_answer(question, language):
+def get_hardcoded_answer(question, language, matches=None):
     """Get hardcoded reliable answers for common questions"""
-    question_lower = question.lower()
-    
-    # Dictionary of common questions with hardcoded reliable answers
-    en_responses = {
-        "prime minister": (
-            "## Cameroon's Prime Minister\n\n"
-            "In Cameroon, the Prime Minister is appointed by the President of the Republic, Paul Biya, according to Article 10 of the 1996 Constitution. This appointment is made at the President's discretion, without requiring parliamentary approval.\n\n"
-            "The Prime Minister serves as the head of government and works under the authority of the President. The Prime Minister coordinates government action and implements policies determined by the President. Cabinet ministers are appointed by the President on the recommendation of the Prime Minister.\n\n"
-            "The current Prime Minister of Cameroon is Dr. Joseph Dion Ngute, who was appointed on January 4, 2019. The Prime Minister's role is largely administrative, as executive power remains concentrated with the President.", 
-            "Government"
-        ),
-        "president": (
-            "## President of Cameroon\n\n"
-            "Paul Biya is the President of Cameroon. He has been in power since November 6, 1982, making him one of Africa's longest-serving heads of state. As President, he serves as both Head of State and head of the executive branch.\n\n"
-            "Under the Constitution, the President has extensive powers including appointing the Prime Minister and cabinet, serving as commander-in-chief of the armed forces, negotiating and ratifying treaties, and exercising regulatory powers. Constitutional amendments in 1996 and 2008 extended the presidential term from 5 to 7 years and removed term limits, allowing unlimited re-elections.\n\n"
-            "The President is elected by direct universal suffrage for a 7-year term. Paul Biya was most recently re-elected in October 2018.", 
-            "Government"
-        ),
-        "judges": (
-            "## Judicial Appointments in Cameroon\n\n"
-            "In Cameroon, judges are appointed by the President of the Republic upon proposal by the Higher Judicial Council (Conseil Supérieur de la Magistrature). This process is established by Article 37 of the Constitution.\n\n"
-            "The Higher Judicial Council is chaired by the President himself, with the Minister of Justice serving as vice-chair. This structure gives the executive branch significant influence over judicial appointments, raising concerns about judicial independence.\n\n"
-            "Cameroonian judges are divided into two categories: judges of the bench (magistrats du siège) who adjudicate cases, and judges of the prosecution (magistrats du parquet) who represent the public interest. All judges receive their training at the National School of Administration and Magistracy (ENAM).\n\n"
-            "Under Law No. 2006/015 of December 29, 2006, judges are expected to be independent in their decision-making, though structural challenges to this independence have been noted by legal scholars and international organizations.", 
-            "Judiciary"
-        ),
-        "court": (
-            "## Cameroonian Court System\n\n"
-            "The Cameroonian court system consists of a four-tier hierarchy:\n\n"
-            "1. The **Supreme Court** (Cour Suprême): The highest court in the country, it reviews decisions from lower courts and has jurisdiction over constitutional matters, administrative disputes, and cases involving high-ranking officials.\n\n"
-            "2. **Courts of Appeal** (Cours d'Appel): Located in each region, they hear appeals from High Courts and Courts of First Instance.\n\n"
-            "3. **High Courts** (Tribunaux de Grande Instance): These have jurisdiction over serious civil and criminal matters.\n\n"
-            "4. **Courts of First Instance** (Tribunaux de Première Instance): The entry point for most legal cases, handling minor civil and criminal matters.\n\n"
-            "Additionally, Cameroon has specialized courts including Administrative Courts, Audit Courts, Military Tribunals, and customary law courts in certain regions. The judicial system follows both the English common law and French civil law traditions due to Cameroon's unique colonial history, creating a bijural legal system.", 
-            "Judiciary"
-        ),
-        "constitution": (
-            "## Cameroonian Constitution\n\n"
-            "Cameroon's current constitution was adopted in 1972 and has been amended several times, most significantly in 1996 and 2008. It establishes a unitary state with a presidential system of government.\n\n"
-            "Key features of the Cameroonian Constitution include:\n\n"
-            "1. **Government Structure**: Establishes three branches—executive, legislative, and judicial—with significant powers granted to the executive.\n\n"
-            "2. **Fundamental Rights**: Guarantees civil liberties including freedom of expression, association, and religion, though implementation has been criticized.\n\n"
-            "3. **Bilingualism**: Establishes both English and French as official languages, reflecting Cameroon's colonial heritage.\n\n"
-            "4. **Decentralization**: Provides for regional and local authorities with limited autonomy.\n\n"
-            "5. **Presidential Powers**: Grants extensive powers to the President, including appointing the Prime Minister, cabinet members, and judges.\n\n"
-            "The 1996 amendment introduced provisions for decentralized territorial communities, while the 2008 amendment notably removed presidential term limits. Constitutional reforms remain a topic of ongoing debate, particularly regarding greater regional autonomy and power distribution.", 
-            "Legal System"
-        ),
-        "child": (
-            "## Children's Rights in Cameroon\n\n"
-            "Children's rights in Cameroon are protected through various legal frameworks:\n\n"
-            "1. **International Commitments**: Cameroon has ratified the UN Convention on the Rights of the Child (CRC) and the African Charter on the Rights and Welfare of the Child.\n\n"
-            "2. **Constitution**: Article 65 incorporates international treaties into national law, giving constitutional protection to children's rights.\n\n"
-            "3. **Specific Laws**:\n"
-            "   - Law No. 98/004 on Education Guidelines guarantees the right to education\n"
-            "   - Law No. 2005/015 on Combating Child Trafficking and Slavery\n"
-            "   - Labor Code (Law No. 92/007) prohibits child labor under age 14\n"
-            "   - Penal Code protects children from abuse and exploitation\n\n"
-            "4. **Legal Protections**: Children have rights to identity (birth registration), education, healthcare, protection from abuse and exploitation, and special judicial procedures.\n\n"
-            "5. **Juvenile Justice**: Special courts and procedures exist for minors in conflict with the law, focusing on rehabilitation rather than punishment.\n\n"
-            "Despite these legal protections, implementation challenges persist, particularly in rural areas where traditional practices sometimes conflict with formal legal frameworks.", 
-            "Children's Rights"
-        ),
-        "protest": (
-            "## Protest Rights in Cameroon\n\n"
-            "In Cameroon, the right to peaceful assembly is recognized in principle under Article 21 of the Constitution, which guarantees freedom of expression. However, in practice, public demonstrations are regulated by Law No. 90/055 of December 19, 1990, which requires prior authorization from administrative authorities.\n\n"
-            "Organizers must submit a declaration to local authorities at least 3 days before the planned event, specifying details such as purpose, date, time, and location. Authorities can prohibit demonstrations deemed to threaten public order.\n\n"
-            "Implementation of these regulations has been criticized by human rights organizations, noting that permissions for demonstrations by opposition groups are frequently denied. The law grants significant discretion to local authorities in determining what constitutes a threat to public order.", 
-            "Constitutional Rights"
-        ),
-        "law": (
-            "## Cameroon Legal System\n\n"
-            "Cameroon's legal system encompasses various key areas of legislation, including:\n\n"
-            "1. **Constitution of 1972** (amended 1996, 2008): The foundational legal document establishing government structure and fundamental rights.\n\n"
-            "2. **Civil Code**: Based on the French Civil Code, governing personal status, contracts, property, and obligations.\n\n"
-            "3. **Penal Code**: Defining criminal offenses and penalties (Law No. 2016/007).\n\n"
-            "4. **Labor Code** (Law No. 92/007): Regulating employment relationships and working conditions.\n\n" 
-            "5. **Family Law**: Including marriage regulations, divorce, and child custody.\n\n"
-            "6. **Commercial Code**: Governing business relations and corporate structures.\n\n"
-            "7. **Land Tenure Law** (Ordinance 74-1, 74-2): Establishing land ownership systems.\n\n"
-            "8. **Environmental Law** (Law No. 96/12): Framework for environmental protection.\n\n"
-            "9. **Investment Code**: Regulations for domestic and foreign investments.\n\n"
-            "Cameroon's legal system is mixed, reflecting both civil law (French) and common law (British) traditions due to its colonial history.", 
-            "Legal System"
-        ),
-        "kill": (
-            "## Cameroon Criminal Law on Homicide\n\n"
-            "Homicide is strictly prohibited under the Cameroon Penal Code. Article 275 classifies murder as a capital offense punishable by death, although there has been a de facto moratorium on executions in recent years.\n\n"
-            "The Penal Code distinguishes between different types of homicide:\n\n"
-            "- **Murder**: Intentional homicide with premeditation\n"
-            "- **Manslaughter**: Intentional homicide without premeditation\n"
-            "- **Negligent homicide**: Death resulting from negligence\n\n"
-            "Self-defense is recognized as a justification for homicide under strict conditions specified in Articles 84 and 85 of the Penal Code, including immediate necessity and proportionality of response.\n\n"
-            "The Cameroonian legal system protects the right to life, and taking human life is a serious criminal offense.", 
-            "Criminal Law"
-        )
-    }
+    store = CANNED_ANSWERS
+    if matches is None:
+        matches = store.scan(question)
+    
+    # Default fallback for questions without hardcoded answers
+    return store.lookup("en" if language == "en" else "fr", matches)
 
-    fr_responses = {
-        "premier ministre": (
-            "## Premier Ministre du Cameroun\n\n"
-            "Au Cameroun, le Premier Ministre est nommé par le Président de la République, Paul Biya, conformément à l'article 10 de la Constitution de 1996. Cette nomination est faite à la discrétion du Président, sans nécessiter l'approbation parlementaire.\n\n"
-            "Le Premier Ministre sert comme chef du gouvernement et travaille sous l'autorité du Président. Le Premier Ministre coordonne l'action gouvernementale et met en œuvre les politiques déterminées par le Président. Les ministres du cabinet sont nommés par le Président sur recommandation du Premier Ministre.\n\n"
-            "L'actuel Premier Ministre du Cameroun est le Dr Joseph Dion Ngute, qui a été nommé le 4 janvier 2019. Le rôle du Premier Ministre est largement administratif, car le pouvoir exécutif reste concentré entre les mains du Président.", 
-            "Gouvernement"
-        ),
-        "président": (
-            "## Président du Cameroun\n\n"
-            "Paul Biya est le Président du Cameroun. Il est au pouvoir depuis le 6 novembre 1982, ce qui fait de lui l'un des chefs d'État africains au pouvoir depuis le plus longtemps. En tant que Président, il sert à la fois comme Chef de l'État et chef du pouvoir exécutif.\n\n"
-            "Selon la Constitution, le Président dispose de pouvoirs étendus, notamment la nomination du Premier ministre et du cabinet, le commandement en chef des forces armées, la négociation et la ratification des traités, et l'exercice des pouvoirs réglementaires. Les amendements constitutionnels de 1996 et 2008 ont prolongé le mandat présidentiel de 5 à 7 ans et supprimé les limitations de mandats, permettant des réélections illimitées.\n\n"
-            "Le Président est élu au suffrage universel direct pour un mandat de 7 ans. Paul Biya a été réélu plus récemment en octobre 2018.", 
-            "Gouvernement"
-        )
-    }
+# ----- SPECULATIVE SEARCH -----
+
+FALLBACK_PREDICTOR = FallbackPredictor(threshold=SPECULATIVE_SEARCH_THRESHOLD)
+# Model answers that lost a hedged race, kept until their outcome is recorded
+SPECULATION_RECORD_TASKS = set()
+
+def retrieval_similarity(question):
+    """Similarity of the question to the closest curated dataset question, 0 if unavailable"""
+    return float(nearest_dataset_question(question)[0])
+
+def touches_checked_topic(matches):
+    """Whether the question mentions a topic whose answers is_low_quality_answer checks"""
+    return any(matches.has(f"topic:{topic}") for topic in TOPIC_ANSWER_TERMS)
+
+def submit_model_question(question):
+    """Queue a question on the model batcher and return the Future of its (answer, tier)"""
+    try:
+        return MODEL_BATCHER.submit(tokenize_question(question))
+    except BatchQueueFullError:
+        MODEL_ERRORS_TOTAL.inc("queue_full")
+        raise
+
+async def await_model_answer(future, start):
+    """Wait for a queued question's answer and record its latency since `start`"""
+    try:
+        answer, tier = await asyncio.wrap_future(future)
+    except Exception:
+        MODEL_ERRORS_TOTAL.inc("error")
+        raise
+    elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(elapsed, "model")
+    DECODING_POLICY.record(tier, elapsed * 1000)
+    return answer, tier
+
+async def queue_model_answer(question):
+    """Queue a question for the model without holding an inference worker
+
+    Cancelling the awaiting task also cancels the queued question, as long
+    as its batch has not started.
+    """
+    start = time.perf_counter()
+    return await await_model_answer(submit_model_question(question), start)
+
+async def record_abandoned_model_answer(model_task, question, bucket, matches):
+    """Record whether a model answer that lost to search would have been rejected"""
+    try:
+        model_answer, _ = await model_task
+    except Exception:
+        return
+    if model_answer:
+        FALLBACK_PREDICTOR.record(bucket, is_low_quality_answer(question, model_answer, matches), hedged=True)
+
+async def hedged_model_and_search(question, language, bucket, matches):
+    """STEPS 5-8 with generation and search running at once
+
+    The first usable answer wins: a safe, good-quality model answer or
+    non-empty search results. The model question holds an INFERENCE_POOL
+    slot until it is answered or dropped; when the pool or the model queue
+    is full, the question is answered from search alone. A losing search is
+    cancelled, and so is a losing model question whose batch has not
+    started. One already generating cannot be stopped, so it finishes in the
+    background and its quality still updates the fallback predictor.
+    """
+    start = time.perf_counter()
+    try:
+        release_slot = INFERENCE_POOL.reserve()
+    except PoolSaturatedError:
+        logger.info(f"Hedged answer {bucket}: inference pool full, search only")
+        return await answer_from_model_output(question, language, matches, None, None, None)
+    try:
+        batch_future = submit_model_question(question)
+    except BatchQueueFullError as e:
+        release_slot()
+        logger.info(f"Hedged answer {bucket}: {str(e)}, search only")
+        return await answer_from_model_output(question, language, matches, None, None, None)
+    timings = {}
+
+    async def timed(name, coro):
+        try:
+            return await coro
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000)
+
+    model_task = asyncio.create_task(timed("model", await_model_answer(batch_future, start)))
+    model_task.add_done_callback(lambda _: release_slot())
+    search_task = asyncio.create_task(timed("search", duckduckgo_search(question)))
+    pending = {model_task, search_task}
+    model_answer, decoding_tier = None, None
+    response, route = None, None
+
+    try:
+        while pending and response is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            if model_task in done:
+                try:
+                    model_answer, decoding_tier = model_task.result()
+                except Exception as e:
+                    logger.error(f"Error getting model answer: {str(e)}")
+
+                if model_answer:
+                    low_quality = is_low_quality_answer(question, model_answer, matches)
+                    FALLBACK_PREDICTOR.record(bucket, low_quality, hedged=True)
+                    if safety_filter(question, model_answer, matches):
+                        logger.warning("SAFETY ALERT: Dangerous model response filtered")
+                        safe_response, source = get_safe_override_response(language)
+                        response, route = {"answer": safe_response, "source": source}, "safety_override"
+                    elif not low_quality:
+                        response = {
+                            "answer": add_markdown_formatting(model_answer),
+                            "source": get_model_answer_source(question, "Cameroonian Law", matches),
+                            "decoding_tier": decoding_tier,
+                        }
+                        route = "model"
+
+            if search_task in done and response is None:
+                try:
+                    search_answer = format_search_results(search_task.result(), language)
+                except PoolSaturatedError as e:
+                    logger.warning(f"Hedged search skipped, {str(e)}")
+                    search_answer = None
+                if search_answer:
+                    response, route = {"answer": search_answer, "source": "Legal Research"}, "search"
+    finally:
+        for task in pending:
+            if task is not model_task:
+                task.cancel()
+            elif batch_future.cancel():
+                # Still queued, so the batcher skips it and no generation is wasted
+                model_task.cancel()
+            else:
+                # Already generating; record whether it would have been rejected once it finishes
+                record_task = asyncio.create_task(record_abandoned_model_answer(model_task, question, bucket, matches))
+                SPECULATION_RECORD_TASKS.add(record_task)
+                record_task.add_done_callback(SPECULATION_RECORD_TASKS.discard)
+
+    if response is None and model_answer:
+        # Search found nothing, so use the low-quality model answer as a last resort
+        response = {"answer": add_markdown_formatting(model_answer), "source": "Cameroonian Law", "decoding_tier": decoding_tier}
+        route = "model_last_resort"
+    elif response is None:
+        response, route = {"answer": get_fallback_answer(language), "source": "Information Notice"}, "fallback"
+
+    unused = "model" if model_task in pending else "search" if search_task in pending else "none"
+    logger.info(
+        f"Hedged answer {bucket}: route={route}, model {timings.get('model', '-')} ms, "
+        f"search {timings.get('search', '-')} ms, unused={unused}"
+    )
+    return response, route
+
+# ----- REQUEST ROUTING -----
+
+def get_model_answer_source(question, model_source, matches=None):
+    """Determine appropriate source label for a model answer"""
+    if matches is None:
+        matches = match_question(question)
     
-    responses = en_responses if language == "en" else fr_responses
+    for label, _ in MODEL_SOURCE_TOPICS:
+        if matches.has(f"source:{label}"):
+            return label
+    return model_source or "Cameroonian Law"
+
+def route_fast_path(question, language, matches=None):
+    """Answer without the model or search when possible (STEPS 1-4)
+
+    Returns ((response, route), None), or (None, closest) if the question needs
+    the model, where closest is the closest_dataset_match the retrieval step found.
+    """
+    if matches is None:
+        matches = match_question(question)
     
-    # Search through hardcoded responses
-    for key, value in responses.items():
-        if key in question_lower:
-            return value
+    # STEP 1: Check for greetings
+    if is_greeting(question, matches):
+        logger.info("Greeting detected")
+        greeting_response, source = get_greeting_response(language)
+        return ({"answer": greeting_response, "source": source}, "greeting"), None
+        
+    # STEP 2: Check for violence-related questions
+    if matches.has("violence"):
+        logger.info("SAFETY ALERT: Potentially harmful question detected")
+        safe_response, source = get_safe_override_response(language)
+        return ({"answer": safe_response, "source": source}, "safety_override"), None
     
-    # Default fallback for questions without hardcoded answers
-    return None
+    # STEP 3: Check for out-of-domain questions
+    if is_out_of_domain(question, matches):
+        logger.info("Out-of-domain question detected")
+        
+        # Specifically identify foreign law questions
+        if matches.has("foreign_law_country") and matches.has("foreign_law_term"):
+            foreign_response, source = get_foreign_law_response(language)
+            return ({"answer": foreign_response, "source": source}, "foreign_law"), None
+                
+        # General out-of-domain response
+        out_of_domain_response, source = get_out_of_domain_response(language)
+        return ({"answer": out_of_domain_response, "source": source}, "out_of_domain"), None
+    
+    # STEP 4: Check hardcoded answers for common questions
+    hardcoded = get_hardcoded_answer(question, language, matches)
+    if hardcoded:
+        answer, source = hardcoded
+        logger.info("Using hardcoded answer")
+        return ({"answer": answer, "source": source}, "hardcoded"), None
+    
+    # STEP 4b: Check the curated dataset before paying for generation
+    with STAGE_SECONDS.time("retrieval"):
+        closest = closest_dataset_match(question, language)
+    retrieved = get_retrieval_answer(closest)
+    if retrieved:
+        answer, source = retrieved
+        logger.info("Using curated dataset answer")
+        return ({"answer": answer, "source": source}, "retrieval"), None
+    
+    return None, closest
+
+# ----- DOCUMENT ANALYSIS -----
+# An upload holds a slot until its response ends and has at most one task on
+# DOCUMENT_POOL at a time, so the pool does not reject an analysis halfway
+DOCUMENT_SLOTS = asyncio.Semaphore(DOCUMENT_POOL_SIZE + DOCUMENT_QUEUE_LIMIT)
+
+class DocumentStreamResponse(StreamingResponse):
+    """NDJSON stream of a document analysis that releases its DOCUMENT_SLOTS slot when the response ends
+
+    A client that disconnects mid-stream leaves the body generator suspended,
+    so it is closed here rather than left for the garbage collector, and the
+    slot is freed right away.
+    """
+
+    def __init__(self, content):
+        super().__init__(content, media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                DOCUMENT_SLOTS.release()
+
+def next_document_events(events):
+    """Advance a document analysis by up to DOCUMENT_EVENT_BATCH events; runs on DOCUMENT_POOL"""
+    return list(itertools.islice(events, DOCUMENT_EVENT_BATCH))
+
+async def stream_document_events(filename, events, batch, start):
+    """Send analysis events as NDJSON, one line each, pulling further batches from the pool"""
+    try:
+        while batch:
+            yield "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in batch)
+            if batch[-1]["event"] == "summary":
+                summary = batch[-1]
+                elapsed_ms = round((time.perf_counter() - start) * 1000)
+                logger.info(
+                    f"Document '{filename}' analyzed in {elapsed_ms} ms: {summary['characters']} characters, "
+                    f"type {summary['document_type']}, {summary['risk_count']} risks"
+                )
+                break
+            batch = await DOCUMENT_POOL.run(next_document_events, events)
+    except Exception as e:
+        logger.error(f"Analysis of document '{filename}' failed: {str(e)}")
+        yield json.dumps({"event": "error", "detail": "Document analysis failed"}) + "\n"
+
+# Started on the first batch request, in each worker process
+DOCUMENT_BATCH_POOL = None
+
+def document_batch_pool():
+    """The process pool that analyzes batch uploads"""
+    global DOCUMENT_BATCH_POOL
+    if DOCUMENT_BATCH_POOL is None:
+        # Spawned rather than forked, as this process already runs threads
+        DOCUMENT_BATCH_POOL = ProcessPoolExecutor(
+            max_workers=DOCUMENT_BATCH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return DOCUMENT_BATCH_POOL
+
+async def stream_document_batch(files):
+    """Analyze uploads on the process pool, sending one NDJSON line per document as each completes, then a summary"""
+    global DOCUMENT_BATCH_POOL
+    summary = BatchSummary(DOCUMENT_BATCH_WORKERS)
+    uploads = iter(files)
+    pending = set()
+    exhausted = False
+    try:
+        pool = document_batch_pool()
+        while pending or not exhausted:
+            # Keep a couple of documents queued per worker rather than reading every upload at once
+            while not exhausted and len(pending) < DOCUMENT_BATCH_WORKERS * 2:
+                upload = next(uploads, None)
+                if upload is None:
+                    exhausted = True
+                    break
+                data = await upload.read()
+                pending.add(asyncio.wrap_future(pool.submit(analyze_bytes, upload.filename, data)))
+            if not pending:
+                break
+            
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield json.dumps({"event": "document", **summary.add(future.result())}, ensure_ascii=False) + "\n"
+        
+        totals = summary.as_dict()
+        logger.info(
+            f"Batch of {totals['documents']} documents analyzed in {totals['time_ms']:.0f} ms "
+            f"({totals['documents_per_s']} documents/s, {totals['mb_per_s']} MB/s)"
+        )
+        yield json.dumps({"event": "summary", **totals}) + "\n"
+    except Exception as e:
+        if isinstance(e, BrokenProcessPool):
+            # A worker died; start a fresh pool on the next request
+            DOCUMENT_BATCH_POOL = None
+        logger.error(f"Document batch failed after {summary.documents} documents: {str(e)}")
+        yield json.dumps({"event": "error", "detail": "Document analysis failed"}) + "\n"
+    finally:
+        for future in pending:
+            future.cancel()
 
 # ----- API ENDPOINTS -----
 
@@ -558,171 +1227,592 @@ async def read_root():
         "description": "API for providing information about Cameroonian law and legal system",
         "endpoints": {
             "/ask": "POST - Ask a question about Cameroonian law",
-            "/test-search": "GET - Test the search functionality directly"
+            "/ask/stream": "POST - Ask a question and receive the answer as server-sent events",
+            "/ask/batch": "POST - Ask many questions at once; answers come back in input order",
+            "/documents/analyze": "POST - Upload a document; its references and risks stream back as NDJSON",
+            "/documents/analyze/batch": "POST - Upload many documents; each one's analysis streams back as NDJSON as it completes",
+            "/test-search": "GET - Test the search functionality directly",
+            "/cache/stats": "GET - Answer cache size and hit rate",
+            "/search/stats": "GET - Search cache hit rates and outbound search counters",
+            "/speculation/stats": "GET - Speculative search decisions and fallback predictions",
+            "/decoding/stats": "GET - Active decoding tier and recent model latency per tier",
+            "/metrics": "GET - Stage latencies, routes, errors and queue depths in Prometheus text format",
+            "/profiling/stats": "GET - Request profiling settings and the number of profiles written",
+            "/admin/canned-answers/reload": "POST - Reload the canned answers file (X-Admin-Token)",
+            "/healthz": "GET - Liveness probe",
+            "/readyz": "GET - Readiness probe, 503 until the model is loaded"
         },
-        "status": "Model is loaded and ready" if MODEL is not None else "Limited functionality - Model not loaded"
+        "status": "Model is loaded and ready" if MODEL is not None else (
+            "Limited functionality - Model not loaded" if MODEL_LOAD_ERROR else "Limited functionality - Model loading"
+        )
     }
 
-@app.post("/ask")
-async def ask_question(request: QuestionRequest):
-    question = request.question
-    language = request.language
-    question_lower = question.lower()
+async def answer_without_model(question, language):
+    """Answer from search while the model is unavailable, or with a technical notice"""
+    logger.info("Model unavailable, trying search")
+    with STAGE_SECONDS.time("search"):
+        search_results = await duckduckgo_search(question)
     
-    logger.info(f"Question received: '{question}'")
+    if search_results and len(search_results) > 0:
+        search_answer = format_search_results(search_results, language)
+        if search_answer:
+            logger.info("Using search results (model unavailable)")
+            return {"answer": search_answer, "source": "Legal Research"}, "search"
     
-    try:
-        # If model is not available, handle that first
-        if MODEL is None:
-            # For greetings, still give nice response
-            if is_greeting(question):
-                greeting_response, source = get_greeting_response(language)
-                return {"answer": greeting_response, "source": source}
-                
-            # For hardcoded questions, use those
-            hardcoded = get_hardcoded_answer(question, language)
-            if hardcoded:
-                answer, source = hardcoded
-                logger.info("Using hardcoded answer (model unavailable)")
-                return {"answer": answer, "source": source}
-                
-            # Try search as main fallback
-            logger.info("Model unavailable, trying search")
-            search_results = duckduckgo_search(question)
-            
-            if search_results and len(search_results) > 0:
-                search_answer = format_search_results(search_results, language)
-                if search_answer:
-                    logger.info("Using search results (model unavailable)")
-                    return {"answer": search_answer, "source": "Legal Research"}
-            
-            # If all else fails
-            if language == 'en':
-                return {"answer": "## Cameroon Legal Information\n\nI'm experiencing technical difficulties connecting to the legal database. Please try a simple question about Cameroon law or try again later.", "source": "Technical Notice"}
-            else:
-                return {"answer": "## Informations Juridiques du Cameroun\n\nJe rencontre des difficultés techniques pour me connecter à la base de données juridiques. Veuillez poser une question simple sur le droit camerounais ou réessayer plus tard.", "source": "Avis Technique"}
+    # If all else fails
+    if language == 'en':
+        return {"answer": "## Cameroon Legal Information\n\nI'm experiencing technical difficulties connecting to the legal database. Please try a simple question about Cameroon law or try again later.", "source": "Technical Notice"}, "technical_notice"
+    else:
+        return {"answer": "## Informations Juridiques du Cameroun\n\nJe rencontre des difficultés techniques pour me connecter à la base de données juridiques. Veuillez poser une question simple sur le droit camerounais ou réessayer plus tard.", "source": "Avis Technique"}, "technical_notice"
+
+async def answer_from_model_output(question, language, matches, model_answer, model_source, decoding_tier, bucket=None):
+    """STEPS 5-8 after generation: safety and quality checks, then search, last resort and fallback"""
+    # Check if model answer is valid and safe
+    if model_answer:
+        # Check for dangerous and low quality content
+        with STAGE_SECONDS.time("answer_checks"):
+            unsafe = safety_filter(question, model_answer, matches)
+            low_quality = not unsafe and is_low_quality_answer(question, model_answer, matches)
         
-        # STEP 1: Check for greetings
-        if is_greeting(question):
-            logger.info("Greeting detected")
-            greeting_response, source = get_greeting_response(language)
-            return {"answer": greeting_response, "source": source}
-            
-        # STEP 2: Check for violence-related questions
-        if any(term in question_lower for term in ["kill", "killing", "murder", "suicide", "bomb", "weapon", "terror"]):
-            logger.info("SAFETY ALERT: Potentially harmful question detected")
+        if unsafe:
+            logger.warning("SAFETY ALERT: Dangerous model response filtered")
             safe_response, source = get_safe_override_response(language)
-            return {"answer": safe_response, "source": source}
-        
-        # STEP 3: Check for out-of-domain questions
-        if is_out_of_domain(question):
-            logger.info("Out-of-domain question detected")
-            
-            # Specifically identify foreign law questions
-            for country in ["usa", "america", "uk", "france", "nigeria", "rwanda"]:
-                if country in question_lower and any(term in question_lower for term in ["law", "legal", "right"]):
-                    foreign_response, source = get_foreign_law_response(language)
-                    return {"answer": foreign_response, "source": source}
-                    
-            # General out-of-domain response
-            out_of_domain_response, source = get_out_of_domain_response(language)
-            return {"answer": out_of_domain_response, "source": source}
-        
-        # STEP 4: Check hardcoded answers for common questions
-        hardcoded = get_hardcoded_answer(question, language)
-        if hardcoded:
-            answer, source = hardcoded
-            logger.info("Using hardcoded answer")
-            return {"answer": answer, "source": source}
-        
-        # STEP 5: Get model answer
-        model_answer, model_source = get_answer_from_model(question, language)
-        
-        # Check if model answer is valid and safe
-        if model_answer:
-            # Check for dangerous content
-            if safety_filter(question, model_answer):
-                logger.warning("SAFETY ALERT: Dangerous model response filtered")
-                safe_response, source = get_safe_override_response(language)
-                return {"answer": safe_response, "source": source}
-            
-            # Check for low quality responses
-            if not is_low_quality_answer(question, model_answer):
-                logger.info("Using high-quality model answer")
-                formatted_answer = add_markdown_formatting(model_answer)
-                
-                # Determine appropriate source
-                if "constitution" in question_lower:
-                    source = "Constitutional Law"
-                elif "court" in question_lower or "judge" in question_lower or "judicial" in question_lower:
-                    source = "Judiciary"
-                elif "president" in question_lower or "minister" in question_lower or "government" in question_lower:
-                    source = "Government"
-                elif "child" in question_lower:
-                    source = "Children's Rights"
-                elif "criminal" in question_lower or "penal" in question_lower:
-                    source = "Criminal Law"
-                else:
-                    source = model_source or "Cameroonian Law"
-                    
-                return {"answer": formatted_answer, "source": source}
-            else:
-                logger.info("Low quality model answer detected, trying search")
+            return {"answer": safe_response, "source": source}, "safety_override"
+    
+        if not low_quality:
+            logger.info("Using high-quality model answer")
+            formatted_answer = add_markdown_formatting(model_answer)
+    
+            source = get_model_answer_source(question, model_source, matches)
+    
+            return {"answer": formatted_answer, "source": source, "decoding_tier": decoding_tier}, "model"
         else:
-            logger.info("No model answer available, trying search")
-        
-        # STEP 6: Fall back to search
-        search_results = duckduckgo_search(question)
+            logger.info("Low quality model answer detected, trying search")
+    else:
+        logger.info("No model answer available, trying search")
+    
+    # STEP 6: Fall back to search
+    search_start = time.perf_counter()
+    search_results = await duckduckgo_search(question)
+    STAGE_SECONDS.observe(time.perf_counter() - search_start, "search")
+    if bucket is not None:
+        logger.info(f"Sequential answer {bucket}: search {round((time.perf_counter() - search_start) * 1000)} ms")
+    
+    if search_results and len(search_results) > 0:
+        search_answer = format_search_results(search_results, language)
+        if search_answer:
+            logger.info("Using search results")
+            return {"answer": search_answer, "source": "Legal Research"}, "search"
+    
+    # STEP 7: If search failed but we have model answer, use it anyway as last resort
+    if model_answer:
+        logger.info("Search failed, using model answer despite quality concerns")
+        formatted_answer = add_markdown_formatting(model_answer)
+        return {"answer": formatted_answer, "source": model_source or "Cameroonian Law", "decoding_tier": decoding_tier}, "model_last_resort"
+    
+    # STEP 8: Provide a fallback response if everything else failed
+    logger.info("All answer sources failed, using fallback")
+    
+    return {"answer": get_fallback_answer(language), "source": "Information Notice"}, "fallback"
+
+async def answer_question(question, language, profile=None):
+    """Run the answering pipeline and return the response with the route that produced it
+
+    A profiled question takes the sequential model path, so its generate call can be profiled.
+    """
+    # Every keyword check below reads from this one scan of the question
+    with STAGE_SECONDS.time("keyword_match"):
+        matches = match_question(question)
+    
+    try:
+        # STEPS 1-4: Greetings, safety, scope and known answers
+        # These need no model, so they keep answering while it is still loading
+        with STAGE_SECONDS.time("fast_path"):
+            fast_path, closest = route_fast_path(question, language, matches)
+        if fast_path:
+            return fast_path
         
-        if search_results and len(search_results) > 0:
-            search_answer = format_search_results(search_results, language)
-            if search_answer:
-                logger.info("Using search results")
-                return {"answer": search_answer, "source": "Legal Research"}
+        # If model is not available yet, search is the main fallback
+        if MODEL is None:
+            return await answer_without_model(question, language)
         
-        # STEP 7: If search failed but we have model answer, use it anyway as last resort
-        if model_answer:
-            logger.info("Search failed, using model answer despite quality concerns")
-            formatted_answer = add_markdown_formatting(model_answer)
-            return {"answer": formatted_answer, "source": model_source or "Cameroonian Law"}
+        # STEP 5: Get model answer, hedged with a concurrent search if a fallback looks likely
+        bucket = None
+        if SPECULATIVE_SEARCH and profile is None:
+            # Reuse the fast path's retrieval; it only searches for English questions
+            similarity = closest[0] if closest else retrieval_similarity(question)
+            bucket = FALLBACK_PREDICTOR.bucket(language, similarity, touches_checked_topic(matches))
+            hedge, probability = FALLBACK_PREDICTOR.should_hedge(bucket)
+            logger.info(f"Speculative search {bucket}: predicted fallback {probability:.2f}, {'hedging' if hedge else 'sequential'}")
+            if hedge:
+                return await hedged_model_and_search(question, language, bucket, matches)
         
-        # STEP 8: Provide a fallback response if everything else failed
-        logger.info("All answer sources failed, using fallback")
+        # Wait on the inference pool so other requests can join the same batch
+        model_start = time.perf_counter()
+        model_answer, model_source, decoding_tier = await INFERENCE_POOL.run(get_answer_from_model, question, language, profile)
+        STAGE_SECONDS.observe(time.perf_counter() - model_start, "model")
         
-        if language == 'en':
-            fallback = (
-                "## Cameroon Legal Information\n\n"
-                "I don't have specific information about that aspect of Cameroonian law. "
-                "For the most accurate information on this topic, I would recommend consulting "
-                "the Cameroonian legal code or reaching out to a qualified legal professional in Cameroon."
+        if bucket is not None and model_answer:
+            low_quality = is_low_quality_answer(question, model_answer, matches)
+            FALLBACK_PREDICTOR.record(bucket, low_quality, hedged=False)
+            logger.info(
+                f"Sequential answer {bucket}: model {round((time.perf_counter() - model_start) * 1000)} ms, "
+                f"low_quality={low_quality}"
             )
-        else:
-            fallback = (
-                "## Information Juridique du Cameroun\n\n"
-                "Je n'ai pas d'informations spécifiques sur cet aspect du droit camerounais. "
-                "Pour des informations plus précises sur ce sujet, je vous recommande de consulter "
-                "le code juridique camerounais ou de contacter un professionnel du droit qualifié au Cameroun."
-            )
-            
-        return {"answer": fallback, "source": "Information Notice"}
         
+        return await answer_from_model_output(
+            question, language, matches, model_answer, model_source, decoding_tier, bucket
+        )
+        
+    except PoolSaturatedError as e:
+        # Shed load quickly instead of letting the request hang
+        logger.warning(f"Rejecting question, {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="The legal assistant is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         # Comprehensive error handling
         logger.error(f"Unhandled error: {str(e)}")
         traceback.print_exc()
         
-        if language == 'en':
-            error_response = "## Technical Notice\n\nI apologize for the technical difficulties. Please try asking your question about Cameroonian law in a different way."
+        error_response, source = get_technical_error_response(language)
+        return {"answer": error_response, "source": source}, "error"
+
+@app.post("/ask")
+async def ask_question(request: QuestionRequest, http_response: Response, x_profile: str = Header(""), x_request_id: str = Header("")):
+    question = request.question
+    language = request.language
+    
+    logger.info(f"Question received: '{question}'")
+    start = time.perf_counter()
+    
+    # Repeated questions are served from the cache without running the pipeline,
+    # unless an allowlisted client asked for a profile of the full pipeline
+    cache_key = ANSWER_CACHE.make_key(preprocess_text(question).lower(), language)
+    profile_requested = PROFILER.enabled and PROFILER.is_allowlisted(x_profile)
+    cached = None if profile_requested else ANSWER_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info("Using cached answer")
+        record_route("ask", "cache", start)
+        return cached
+    
+    profile = PROFILER.start(x_request_id, x_profile) if PROFILER.enabled else None
+    route = "busy"
+    try:
+        if profile is None:
+            response, route = await answer_question(question, language)
         else:
-            error_response = "## Avis Technique\n\nJe m'excuse pour les difficultés techniques. Veuillez essayer de poser votre question sur le droit camerounais d'une manière différente."
-            
-        return {"answer": error_response, "source": "System Notice"}
+            http_response.headers["X-Request-ID"] = profile.request_id
+            response, route = await profile.run(answer_question(question, language, profile))
+    except HTTPException:
+        record_route("ask", "busy", start)
+        raise
+    finally:
+        if profile is not None:
+            # Write the profile after responding; the next profile waits for it
+            task = asyncio.create_task(asyncio.to_thread(profile.finish, route))
+            PROFILE_WRITE_TASKS.add(task)
+            task.add_done_callback(PROFILE_WRITE_TASKS.discard)
+    cache_answer(cache_key, response, route)
+    record_route("ask", route, start)
+    
+    return response
+
+def cache_answer(cache_key, response, route):
+    """Cache an answer, except search answers given only because the model was still loading"""
+    if route == "search" and MODEL is None:
+        return
+    ANSWER_CACHE.put(cache_key, response, route)
+
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def single_event_stream(response, route):
+    """Send a complete answer as one closing SSE event"""
+    async def events():
+        yield sse_event("final", {**response, "route": route, "safe": True, "low_quality": False, "retract": False})
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+class ModelStreamResponse(StreamingResponse):
+    """SSE stream of a model answer that stops generation when the response ends
+
+    A client that disconnects mid-stream leaves the body generator suspended,
+    so its finally block would only run when the generator is collected; the
+    streamer is cancelled here instead, and the inference worker freed right away.
+    """
+
+    def __init__(self, content, streamer):
+        super().__init__(content, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        self.streamer = streamer
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.streamer.cancel()
+            await self.body_iterator.aclose()
+
+async def stream_model_answer(question, language, streamer, generation, cache_key, matches, start):
+    """Relay model tokens as SSE, then send the safety and quality verdicts"""
+    generation_start = time.perf_counter()
+    parts = []
+    try:
+        async for text in streamer:
+            parts.append(text)
+            yield sse_event("token", {"text": text})
+
+        try:
+            await asyncio.wrap_future(generation)
+        except Exception as e:
+            logger.error(f"Error streaming model answer: {str(e)}")
+        STAGE_SECONDS.observe(time.perf_counter() - generation_start, "model")
+
+        model_answer = "".join(parts).strip()
+        unsafe = bool(model_answer) and safety_filter(question, model_answer, matches)
+        low_quality = not model_answer or is_low_quality_answer(question, model_answer, matches)
+        response, route = None, None
+
+        if unsafe:
+            logger.warning("SAFETY ALERT: Dangerous streamed answer retracted")
+            safe_response, source = get_safe_override_response(language)
+            response, route = {"answer": safe_response, "source": source}, "safety_override"
+        elif low_quality:
+            logger.info("Low quality streamed answer, trying search")
+            try:
+                with STAGE_SECONDS.time("search"):
+                    search_results = await duckduckgo_search(question)
+            except PoolSaturatedError:
+                search_results = []
+            search_answer = format_search_results(search_results, language)
+            if search_answer:
+                response, route = {"answer": search_answer, "source": "Legal Research"}, "search"
+
+        if response is None and model_answer:
+            # Safe answer, or low quality with nothing better to replace it
+            response = {
+                "answer": add_markdown_formatting(model_answer),
+                "source": get_model_answer_source(question, "Cameroonian Law", matches),
+                "decoding_tier": "stream",
+            }
+            route = "model_last_resort" if low_quality else "model"
+        elif response is None:
+            response, route = {"answer": get_fallback_answer(language), "source": "Information Notice"}, "fallback"
+
+        ANSWER_CACHE.put(cache_key, response, route)
+        record_route("stream", route, start)
+        yield sse_event("final", {
+            **response,
+            "route": route,
+            "safe": not unsafe,
+            "low_quality": low_quality,
+            "retract": route not in ("model", "model_last_resort"),
+        })
+    finally:
+        # Stop generating if the stream ended early; ModelStreamResponse also does this on disconnect
+        streamer.cancel()
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """Stream an answer as server-sent events
+
+    Greeting, safety, out-of-domain, hardcoded and cached answers are sent at
+    once as a single "final" event. Model answers are sent token by token as
+    "token" events, followed by a "final" event carrying the formatted answer
+    and the safety_filter / is_low_quality_answer verdicts; when "retract" is
+    true the streamed text must be replaced by the final answer.
+    """
+    question = request.question
+    language = request.language
+    
+    logger.info(f"Streaming question received: '{question}'")
+    start = time.perf_counter()
+    
+    cache_key = ANSWER_CACHE.make_key(preprocess_text(question).lower(), language)
+    cached = ANSWER_CACHE.get(cache_key)
+    if cached is not None:
+        record_route("stream", "cache", start)
+        return single_event_stream(cached, "cache")
+    
+    if MODEL is None:
+        try:
+            response, route = await answer_question(question, language)
+        except HTTPException:
+            record_route("stream", "busy", start)
+            raise
+        cache_answer(cache_key, response, route)
+        record_route("stream", route, start)
+        return single_event_stream(response, route)
+    
+    with STAGE_SECONDS.time("keyword_match"):
+        matches = match_question(question)
+    with STAGE_SECONDS.time("fast_path"):
+        fast_path, _ = route_fast_path(question, language, matches)
+    if fast_path:
+        record_route("stream", fast_path[1], start)
+        return single_event_stream(*fast_path)
+    
+    from streaming import AsyncTextStreamer
+
+    streamer = AsyncTextStreamer(TOKENIZER, asyncio.get_running_loop(), skip_special_tokens=True)
+    try:
+        generation = INFERENCE_POOL.submit(generate_streaming, question, streamer)
+    except PoolSaturatedError as e:
+        record_route("stream", "busy", start)
+        raise HTTPException(
+            status_code=503,
+            detail="The legal assistant is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    
+    return ModelStreamResponse(
+        stream_model_answer(question, language, streamer, generation, cache_key, matches, start), streamer
+    )
+
+async def answer_batch(items):
+    """Answer many questions, sharing the work between them
+
+    Identical normalized questions are answered once. Cached and fast-path
+    answers are resolved for the whole batch first. The remaining questions
+    are queued on the model batcher together, so they run as batched generate
+    calls, and each answer then goes through the same checks and search
+    fallback as a single /ask. Returns (question, language, response, route,
+    ms since the batch started, deduplicated) per item, in input order.
+    """
+    start = time.perf_counter()
+    unique = {}  # cache key -> job index
+    jobs = []  # (question, language, cache key)
+    slots = []  # (job index, deduplicated) per item
+    for item in items:
+        cache_key = ANSWER_CACHE.make_key(preprocess_text(item.question).lower(), item.language)
+        if cache_key in unique:
+            slots.append((unique[cache_key], True))
+            continue
+        unique[cache_key] = len(jobs)
+        slots.append((len(jobs), False))
+        jobs.append((item.question, item.language, cache_key))
+
+    results = [None] * len(jobs)
+
+    def finish(index, response, route):
+        results[index] = (response, route, round((time.perf_counter() - start) * 1000, 1))
+        cache_answer(jobs[index][2], response, route)
+
+    # STEPS 1-4 for every question before any model work
+    remaining = []
+    for index, (question, language, cache_key) in enumerate(jobs):
+        cached = ANSWER_CACHE.get(cache_key)
+        if cached is not None:
+            results[index] = (cached, "cache", round((time.perf_counter() - start) * 1000, 1))
+            continue
+        with STAGE_SECONDS.time("keyword_match"):
+            matches = match_question(question)
+        with STAGE_SECONDS.time("fast_path"):
+            fast_path, _ = route_fast_path(question, language, matches)
+        if fast_path:
+            finish(index, *fast_path)
+        else:
+            remaining.append((index, question, language, matches))
+
+    # Leave part of the model queue and the search pool to single requests
+    model_slots = asyncio.Semaphore(max(MODEL_BATCH_SIZE, MODEL_QUEUE_SIZE // 2))
+    search_slots = asyncio.Semaphore(SEARCH_POOL_SIZE)
+
+    async def answer_remaining(index, question, language, matches):
+        try:
+            if MODEL is None:
+                async with search_slots:
+                    response, route = await answer_without_model(question, language)
+            else:
+                model_answer, decoding_tier = None, None
+                async with model_slots:
+                    try:
+                        model_answer, decoding_tier = await queue_model_answer(question)
+                    except BatchQueueFullError as e:
+                        logger.warning(f"Model queue full, skipping model answer: {str(e)}")
+                    except Exception as e:
+                        logger.error(f"Error getting model answer: {str(e)}")
+                async with search_slots:
+                    response, route = await answer_from_model_output(
+                        question, language, matches, model_answer, "Cameroonian Law" if model_answer else None, decoding_tier
+                    )
+        except Exception as e:
+            # One failed question must not fail the whole batch
+            logger.error(f"Error answering batch question: {str(e)}")
+            error_response, source = get_technical_error_response(language)
+            response, route = {"answer": error_response, "source": source}, "busy" if isinstance(e, PoolSaturatedError) else "error"
+        finish(index, response, route)
+
+    await asyncio.gather(*(answer_remaining(*job) for job in remaining))
+
+    return [
+        (*jobs[index][:2], *results[index], deduplicated)
+        for index, deduplicated in slots
+    ]
+
+@app.post("/ask/batch")
+async def ask_batch(request: BatchQuestionRequest):
+    """Answer a list of questions in one request
+
+    Results come back in input order, each with its source, the route that
+    produced it and the time in ms from the start of the batch until it was
+    answered. Repeated questions are answered once and marked "deduplicated".
+    """
+    count = len(request.questions)
+    if count > ASK_BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=413, detail=f"At most {ASK_BATCH_MAX_QUESTIONS} questions per batch")
+    
+    logger.info(f"Batch of {count} questions received")
+    start = time.perf_counter()
+    answered = await answer_batch(request.questions)
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    
+    routes = Counter(route for _, _, _, route, _, deduplicated in answered if not deduplicated)
+    unique = sum(routes.values())
+    for _, _, _, route, ms, deduplicated in answered:
+        if not deduplicated:
+            ROUTES_TOTAL.inc("batch", route)
+            REQUEST_SECONDS.observe(ms / 1000, "batch", route)
+    logger.info(f"Batch of {count} questions ({unique} unique) answered in {elapsed_ms} ms: {dict(routes)}")
+    
+    return {
+        "results": [
+            {"question": question, "language": language, **response, "route": route, "time_ms": ms, "deduplicated": deduplicated}
+            for question, language, response, route, ms, deduplicated in answered
+        ],
+        "summary": {"questions": count, "unique": unique, "routes": dict(routes), "time_ms": elapsed_ms},
+    }
+
+@app.post("/documents/analyze")
+async def analyze_document_upload(file: UploadFile = File(...)):
+    """Analyze an uploaded document, streaming results back as NDJSON
+
+    The upload is decoded as UTF-8 and scanned in overlapping windows, so
+    memory use depends on DOCUMENT_WINDOW_SIZE rather than the document's
+    size. Each line is a "reference" or "risk" event, in position order,
+    and the last is a "summary" with the document type, metadata and counts.
+    """
+    if DOCUMENT_SLOTS.locked():
+        raise HTTPException(
+            status_code=503,
+            detail="Document analysis is busy. Please retry shortly.",
+            headers={"Retry-After": str(POOL_RETRY_AFTER)},
+        )
+    await DOCUMENT_SLOTS.acquire()
+    
+    start = time.perf_counter()
+    events = DOCUMENT_PROCESSOR.analyze_stream(iter_file_chunks(file.file, DOCUMENT_WINDOW_SIZE), DOCUMENT_WINDOW_OVERLAP)
+    try:
+        # The first batch is read before responding, so a failure still gets an error status
+        batch = await DOCUMENT_POOL.run(next_document_events, events)
+    except Exception as e:
+        DOCUMENT_SLOTS.release()
+        logger.error(f"Analysis of document '{file.filename}' failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Document analysis failed")
+    
+    return DocumentStreamResponse(stream_document_events(file.filename, events, batch, start))
+
+@app.post("/documents/analyze/batch")
+async def analyze_document_batch(files: List[UploadFile] = File(...)):
+    """Analyze many uploaded documents in parallel, streaming results back as NDJSON
+
+    Documents are analyzed whole on DOCUMENT_BATCH_WORKERS processes. Each
+    "document" line carries one document's analysis, its analysis time_ms
+    and completed_ms since the batch started, in completion order. The
+    last line is a "summary" with the counts and throughput.
+    """
+    if len(files) > DOCUMENT_BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"At most {DOCUMENT_BATCH_MAX_FILES} documents per batch")
+    if DOCUMENT_SLOTS.locked():
+        raise HTTPException(
+            status_code=503,
+            detail="Document analysis is busy. Please retry shortly.",
+            headers={"Retry-After": str(POOL_RETRY_AFTER)},
+        )
+    await DOCUMENT_SLOTS.acquire()
+    
+    return DocumentStreamResponse(stream_document_batch(files))
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: 503 until the model has loaded and warmed up"""
+    if not MODEL_READY.is_set():
+        detail = f"Model failed to load: {MODEL_LOAD_ERROR}" if MODEL_LOAD_ERROR else "Model is loading"
+        raise HTTPException(status_code=503, detail=detail)
+    return {"status": "ready", "backend": INFERENCE_BACKEND, "ready_after_s": round(MODEL_READY_SECONDS, 1)}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Report answer cache size and hit/miss counters"""
+    return ANSWER_CACHE.stats()
+
+@app.get("/search/stats")
+async def search_stats():
+    """Report search cache hit rates and outbound search client counters"""
+    return {"cache": SEARCH_CACHE.stats(), "client": SEARCH_CLIENT.stats()}
+
+@app.get("/decoding/stats")
+async def decoding_stats():
+    """Report the active decoding tier and each tier's recent p95 and sample count"""
+    return {
+        "target_p95_ms": DECODING_P95_TARGET_MS,
+        "queue_depth": MODEL_BATCHER.queue_depth(),
+        "tiers": DECODING_POLICY.stats(),
+    }
+
+@app.get("/speculation/stats")
+async def speculation_stats():
+    """Report hedging decisions and the fallback predictor's per-bucket rates"""
+    return {"enabled": SPECULATIVE_SEARCH, **FALLBACK_PREDICTOR.stats()}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: stage and request latencies, routes, errors and queue depths"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/profiling/stats")
+async def profiling_stats():
+    """Report the profiling settings and how many requests were profiled"""
+    return PROFILER.stats()
+
+@app.post("/admin/canned-answers/reload")
+async def reload_canned_answers_endpoint(x_admin_token: str = Header("")):
+    """Reload the canned answer file without a restart; needs ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled. Set ADMIN_TOKEN to enable them.")
+    if not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    
+    try:
+        store = await asyncio.to_thread(reload_canned_answers)
+    except (OSError, ValueError) as e:
+        logger.error(f"Canned answers not reloaded: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Canned answers not reloaded, keeping the current ones: {str(e)}")
+    return {"status": "reloaded", **store.stats()}
+
+def handle_sighup():
+    """Reload the canned answers in the background when the process gets SIGHUP"""
+    async def reload():
+        try:
+            await asyncio.to_thread(reload_canned_answers)
+        except (OSError, ValueError) as e:
+            logger.error(f"Canned answers not reloaded on SIGHUP: {str(e)}")
+    task = asyncio.ensure_future(reload())
+    CANNED_ANSWERS_RELOAD_TASKS.add(task)
+    task.add_done_callback(CANNED_ANSWERS_RELOAD_TASKS.discard)
 
 @app.get("/test-search")
 async def test_search_endpoint(query: str):
     """Test endpoint for DuckDuckGo search"""
     try:
-        results = duckduckgo_search(query)
+        results = await duckduckgo_search(query)
         formatted = format_search_results(results, "en") if results else "No results found"
         
         return {
@@ -731,6 +1821,12 @@ async def test_search_endpoint(query: str):
             "result_count": len(results),
             "formatted_answer": formatted
         }
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Search is busy. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         return {
             "error": str(e),
@@ -738,8 +1834,67 @@ async def test_search_endpoint(query: str):
             "success": False
         }
 
+@app.middleware("http")
+async def log_first_response(request, call_next):
+    """Log how long after import the first response went out"""
+    global FIRST_RESPONSE_LOGGED
+    response = await call_next(request)
+    if not FIRST_RESPONSE_LOGGED:
+        FIRST_RESPONSE_LOGGED = True
+        logger.info(
+            f"First response ({request.url.path}) sent {time.perf_counter() - IMPORT_STARTED:.2f}s after import "
+            f"(model ready: {MODEL is not None})"
+        )
+    return response
+
+FIRST_RESPONSE_LOGGED = False
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     logger.info("Cameroonian Legal Assistant API starting up")
-    logger.info(f"Model loaded: {MODEL is not None}")
\ No newline at end of file
+    if MODEL_READY.is_set():
+        # Loaded by the gunicorn master before this worker was forked (gunicorn.conf.py)
+        logger.info(f"Worker {os.getpid()} sharing the model preloaded in the master")
+    else:
+        # Load the model in the background; the fast paths answer in the meantime
+        source = ONNX_MODEL_DIR if INFERENCE_BACKEND == "onnx" else MODEL_PATH
+        logger.info(f"Loading model from {source} in the background")
+        threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+    logger.info(
+        f"Model batching: batch_size={MODEL_BATCH_SIZE}, "
+        f"wait_ms={MODEL_BATCH_WAIT_MS}, queue_size={MODEL_QUEUE_SIZE}"
+    )
+    logger.info(
+        f"Executor pools: inference={INFERENCE_POOL_SIZE} workers/{INFERENCE_QUEUE_LIMIT} queued, "
+        f"search={SEARCH_POOL_SIZE} workers/{SEARCH_QUEUE_LIMIT} queued, "
+        f"document={DOCUMENT_POOL_SIZE} workers/{DOCUMENT_QUEUE_LIMIT} queued"
+    )
+    logger.info(f"Search: {DUCKDUCKGO_URL} (max {SEARCH_MAX_CONNECTIONS} connections)")
+    logger.info(
+        f"Search cache: max_entries={SEARCH_CACHE_SIZE}, ttl={SEARCH_CACHE_TTL}s, "
+        f"stale_ttl={SEARCH_CACHE_STALE_TTL}s, negative_ttl={SEARCH_CACHE_NEGATIVE_TTL}s"
+    )
+    logger.info(f"Retrieval index: {'loaded' if RETRIEVAL_INDEX is not None else 'unavailable'} (min_score={RETRIEVAL_MIN_SCORE})")
+    ANSWER_CACHE.load()
+    logger.info(f"Answer cache: max_entries={ANSWER_CACHE_SIZE}, persistence={'on' if ANSWER_CACHE_FILE else 'off'}")
+    
+    # A worker forked from a preloaded master after the file changed (gunicorn HUP) picks up the new answers
+    try:
+        reload_canned_answers(only_if_changed=True)
+    except (OSError, ValueError) as e:
+        logger.error(f"Canned answers not reloaded: {str(e)}")
+    if hasattr(signal, "SIGHUP"):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, handle_sighup)
+        except (RuntimeError, NotImplementedError) as e:
+            # Signal handlers need the loop in the main thread (not so under TestClient or embedded servers)
+            logger.warning(f"SIGHUP reload unavailable, use POST /admin/canned-answers/reload: {str(e)}")
+
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    ANSWER_CACHE.save()
+    await SEARCH_CLIENT.aclose()
+    if DOCUMENT_BATCH_POOL is not None:
+        DOCUMENT_BATCH_POOL.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,159 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatchQueueFullError(Exception):
+    """Raised when a request cannot be queued because the batch queue is full"""
+
+
+class MicroBatcher:
+    """Group concurrent requests into batches and run them with one call
+
+    Callers submit single items and receive a Future. A background worker
+    collects queued items until either `max_batch_size` items are waiting or
+    `max_wait_ms` has elapsed since the first item arrived, then runs
+    `batch_fn` once on the whole list. `batch_fn` must return one result per
+    input item, in the same order.
+
+    If `bucket_fn` is given, items are grouped by the key it returns (for
+    example a token length bucket) and each bucket fills and times out on its
+    own, so a batch only ever contains items from one bucket.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_queue_size: int = 64,
+        name: str = "batcher",
+        bucket_fn: Optional[Callable[[Any], Hashable]] = None,
+    ):
+        self.batch_fn = batch_fn
+        self.bucket_fn = bucket_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue_size = max_queue_size
+        self.name = name
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._buffered = 0
+
+        logger.info(
+            f"Batcher '{name}' configured: max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={max_wait_ms}, max_queue_size={max_queue_size}, "
+            f"bucketed={bucket_fn is not None}"
+        )
+
+    def start(self):
+        """Start the background worker if it is not already running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-worker", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item for the next batch and return a Future for its result"""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            raise BatchQueueFullError(
+                f"Batcher '{self.name}' queue is full ({self.max_queue_size} pending)"
+            )
+        return future
+
+    def queue_depth(self) -> int:
+        """Number of items waiting to be batched"""
+        return self._queue.qsize() + self._buffered
+
+    def _run(self):
+        # bucket key -> (deadline, [(item, future), ...])
+        pending: Dict[Hashable, Tuple[float, list]] = {}
+
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, min(deadline for deadline, _ in pending.values()) - time.monotonic())
+
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = None
+
+            # Take everything that is already waiting before deciding what to run
+            while entry is not None:
+                ready = self._add(pending, entry)
+                if ready:
+                    self._execute(ready)
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    entry = None
+
+            # Run buckets whose wait window has closed, oldest first
+            now = time.monotonic()
+            expired = sorted(
+                (deadline, bucket) for bucket, (deadline, _) in pending.items() if deadline <= now
+            )
+            for _, bucket in expired:
+                _, batch = pending.pop(bucket)
+                self._buffered -= len(batch)
+                self._execute(batch)
+
+    def _add(self, pending: dict, entry: tuple) -> Optional[list]:
+        """Buffer an entry in its bucket; return the bucket's batch once it is full"""
+        bucket = self.bucket_fn(entry[0]) if self.bucket_fn else None
+        if bucket not in pending:
+            pending[bucket] = (time.monotonic() + self.max_wait, [])
+
+        batch = pending[bucket][1]
+        batch.append(entry)
+        self._buffered += 1
+
+        if len(batch) >= self.max_batch_size:
+            del pending[bucket]
+            self._buffered -= len(batch)
+            return batch
+        return None
+
+    def _execute(self, batch: List[tuple]):
+        # Skip callers that gave up before their batch started
+        live = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+
+        items = [item for item, _ in live]
+        start = time.perf_counter()
+
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"batch_fn returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logger.error(f"Batcher '{self.name}' batch of {len(items)} failed: {str(e)}")
+            for _, future in live:
+                future.set_exception(e)
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Batcher '{self.name}' ran batch of {len(items)} in {elapsed_ms:.1f} ms "
+            f"(queue depth {self.queue_depth()})"
+        )
+
+        for (_, future), result in zip(live, results):
+            future.set_result(result)
@@ -0,0 +1,247 @@
+import argparse
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from bench_stages import DOCUMENT_CLAUSES, build_document
+from document_processor import DocumentProcessor, iter_mapped_chunks
+from retrieval import DEFAULT_DATASET_PATH, load_dataset
+
+# ----- Reference implementation: per-call re.search/re.finditer with IGNORECASE, as before precompiling -----
+
+def legacy_detect_document_type(text):
+    normalized_text = " ".join(text.lower().split())
+    if re.search(r"agreement|contract|terms|between|parties|hereby", normalized_text):
+        return "contract"
+    elif re.search(r"complaint|claim|plaintiff|defendant|court|lawsuit", normalized_text):
+        return "complaint"
+    elif re.search(r"deed|property|land|parcel|title|owned by|situated", normalized_text):
+        return "property"
+    else:
+        return "unknown"
+
+
+def legacy_extract_metadata(processor, text, doc_type=None):
+    if not doc_type:
+        doc_type = legacy_detect_document_type(text)
+    metadata = {"document_type": doc_type}
+    if doc_type in processor.patterns:
+        for key, pattern in processor.patterns[doc_type].items():
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                metadata[key] = match.group(1).strip()
+    legal_refs = {}
+    for law, pattern in processor.legal_references.items():
+        matches = re.findall(pattern, text, re.IGNORECASE)
+        if matches:
+            legal_refs[law] = matches
+    if legal_refs:
+        metadata["legal_references"] = legal_refs
+    return metadata
+
+
+def legacy_identify_risks(processor, text):
+    risks = []
+    for risk_type, patterns in processor.risk_patterns.items():
+        for pattern in patterns:
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                start = max(0, match.start() - 50)
+                end = min(len(text), match.end() + 50)
+                context = text[start:end].replace('\n', ' ').strip()
+                risks.append({"type": risk_type, "match": match.group(0), "context": context, "position": match.start()})
+    return sorted(risks, key=lambda r: r["position"])
+
+
+def legacy_analyze_document(processor, text):
+    doc_type = legacy_detect_document_type(text)
+    return {
+        "document_type": doc_type,
+        "metadata": legacy_extract_metadata(processor, text, doc_type),
+        "risks_identified": legacy_identify_risks(processor, text),
+        "relevant_laws": processor.get_relevant_laws(doc_type),
+    }
+
+# ----- Test documents -----
+
+# Headers for the other document types; build_document writes contracts
+COMPLAINT_HEADER = (
+    "COMPLAINT\nPlaintiff: Etoundi Marie, residing in Douala;\nDefendant is Cameroon Brewing SA,\n"
+    "Relief sought: payment of unpaid wages.\nDamages in the amount of FCFA 2,500,000 are claimed.\n"
+)
+PROPERTY_HEADER = (
+    "DEED OF SALE\nThe parcel located at Bastos, Yaounde;\nOwned   by\tFouda Jean.\n"
+    "Area of 2.5 hectares, title number YDE-1234/B.\n"
+)
+# Case and spacing variants, and characters whose case folding differs between str.lower and re.IGNORECASE
+NOISE = ["ı", "İ", "ſ", "K", "é", "ß", " ", "\t", "\n\n", "  "]
+
+
+def perturb(text, rng, rate):
+    """Randomly change the case of words and insert spacing and Unicode noise"""
+    words = text.split(" ")
+    out = []
+    for word in words:
+        roll = rng.random()
+        if roll < rate:
+            word = word.upper()
+        elif roll < rate * 2:
+            word = word.title()
+        elif roll < rate * 3:
+            position = rng.randrange(len(word) + 1)
+            word = word[:position] + rng.choice(NOISE) + word[position:]
+        out.append(word)
+    return " ".join(out)
+
+
+def parity_cases(docs, count, seed):
+    """Documents of every type and size, clean and perturbed"""
+    rng = random.Random(seed)
+    cases = ["", "Nothing to see here.", "owned\nby someone", "OWNED BY İ", "tıtle deed", "termſ"]
+    cases += list(DOCUMENT_CLAUSES)
+    for index in range(count):
+        size = rng.choice([200, 2000, 20000])
+        body = build_document(docs, size, rng)
+        header = rng.choice(["", COMPLAINT_HEADER, PROPERTY_HEADER, "Untitled notes\n"])
+        if header:
+            # Drop the contract header so the other types can be detected
+            body = header + body.split("\n", 4)[-1]
+            body = body.replace("agreement", "").replace("contract", "").replace("terms", "").replace("between", "")
+        cases.append(body if index % 2 else perturb(body, rng, 0.05))
+    return cases
+
+
+def random_chunks(text, rng):
+    """Split text at random points, as uploads arrive"""
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 3000)
+        yield text[position:position + size]
+        position += size
+
+
+def rebuild_from_stream(events):
+    """The analyze_document result equivalent to the events of analyze_stream"""
+    risks, references, summary = [], {}, None
+    for event in events:
+        event = dict(event)
+        kind = event.pop("event")
+        if kind == "risk":
+            risks.append(event)
+        elif kind == "reference":
+            references.setdefault(event["law"], []).append(event["reference"])
+        else:
+            summary = event
+    metadata = dict(summary["metadata"])
+    if references:
+        metadata["legal_references"] = references
+    return {
+        "document_type": summary["document_type"],
+        "metadata": metadata,
+        "risks_identified": risks,
+        "relevant_laws": summary["relevant_laws"],
+    }
+
+
+def check_parity(processor, cases, seed):
+    rng = random.Random(seed)
+    mismatches = 0
+    for text in cases:
+        legacy = legacy_analyze_document(processor, text)
+        checks = [
+            ("detect_document_type", processor.detect_document_type(text), legacy_detect_document_type(text)),
+            ("extract_metadata", processor.extract_metadata(text), legacy_extract_metadata(processor, text)),
+            ("identify_risks", processor.identify_risks(text), legacy_identify_risks(processor, text)),
+            ("analyze_document", processor.analyze_document(text), legacy),
+            # Small windows so most documents are split across many of them
+            ("analyze_stream", rebuild_from_stream(processor.analyze_stream(random_chunks(text, rng), overlap=600)), legacy),
+        ]
+        for name, new, old in checks:
+            if new != old:
+                mismatches += 1
+                print(f"MISMATCH {name} on {text[:60]!r}...")
+    return mismatches
+
+
+def measure_stream(processor, docs, size_mb, rng):
+    """Time and peak traced memory of analyze_stream over a memory-mapped file, against reading it whole"""
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt", delete=False) as f:
+        path = f.name
+        written = 0
+        while written < size_mb * 1_000_000:
+            part = build_document(docs, 1_000_000, rng)
+            f.write(part + "\n")
+            written += len(part) + 1
+    try:
+        results = []
+        for name, run in [
+            ("analyze_document", lambda: processor.analyze_document(open(path, encoding="utf-8").read())),
+            ("analyze_stream", lambda: sum(1 for _ in processor.analyze_stream(iter_mapped_chunks(path)))),
+        ]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append((name, elapsed, peak))
+        return results
+    finally:
+        os.unlink(path)
+
+
+def time_call(fn, text, repeats):
+    """Median seconds per call"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the precompiled DocumentProcessor against per-call regexes and time both")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--samples", type=int, default=300, help="Generated documents for the parity check")
+    parser.add_argument("--sizes-mb", default="1,2,4", help="Document sizes in megabytes for the benchmark")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--stream-mb", type=float, default=20, help="File size in megabytes for the streaming memory comparison")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    docs = load_dataset(args.dataset)
+    processor = DocumentProcessor()
+
+    cases = parity_cases(docs, args.samples, args.seed)
+    mismatches = check_parity(processor, cases, args.seed)
+    print(f"Parity: {len(cases)} documents, {mismatches} mismatches")
+
+    methods = [
+        ("detect_document_type", legacy_detect_document_type, processor.detect_document_type),
+        ("extract_metadata", lambda text: legacy_extract_metadata(processor, text), processor.extract_metadata),
+        ("identify_risks", lambda text: legacy_identify_risks(processor, text), processor.identify_risks),
+        ("analyze_document", lambda text: legacy_analyze_document(processor, text), processor.analyze_document),
+    ]
+    rng = random.Random(args.seed)
+    print(f"\n{'size':>6} {'method':<22} {'before':>10} {'after':>10} {'speedup':>8}")
+    for size_mb in (float(size) for size in args.sizes_mb.split(",")):
+        text = build_document(docs, int(size_mb * 1_000_000), rng)
+        for name, legacy, current in methods:
+            before = time_call(legacy, text, args.repeats)
+            after = time_call(current, text, args.repeats)
+            print(f"{size_mb:>4g}MB {name:<22} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms {before / after:>7.1f}x")
+
+    print(f"\n{args.stream_mb:g}MB file: time and peak traced memory")
+    for name, elapsed, peak in measure_stream(processor, docs, args.stream_mb, rng):
+        print(f"{name:<22} {elapsed:>8.2f}s {peak / 1e6:>10.1f}MB")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} mismatches against the reference implementation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import logging
+import random
+import statistics
+import time
+
+import app
+from retrieval import DEFAULT_DATASET_PATH, load_dataset
+
+# ----- Reference implementations: one `term in text` loop per term list, as before the matcher -----
+
+def legacy_safety_filter(question, answer):
+    question_lower = question.lower()
+    answer_lower = answer.lower()
+    for pattern in app.DANGEROUS_PATTERNS:
+        if pattern in answer_lower:
+            return True
+    if any(term in question_lower for term in app.SAFETY_VIOLENCE_TERMS):
+        if any(answer_lower.startswith(start) for start in app.AFFIRMATIVE_STARTS):
+            return True
+    return False
+
+
+def legacy_is_greeting(text):
+    text_lower = text.lower().strip()
+    if text_lower in app.GREETINGS:
+        return True
+    for greeting in app.GREETINGS:
+        if text_lower.startswith(greeting + " ") or text_lower == greeting:
+            return True
+    return False
+
+
+def legacy_is_out_of_domain(question):
+    question_lower = question.lower()
+    if any(term in question_lower for term in app.GEOGRAPHY_TERMS):
+        return True
+    for topic in app.NON_LEGAL_TOPICS:
+        if topic in question_lower:
+            return True
+    if "cameroon" not in question_lower:
+        for country in app.COUNTRIES:
+            if country in question_lower:
+                if any(term in question_lower for term in app.LEGAL_TERMS):
+                    return True
+    return False
+
+
+def legacy_is_low_quality_answer(question, answer):
+    answer_lower = answer.lower()
+    question_lower = question.lower()
+    if any(pattern in answer_lower for pattern in app.PROBLEMATIC_PATTERNS):
+        return True
+    if len(answer.split()) < 20:
+        return True
+    if answer_lower.startswith("yes,") and len(answer.split()) < 25:
+        return True
+    if "child" in question_lower and "child" not in answer_lower and "minor" not in answer_lower:
+        return True
+    if "protest" in question_lower and "protest" not in answer_lower and "assembly" not in answer_lower:
+        return True
+    if "judicial reform" in question_lower and "reform" not in answer_lower:
+        return True
+    return False
+
+
+def legacy_get_hardcoded_answer(question, language):
+    question_lower = question.lower()
+    responses = app.CANNED_ANSWERS.answers["en" if language == "en" else "fr"]
+    for key, value in responses.items():
+        if key in question_lower:
+            return value
+    return None
+
+
+def legacy_get_model_answer_source(question, model_source):
+    question_lower = question.lower()
+    if "constitution" in question_lower:
+        return "Constitutional Law"
+    elif "court" in question_lower or "judge" in question_lower or "judicial" in question_lower:
+        return "Judiciary"
+    elif "president" in question_lower or "minister" in question_lower or "government" in question_lower:
+        return "Government"
+    elif "child" in question_lower:
+        return "Children's Rights"
+    elif "criminal" in question_lower or "penal" in question_lower:
+        return "Criminal Law"
+    else:
+        return model_source or "Cameroonian Law"
+
+
+def legacy_fast_route(question, language):
+    """Route name of STEPS 1-4, or None"""
+    question_lower = question.lower()
+    if legacy_is_greeting(question):
+        return "greeting"
+    if any(term in question_lower for term in app.VIOLENCE_TERMS):
+        return "safety_override"
+    if legacy_is_out_of_domain(question):
+        for country in app.FOREIGN_LAW_COUNTRIES:
+            if country in question_lower and any(term in question_lower for term in app.FOREIGN_LAW_TERMS):
+                return "foreign_law"
+        return "out_of_domain"
+    if legacy_get_hardcoded_answer(question, language):
+        return "hardcoded"
+    return None
+
+
+def legacy_verdicts(question, answer):
+    """Every keyword decision made for one question and model answer"""
+    return (
+        legacy_fast_route(question, "en"),
+        legacy_fast_route(question, "fr"),
+        legacy_is_greeting(question),
+        legacy_is_out_of_domain(question),
+        legacy_get_hardcoded_answer(question, "en"),
+        legacy_get_hardcoded_answer(question, "fr"),
+        legacy_get_model_answer_source(question, None),
+        legacy_safety_filter(question, answer),
+        legacy_is_low_quality_answer(question, answer),
+    )
+
+
+def fast_route(question, language, matches):
+    route, _ = app.route_fast_path(question, language, matches)
+    return route[1] if route else None
+
+
+def matcher_verdicts(question, answer):
+    matches = app.match_question(question)
+    return (
+        fast_route(question, "en", matches),
+        fast_route(question, "fr", matches),
+        app.is_greeting(question, matches),
+        app.is_out_of_domain(question, matches),
+        app.get_hardcoded_answer(question, "en", matches),
+        app.get_hardcoded_answer(question, "fr", matches),
+        app.get_model_answer_source(question, None, matches),
+        app.safety_filter(question, answer, matches),
+        app.is_low_quality_answer(question, answer, matches),
+    )
+
+# ----- Inputs -----
+
+def all_terms():
+    terms = set(app.CANNED_ANSWERS.matcher.term_categories) | set(app.ANSWER_MATCHER.term_categories)
+    return sorted(terms | set(app.AFFIRMATIVE_STARTS) | {"yes,", "cameroon"})
+
+
+def generated_cases(samples, seed):
+    """Questions and answers mixing routing terms with filler, odd spacing, case and punctuation"""
+    rng = random.Random(seed)
+    terms = all_terms()
+    filler = ["what", "is", "the", "in", "of", "a", "about", "rules", "Cameroon", "thing", "x", "s", "ing"]
+    separators = [" ", " ", " ", "", "  ", "\t", "\n", ", ", "! ", "?", "-", "'"]
+
+    def text(words):
+        parts = [rng.choice(terms) if rng.random() < 0.4 else rng.choice(filler) for _ in range(words)]
+        parts = [part.upper() if rng.random() < 0.1 else part for part in parts]
+        joined = "".join(part + rng.choice(separators) for part in parts)
+        return rng.choice(["", " ", "  ", "\n"]) + joined
+
+    for term in terms:
+        yield term, term
+        yield f"  {term.title()}  ", f"{term} " * 25
+        yield f"{term}!", f"{term}x"
+        yield f"{term} there", f"x{term}"
+    for _ in range(samples):
+        yield text(rng.randint(1, 8)), text(rng.randint(1, 40))
+
+
+def dataset_cases(path, seed):
+    rng = random.Random(seed)
+    docs = load_dataset(path)
+    answers = [doc["answer"] for doc in docs]
+    for doc in docs:
+        yield doc["question"], rng.choice(answers)
+
+
+def long_text(docs, length, seed):
+    """Dataset text concatenated to `length` characters"""
+    rng = random.Random(seed)
+    parts, size = [], 0
+    while size < length:
+        part = rng.choice(docs)["answer"]
+        parts.append(part)
+        size += len(part) + 1
+    return " ".join(parts)[:length]
+
+# ----- Checks -----
+
+def check_parity(cases):
+    checked, mismatches = 0, 0
+    for question, answer in cases:
+        checked += 1
+        expected = legacy_verdicts(question, answer)
+        actual = matcher_verdicts(question, answer)
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"  MISMATCH {question!r} / {answer[:60]!r}\n    legacy:  {expected}\n    matcher: {actual}")
+    return checked, mismatches
+
+
+def time_verdicts(verdicts, question, answer, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        verdicts(question, answer)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the compiled keyword matcher against per-term substring checks and time both")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--samples", type=int, default=20000, help="Generated question/answer pairs for the parity check")
+    parser.add_argument("--lengths", default="100,1000,10000,100000", help="Question lengths in characters for the benchmark")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger(app.__name__).setLevel(logging.WARNING)
+    # Only the keyword steps of route_fast_path are compared and timed
+    app.RETRIEVAL_INDEX = None
+
+    mismatches = 0
+    for name, cases in (
+        ("dataset", dataset_cases(args.dataset, args.seed)),
+        ("generated", generated_cases(args.samples, args.seed)),
+    ):
+        checked, failed = check_parity(cases)
+        mismatches += failed
+        print(f"parity {name:<10} {checked:>6} cases  {failed} mismatches")
+
+    docs = load_dataset(args.dataset)
+    answer = docs[0]["answer"]
+    terms = len(all_terms())
+    print(f"\n{terms} terms; median time for every routing decision on one question")
+    print(f"{'length':>8} {'per-term':>10} {'matcher':>10} {'speedup':>8}")
+    for length in (int(n) for n in args.lengths.split(",")):
+        question = long_text(docs, length, args.seed)
+        legacy_ms = time_verdicts(legacy_verdicts, question, answer, args.repeats)
+        matcher_ms = time_verdicts(matcher_verdicts, question, answer, args.repeats)
+        print(f"{length:>8} {legacy_ms:>7.3f} ms {matcher_ms:>7.3f} ms {legacy_ms / matcher_ms:>7.1f}x")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} case(s) routed differently")
+
+
+if __name__ == "__main__":
+    main()
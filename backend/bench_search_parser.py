@@ -0,0 +1,48 @@
+import argparse
+import statistics
+import time
+
+from fake_duckduckgo import FIXTURES_DIR, load_fixtures
+from search_parser import parse_search_results, parse_search_results_bs4
+
+
+def time_parser(parser, html, max_results, repeats):
+    """Median time of one parse in ms, and the parsed results"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = parser(html, max_results)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the streaming result extractor with the BeautifulSoup parser on saved result pages")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--max-results", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    print(f"{'fixture':<12} {'size':>8} {'results':>7} {'bs4':>9} {'streaming':>10} {'speedup':>8}  same output")
+
+    mismatches = 0
+    for name, html in fixtures.items():
+        html = html.replace("{query}", name)
+        bs4_ms, expected = time_parser(parse_search_results_bs4, html, args.max_results, args.repeats)
+        fast_ms, actual = time_parser(parse_search_results, html, args.max_results, args.repeats)
+        same = actual == expected
+        mismatches += not same
+        print(
+            f"{name:<12} {len(html) / 1024:>5.1f} KB {len(actual):>7} {bs4_ms:>6.2f} ms {fast_ms:>7.2f} ms "
+            f"{bs4_ms / fast_ms:>7.1f}x  {'yes' if same else 'NO'}"
+        )
+        if not same:
+            print(f"  bs4:       {expected}\n  streaming: {actual}")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} fixture(s) parsed differently")
+
+
+if __name__ == "__main__":
+    main()
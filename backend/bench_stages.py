@@ -0,0 +1,200 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+# Shortest timed round; fast stages loop over their inputs until a round takes this long
+MIN_ROUND_S = 0.02
+
+# Clauses that give generated documents the metadata and risks DocumentProcessor looks for
+DOCUMENT_HEADER = (
+    "LEASE AGREEMENT\n"
+    "This agreement is made BETWEEN Ngono Holdings SARL AND Mbarga Paul, residing in Yaounde;\n"
+    "The lease is effective date of March 1, 2024 and terminates on February 28, 2027.\n"
+    "The tenant shall make a payment of XAF 350,000 each month, as provided by Civil Code Article 1728.\n"
+)
+DOCUMENT_CLAUSES = (
+    "The penalty for late payment is undefined and open to interpretation.",
+    "Clause 9 violates with law as the notice period exceeds statutory limit set by Labour Code Article 34.",
+    "The contract lacks clause on dispute resolution and does not specify the competent court.",
+    "Constitution of Cameroon Article 26 reserves this matter to the law.",
+)
+
+
+def build_document(docs, size, rng):
+    """A contract-like document of about `size` characters: a header, then dataset answers mixed with risk clauses"""
+    parts = [DOCUMENT_HEADER]
+    length = len(DOCUMENT_HEADER)
+    while length < size:
+        part = rng.choice(DOCUMENT_CLAUSES) if rng.random() < 0.1 else rng.choice(docs)["answer"]
+        parts.append(part)
+        length += len(part) + 1
+    return "\n".join(parts)
+
+
+def time_stage(fn, inputs, rounds):
+    """Median and fastest time per call in µs over `rounds` rounds of passes through the inputs
+
+    Fast stages repeat the inputs within a round so each round lasts at least
+    MIN_ROUND_S and timer resolution and scheduling noise do not dominate.
+    """
+    start = time.perf_counter()
+    for item in inputs:
+        fn(item)
+    passes = max(1, math.ceil(MIN_ROUND_S / max(time.perf_counter() - start, 1e-9)))
+
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(passes):
+            for item in inputs:
+                fn(item)
+        per_call.append((time.perf_counter() - start) * 1e6 / (passes * len(inputs)))
+    return {
+        "items": len(inputs),
+        "rounds": rounds,
+        "passes": passes,
+        "median_us": round(statistics.median(per_call), 3),
+        "min_us": round(min(per_call), 3),
+    }
+
+
+def build_stages(args):
+    """Stage name -> (function of one input, inputs, rounds), drawn from the dataset, fixtures and the model"""
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    import app
+    from document_processor import DocumentProcessor
+    from fake_duckduckgo import load_fixtures
+    from retrieval import load_dataset
+    from search_parser import parse_search_results
+
+    rng = random.Random(args.seed)
+    docs = load_dataset(args.dataset)
+    questions = [doc["question"] for doc in docs]
+    answers = [doc["answer"] for doc in docs]
+
+    def routing(question):
+        matches = app.match_question(question)
+        app.is_greeting(question, matches)
+        app.is_out_of_domain(question, matches)
+        app.get_model_answer_source(question, None, matches)
+
+    def answer_checks(pair):
+        question, answer = pair
+        matches = app.match_question(question)
+        app.safety_filter(question, answer, matches)
+        app.is_low_quality_answer(question, answer, matches)
+
+    pages = [page.replace("{query}", name) for name, page in load_fixtures().items()]
+    processor = DocumentProcessor()
+    documents = [build_document(docs, args.document_size, rng) for _ in range(4)]
+
+    stages = {
+        "preprocess_text": (app.preprocess_text, questions, args.rounds),
+        "routing": (routing, questions, args.rounds),
+        "hardcoded_answer": (lambda question: app.get_hardcoded_answer(question, "en"), questions, args.rounds),
+        "answer_checks": (answer_checks, list(zip(questions, answers)), args.rounds),
+        "add_markdown_formatting": (app.add_markdown_formatting, answers, args.rounds),
+        "parse_search_results": (parse_search_results, pages, args.rounds),
+        "analyze_document": (processor.analyze_document, documents, max(1, args.rounds // 4)),
+    }
+
+    if not args.no_model:
+        app.load_model()
+        if app.MODEL is None:
+            print(f"Model not loaded ({app.MODEL_LOAD_ERROR}); skipping tokenize and generate", file=sys.stderr)
+        else:
+            sample = rng.sample(questions, min(args.generate_samples, len(questions)))
+            encoded = [app.tokenize_question(question) for question in sample]
+            stages["tokenize"] = (app.tokenize_question, questions, args.rounds)
+            stages["generate"] = (lambda input_ids: app.generate_answers([input_ids]), encoded, args.generate_rounds)
+
+    if args.stages:
+        wanted = set(args.stages.split(","))
+        stages = {name: stage for name, stage in stages.items() if name in wanted}
+    return stages
+
+
+def run_stages(args):
+    stages = build_stages(args)
+    results = {}
+    for name, (fn, inputs, rounds) in stages.items():
+        results[name] = time_stage(fn, inputs, rounds)
+        print(f"{name:<24} {results[name]['median_us']:>12.1f} µs/call  ({results[name]['items']} inputs x {rounds} rounds)")
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "stages": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print the change per stage; return the stages slower than the baseline by more than `threshold` percent
+
+    Stages are compared on their fastest round. Scheduling noise and other
+    load on the machine only ever make a round slower, so the minimum varies
+    far less between runs than the median.
+    """
+    regressions = []
+    print(f"\n{'stage':<24} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["stages"].items():
+        reference = baseline["stages"].get(name)
+        if reference is None:
+            print(f"{name:<24} {'-':>12} {result['min_us']:>9.1f} µs {'new':>8}")
+            continue
+        change = (result["min_us"] - reference["min_us"]) / reference["min_us"] * 100
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<24} {reference['min_us']:>9.1f} µs {result['min_us']:>9.1f} µs {change:>+7.1f}%"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return regressions
+
+
+def main():
+    from retrieval import DEFAULT_DATASET_PATH
+
+    parser = argparse.ArgumentParser(description="Time each stage of the answering pipeline and compare against a saved baseline")
+    parser.add_argument("command", choices=["run", "compare"], help="run: save a new baseline; compare: fail on regressions against it")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=50.0, help="Percent slowdown of a stage's fastest round that counts as a regression")
+    parser.add_argument("--stages", default="", help="Comma-separated stage names to run (default: all)")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--document-size", type=int, default=50000, help="Characters per generated document")
+    parser.add_argument("--generate-samples", type=int, default=4)
+    parser.add_argument("--generate-rounds", type=int, default=3)
+    parser.add_argument("--no-model", action="store_true", help="Skip the tokenize and generate stages")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    current = run_stages(args)
+
+    if args.command == "run":
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        raise SystemExit(f"{len(regressions)} stage(s) regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+    print(f"\nNo stage regressed by more than {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
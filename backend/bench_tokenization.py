@@ -0,0 +1,97 @@
+import argparse
+import bisect
+import csv
+import random
+import statistics
+import time
+
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+from retrieval import DEFAULT_DATASET_PATH, VARIATION_SUFFIX
+
+
+def load_questions(path, samples, seed):
+    """Sample real questions from the dataset CSV, variation suffixes removed"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        questions = [VARIATION_SUFFIX.sub("", row["question"]).strip() for row in csv.DictReader(f)]
+    random.Random(seed).shuffle(questions)
+    return questions[:samples]
+
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def bucketed_batches(encoded, batch_size, buckets):
+    """Group tokenized questions by length bucket, then batch within each bucket"""
+    grouped = {}
+    for ids in encoded:
+        grouped.setdefault(bisect.bisect_left(buckets, len(ids)), []).append(ids)
+    return [batch for key in sorted(grouped) for batch in chunks(grouped[key], batch_size)]
+
+
+def time_encoder(model, tokenizer, batches, padding, repeats):
+    """Return (per-request encoder ms, mean padded tokens per request) for the given batches"""
+    encoder = model.get_encoder()
+    n_requests = sum(len(batch) for batch in batches)
+
+    padded = [
+        tokenizer.pad({"input_ids": batch}, padding=padding, max_length=128, return_tensors="pt")
+        for batch in batches
+    ]
+    tokens = sum(p.input_ids.numel() for p in padded) / n_requests
+
+    runs = []
+    with torch.inference_mode():
+        # Warm up kernels before timing
+        encoder(input_ids=padded[0].input_ids, attention_mask=padded[0].attention_mask)
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for p in padded:
+                encoder(input_ids=p.input_ids, attention_mask=p.attention_mask)
+            runs.append((time.perf_counter() - start) * 1000 / n_requests)
+
+    return statistics.median(runs), tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare encoder cost of fixed vs dynamic padding on dataset questions")
+    parser.add_argument("--model", default="./legal_chatbot_model")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--buckets", default="16,32,64,128")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.model).eval()
+    buckets = sorted(int(b) for b in args.buckets.split(","))
+
+    questions = load_questions(args.dataset, args.samples, args.seed)
+    encoded = [tokenizer("question: " + q, max_length=128, truncation=True).input_ids for q in questions]
+    lengths = [len(ids) for ids in encoded]
+    print(f"{len(questions)} questions, tokens: mean {statistics.mean(lengths):.1f}, max {max(lengths)}")
+
+    singles = chunks(encoded, 1)
+    batched = chunks(encoded, args.batch_size)
+    cases = [
+        ("batch 1, pad to 128 (before)", singles, "max_length"),
+        ("batch 1, no padding", singles, "longest"),
+        (f"batch {args.batch_size}, pad to 128", batched, "max_length"),
+        (f"batch {args.batch_size}, pad to longest", batched, "longest"),
+        (f"batch {args.batch_size}, length buckets (after)", bucketed_batches(encoded, args.batch_size, buckets), "longest"),
+    ]
+
+    print(f"{'case':<40} {'ms/request':>11} {'tokens/request':>15}")
+    baseline = None
+    for name, batches, padding in cases:
+        ms, tokens = time_encoder(model, tokenizer, batches, padding, args.repeats)
+        baseline = baseline or ms
+        print(f"{name:<40} {ms:>11.3f} {tokens:>15.1f}   ({baseline / ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+import time
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from keyword_matcher import KeywordMatcher, KeywordMatches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CANNED_ANSWERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "canned_answers.json")
+
+
+class CannedAnswerStore:
+    """Immutable per-language canned answers with a precompiled key matcher
+
+    `answers` maps a language to (key, answer, source) entries in priority
+    order; the first key found in a question wins. The keys are compiled into
+    one matcher together with `routing_terms`, the other routing term lists,
+    so a single scan of the question serves every routing check. A store is
+    never changed after construction: reloading builds a new store and swaps
+    it in, and requests already holding the old one finish with it.
+    """
+
+    def __init__(self, answers: Dict[str, List[Tuple[str, str, str]]], routing_terms: Optional[Dict[str, Iterable[str]]] = None,
+                 path: str = "", mtime: Optional[float] = None):
+        self.path = path
+        self.mtime = mtime
+        self.loaded_at = time.time()
+        self.keys = MappingProxyType({
+            language: tuple(key for key, _, _ in entries) for language, entries in answers.items()
+        })
+        self.answers = MappingProxyType({
+            language: MappingProxyType({key: (answer, source) for key, answer, source in entries})
+            for language, entries in answers.items()
+        })
+        self.matcher = KeywordMatcher({
+            **(routing_terms or {}),
+            **{f"canned:{language}": keys for language, keys in self.keys.items()},
+        })
+
+    def scan(self, question: str) -> KeywordMatches:
+        """Scan the lowercased question for every routing term and canned answer key"""
+        return self.matcher.scan(question.lower())
+
+    def lookup(self, language: str, matches: KeywordMatches) -> Optional[Tuple[str, str]]:
+        """(answer, source) for the first key of the language found in the question"""
+        keys = self.keys.get(language)
+        if not keys:
+            return None
+        if matches.matcher is not self.matcher:
+            # The question was scanned by a store that has since been replaced
+            matches = self.matcher.scan(matches.text)
+        key = matches.first(keys)
+        return self.answers[language][key] if key else None
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "answers": {language: len(keys) for language, keys in self.keys.items()},
+        }
+
+
+def load_canned_answers(path: str, routing_terms: Optional[Dict[str, Iterable[str]]] = None) -> CannedAnswerStore:
+    """Read a canned answer file into a new store; raises ValueError if the file is malformed
+
+    The file maps each language to a list of {"key", "answer", "source"}
+    objects. Keys are matched as lowercase substrings of the question, in
+    list order.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        mtime = os.fstat(f.fileno()).st_mtime
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path} is not valid JSON: {str(e)}")
+
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must map languages to lists of answers")
+
+    answers = {}
+    for language, entries in data.items():
+        if not isinstance(entries, list):
+            raise ValueError(f"{path}: answers for '{language}' must be a list")
+        seen = set()
+        answers[language] = []
+        for index, entry in enumerate(entries):
+            fields = [entry.get(name) if isinstance(entry, dict) else None for name in ("key", "answer", "source")]
+            if not all(isinstance(value, str) and value.strip() for value in fields):
+                raise ValueError(f"{path}: answer {index} for '{language}' needs non-empty key, answer and source strings")
+            key = fields[0].strip().lower()
+            if key in seen:
+                raise ValueError(f"{path}: duplicate key '{key}' for '{language}'")
+            seen.add(key)
+            answers[language].append((key, fields[1], fields[2]))
+
+    return CannedAnswerStore(answers, routing_terms, path, mtime)
@@ -12,9 +12,10 @@ def check_model_path():
         return False
         
     required_files = [
-        "pytorch_model.bin", 
-        "config.json", 
-        "tokenizer_config.json"
+        "model.safetensors",
+        "config.json",
+        "tokenizer_config.json",
+        "spiece.model"
     ]
     
     missing_files = []
@@ -26,6 +27,13 @@ def check_model_path():
         print(f"❌ ERROR: Missing required files: {', '.join(missing_files)}")
         return False
         
+    # A checkout without `git lfs pull` only has a small pointer file instead of the weights
+    weights_path = os.path.join(model_path, "model.safetensors")
+    with open(weights_path, "rb") as f:
+        if f.read(64).startswith(b"version https://git-lfs"):
+            print(f"❌ ERROR: {weights_path} is a Git LFS pointer; run `git lfs pull` to fetch the weights")
+            return False
+        
     print("✅ Model path exists with required files")
     return True
 
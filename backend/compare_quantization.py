@@ -0,0 +1,114 @@
+import argparse
+import csv
+import difflib
+import gc
+import random
+import statistics
+import time
+
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+from quantization import quantize_dynamic_int8, serialized_size_mb
+from retrieval import DEFAULT_DATASET_PATH, VARIATION_SUFFIX
+
+
+def load_questions(path, samples, seed):
+    """Sample distinct questions from the dataset CSV, variation suffixes removed"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        questions = sorted({VARIATION_SUFFIX.sub("", row["question"]).strip() for row in csv.DictReader(f)})
+    random.Random(seed).shuffle(questions)
+    return questions[:samples]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def generate_all(model, tokenizer, questions, num_beams, max_length):
+    """Answer each question one at a time, as /ask does, returning answers and latencies in ms"""
+    answers, latencies = [], []
+    with torch.inference_mode():
+        for question in questions:
+            encoded = tokenizer("question: " + question, max_length=128, truncation=True, return_tensors="pt")
+            start = time.perf_counter()
+            outputs = model.generate(
+                **encoded,
+                max_length=max_length,
+                num_beams=num_beams,
+                early_stopping=num_beams > 1,
+                no_repeat_ngram_size=2,
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            answers.append(tokenizer.decode(outputs[0], skip_special_tokens=True))
+    return answers, latencies
+
+
+def summarize(name, latencies, size_mb, rss_delta_mb):
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(round(0.95 * len(ordered))) - 1)]
+    print(
+        f"{name:<6} mean {statistics.mean(latencies):8.1f} ms   p50 {statistics.median(latencies):8.1f} ms   "
+        f"p95 {p95:8.1f} ms   weights {size_mb:7.1f} MB   RSS +{rss_delta_mb:7.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 dynamic-quantized inference on dataset questions")
+    parser.add_argument("--model", default="./legal_chatbot_model")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--num-beams", type=int, default=4)
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 keeps the default)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    questions = load_questions(args.dataset, args.samples, args.seed)
+    print(f"Comparing on {len(questions)} dataset questions (num_beams={args.num_beams}, threads={torch.get_num_threads()})")
+
+    gc.collect()
+    base_rss = rss_mb()
+    fp32_model = AutoModelForSeq2SeqLM.from_pretrained(args.model).eval()
+    fp32_rss = rss_mb() - base_rss
+    fp32_answers, fp32_latencies = generate_all(fp32_model, tokenizer, questions, args.num_beams, args.max_length)
+    fp32_size = serialized_size_mb(fp32_model)
+
+    # Quantize a fresh copy so RSS reflects the int8 model alone
+    del fp32_model
+    gc.collect()
+    base_rss = rss_mb()
+    int8_model = quantize_dynamic_int8(AutoModelForSeq2SeqLM.from_pretrained(args.model))
+    gc.collect()
+    int8_rss = rss_mb() - base_rss
+    int8_answers, int8_latencies = generate_all(int8_model, tokenizer, questions, args.num_beams, args.max_length)
+    int8_size = serialized_size_mb(int8_model)
+
+    summarize("fp32", fp32_latencies, fp32_size, fp32_rss)
+    summarize("int8", int8_latencies, int8_size, int8_rss)
+    print(f"Speedup: {statistics.mean(fp32_latencies) / statistics.mean(int8_latencies):.2f}x mean latency")
+
+    exact = sum(a == b for a, b in zip(fp32_answers, int8_answers))
+    similarity = [
+        difflib.SequenceMatcher(None, a.split(), b.split()).ratio()
+        for a, b in zip(fp32_answers, int8_answers)
+    ]
+    print(f"Agreement: {exact}/{len(questions)} identical answers, mean word similarity {statistics.mean(similarity):.3f}")
+
+    worst = sorted(zip(similarity, questions, fp32_answers, int8_answers))[:3]
+    for score, question, a, b in worst:
+        if score < 1.0:
+            print(f"\n[{score:.2f}] {question}\n  fp32: {a}\n  int8: {b}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, NamedTuple, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class DecodingTier(NamedTuple):
+    """One set of generation settings, from most to least expensive"""
+    name: str
+    num_beams: int
+    max_length: int
+
+
+DEFAULT_TIERS = (
+    DecodingTier("beam4", num_beams=4, max_length=256),
+    DecodingTier("beam2", num_beams=2, max_length=256),
+    DecodingTier("greedy", num_beams=1, max_length=192),
+)
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class DecodingPolicy:
+    """Pick a decoding tier that keeps model latency under a p95 target
+
+    Every model request reports its latency (queue wait plus generate time)
+    for the tier that served it. Before each batch the policy checks the p95
+    of the current tier's recent latencies and the model queue depth. It steps
+    down to a cheaper tier when the target is exceeded or the queue backs up,
+    and steps back up once latency has fallen well below the target and the
+    queue has drained. A cooldown between changes stops it from oscillating.
+    """
+
+    def __init__(
+        self,
+        target_p95_ms: float,
+        tiers: Sequence[DecodingTier] = DEFAULT_TIERS,
+        window: int = 50,
+        min_samples: int = 10,
+        queue_high: int = 16,
+        queue_low: int = 2,
+        step_up_ratio: float = 0.5,
+        cooldown_s: float = 5.0,
+    ):
+        self.target_p95_ms = target_p95_ms
+        self.tiers = list(tiers)
+        self.min_samples = min_samples
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.step_up_ratio = step_up_ratio
+        self.cooldown_s = cooldown_s
+
+        self._latencies: Dict[str, deque] = {tier.name: deque(maxlen=window) for tier in self.tiers}
+        self._level = 0
+        self._last_change = 0.0
+        self._lock = threading.Lock()
+
+        logger.info(
+            f"Decoding policy: target_p95_ms={target_p95_ms}, "
+            f"tiers={[tier.name for tier in self.tiers]}"
+        )
+
+    @property
+    def current(self) -> DecodingTier:
+        return self.tiers[self._level]
+
+    def record(self, tier_name: str, latency_ms: float):
+        """Report the end-to-end model latency of one request"""
+        with self._lock:
+            samples = self._latencies.get(tier_name)
+            if samples is not None:
+                samples.append(latency_ms)
+
+    def select(self, queue_depth: int) -> DecodingTier:
+        """Return the tier to use for the next batch, adjusting it to current load"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_change < self.cooldown_s:
+                return self.current
+
+            samples = self._latencies[self.current.name]
+            p95 = percentile(samples, 95) if len(samples) >= self.min_samples else None
+            level = self._level
+
+            if level < len(self.tiers) - 1 and (
+                queue_depth >= self.queue_high or (p95 is not None and p95 > self.target_p95_ms)
+            ):
+                level += 1
+            elif level > 0 and queue_depth <= self.queue_low and (
+                p95 is not None and p95 < self.target_p95_ms * self.step_up_ratio
+            ):
+                level -= 1
+
+            if level != self._level:
+                logger.info(
+                    f"Decoding tier {self.current.name} -> {self.tiers[level].name} "
+                    f"(p95={p95 if p95 is None else round(p95)} ms, queue depth {queue_depth})"
+                )
+                self._level = level
+                self._last_change = now
+                # Start the new tier from fresh measurements
+                self._latencies[self.current.name].clear()
+
+            return self.current
+
+    def stats(self) -> List[dict]:
+        with self._lock:
+            return [
+                {
+                    "tier": tier.name,
+                    "active": i == self._level,
+                    "samples": len(self._latencies[tier.name]),
+                    "p95_ms": round(percentile(self._latencies[tier.name], 95), 1) if self._latencies[tier.name] else None,
+                }
+                for i, tier in enumerate(self.tiers)
+            ]
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from decoding_policy import percentile
+from document_processor import DocumentProcessor
+
+# One processor per worker process; its patterns are compiled at import
+PROCESSOR = DocumentProcessor()
+
+
+def analyze_bytes(name, data):
+    """Analyze one document's raw bytes, decoded as UTF-8; runs in a worker process"""
+    start = time.perf_counter()
+    text = data.decode("utf-8", errors="replace")
+    analysis = PROCESSOR.analyze_document(text)
+    return {
+        "document": name,
+        "characters": len(text),
+        "time_ms": round((time.perf_counter() - start) * 1000, 2),
+        **analysis,
+    }
+
+
+def analyze_path(name, path):
+    """Read and analyze one document file; runs in a worker process"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return {"document": name, "error": str(e)}
+    return analyze_bytes(name, data)
+
+
+def find_documents(directory, pattern, recursive):
+    """(name relative to directory, path) of the matching files, sorted by name"""
+    root = Path(directory)
+    paths = root.rglob(pattern) if recursive else root.glob(pattern)
+    return sorted((str(path.relative_to(root)), str(path)) for path in paths if path.is_file())
+
+
+class BatchSummary:
+    """Aggregate counts and throughput of a batch of document results"""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.start = time.perf_counter()
+        self.documents = 0
+        self.failed = 0
+        self.characters = 0
+        self.times_ms = []
+        self.document_types = Counter()
+        self.risks = Counter()
+
+    def add(self, result):
+        """Count one result and stamp it with the ms since the batch started"""
+        result["completed_ms"] = round((time.perf_counter() - self.start) * 1000, 2)
+        self.documents += 1
+        if "error" in result:
+            self.failed += 1
+            return result
+        self.characters += result["characters"]
+        self.times_ms.append(result["time_ms"])
+        self.document_types[result["document_type"]] += 1
+        self.risks.update(risk["type"] for risk in result["risks_identified"])
+        return result
+
+    def as_dict(self):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        return {
+            "documents": self.documents,
+            "failed": self.failed,
+            "workers": self.workers,
+            "characters": self.characters,
+            "time_ms": round(elapsed * 1000, 2),
+            "documents_per_s": round(self.documents / elapsed, 2),
+            "mb_per_s": round(self.characters / 1e6 / elapsed, 2),
+            "document_time_ms": {
+                "p50": percentile(self.times_ms, 50),
+                "p95": percentile(self.times_ms, 95),
+                "max": max(self.times_ms),
+                "total": round(sum(self.times_ms), 2),
+            } if self.times_ms else None,
+            "document_types": dict(self.document_types),
+            "risks": dict(self.risks),
+        }
+
+
+def analyze_all(pool, fn, jobs, max_pending):
+    """Results of fn(*job) on the pool, in completion order, with at most max_pending jobs submitted at once"""
+    jobs = iter(jobs)
+    pending = set()
+    exhausted = False
+    while pending or not exhausted:
+        while not exhausted and len(pending) < max_pending:
+            job = next(jobs, None)
+            if job is None:
+                exhausted = True
+                break
+            pending.add(pool.submit(fn, *job))
+        if not pending:
+            break
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze every document in a directory on a pool of worker processes")
+    parser.add_argument("directory")
+    parser.add_argument("--pattern", default="*.txt", help="File name pattern of the documents")
+    parser.add_argument("--recursive", action="store_true", help="Also search subdirectories")
+    parser.add_argument("--output", default="document_analysis.jsonl", help="Per-document results, one JSON object per line")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    documents = find_documents(args.directory, args.pattern, args.recursive)
+    if not documents:
+        print(f"No documents matching {args.pattern} in {args.directory}")
+        return
+
+    summary = BatchSummary(args.workers)
+    with open(args.output, "w", encoding="utf-8") as out, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # Workers read the files themselves, so only results cross the process boundary
+        for result in analyze_all(pool, analyze_path, documents, args.workers * 2):
+            summary.add(result)
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            if "error" in result:
+                print(f"{result['document']}: {result['error']}")
+
+    totals = summary.as_dict()
+    print(
+        f"{totals['documents']} documents ({totals['characters'] / 1e6:.1f}M characters) in {totals['time_ms'] / 1000:.1f}s "
+        f"with {args.workers} workers: {totals['documents_per_s']:.1f} documents/s, {totals['mb_per_s']:.1f} MB/s"
+    )
+    if totals["document_time_ms"]:
+        times = totals["document_time_ms"]
+        print(f"Per document: p50 {times['p50']:.1f} ms   p95 {times['p95']:.1f} ms   max {times['max']:.1f} ms")
+    if totals["failed"]:
+        print(f"{totals['failed']} documents could not be read")
+    print("Types: " + ", ".join(f"{doc_type} {count}" for doc_type, count in summary.document_types.most_common()))
+    print("Risks: " + ", ".join(f"{risk} {count}" for risk, count in summary.risks.most_common()))
+    print(f"\nPer-document results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
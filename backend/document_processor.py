@@ -1,90 +1,190 @@
+import codecs
+import heapq
+import itertools
+import mmap
+import os
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Non-ASCII characters that re.IGNORECASE matches against ASCII letters but
+# str.lower() does not map to them (U+0130 also lowercases to two characters).
+# Scanning a lowercased copy gives the same matches as IGNORECASE unless the
+# text contains one of these.
+CASE_FOLD_EXCEPTIONS = ("\u0130", "\u0131", "\u017f")
+# Uppercase escapes such as \S or \W change meaning when a pattern is lowercased
+UPPERCASE_ESCAPE = re.compile(r"\\[A-Z]")
+
+# Characters of surrounding text in a risk's context, on each side
+RISK_CONTEXT = 50
+# Streaming analysis: bytes read at a time, and characters each window
+# shares with the next; matches up to STREAM_OVERLAP - RISK_CONTEXT characters
+# long are found exactly as analyze_document finds them
+STREAM_CHUNK_SIZE = 1024 * 1024
+STREAM_OVERLAP = 4096
+
+def has_case_fold_exceptions(text: str) -> bool:
+    # Substring checks are far faster than a character class search
+    return any(character in text for character in CASE_FOLD_EXCEPTIONS)
+
+def compile_lowercase(pattern: str):
+    """Compile a pattern to match lowercased text without re.IGNORECASE"""
+    if UPPERCASE_ESCAPE.search(pattern):
+        raise ValueError(f"Pattern cannot be lowercased: {pattern}")
+    return re.compile(pattern.lower())
+
+def merge_by_position(tagged_matches):
+    """Merge iterators of (tag, match) in position order into one
+
+    Ties keep the order of the iterators, as a stable sort of the
+    concatenated matches would.
+    """
+    return heapq.merge(*tagged_matches, key=lambda item: item[1].start())
 
 class DocumentProcessor:
-    """Process legal documents to extract key information and analyze content"""
+    """Process legal documents to extract key information and analyze content
+
+    The pattern tables are class attributes, compiled once per class (and
+    again for a subclass that overrides them). Risk and legal reference
+    patterns run over one shared lowercased copy of the document without
+    re.IGNORECASE, which lets the regex engine skip ahead to each pattern's
+    literal prefix; their matches are merged in position order instead of
+    being sorted afterwards.
+    """
     
-    def __init__(self):
-        # Define patterns for various document types
-        self.patterns = {
-            "contract": {
-                "parties": r"BETWEEN\s+(.+?)\s+AND\s+(.+?)(?:\n|,|;)",
-                "effective_date": r"effective\s+(?:date|on)(?:\s+of)?\s+([A-Za-z]+\s+\d{1,2},\s+\d{4}|\d{1,2}\s+[A-Za-z]+,?\s+\d{4}|\d{1,2}/\d{1,2}/\d{4}|\d{1,2}-\d{1,2}-\d{4})",
-                "termination": r"(?:terminat(?:e|ion)|expire|end)(?:s|d)?\s+(?:on|at|upon)?\s+([A-Za-z]+\s+\d{1,2},\s+\d{4}|\d{1,2}\s+[A-Za-z]+,?\s+\d{4}|\d{1,2}/\d{1,2}/\d{4}|\d{1,2}-\d{1,2}-\d{4})",
-                "payment": r"(?:payment|fee|compensation|amount)\s+of\s+(?:XAF|FCFA|CFA)?\s*([\d,\.]+)(?:\s*(?:XAF|FCFA|CFA))?"
-            },
-            "complaint": {
-                "plaintiff": r"(?:plaintiff|complainant|claimant)(?:\s*:|\s+is)\s+(.+?)(?:\n|,|;)",
-                "defendant": r"(?:defendant|respondent)(?:\s*:|\s+is)\s+(.+?)(?:\n|,|;)",
-                "relief_sought": r"(?:relief\s+sought|requesting|demands|seeks)(?:\s*:)?\s+(.+?)(?:\.|\n)",
-                "claim_amount": r"(?:claim|damages)\s+(?:in\s+the\s+amount\s+of|of)\s+(?:XAF|FCFA|CFA)?\s*([\d,\.]+)(?:\s*(?:XAF|FCFA|CFA))?"
-            },
-            "property": {
-                "location": r"(?:located|situated)\s+at\s+(.+?)(?:\n|,|;|\.)",
-                "owner": r"(?:owned|property\s+of)\s+(?:by)?\s+(.+?)(?:\n|,|;|\.)",
-                "dimensions": r"(?:dimensions|area|measurement|size)\s+(?:of)?\s+(\d+(?:\.\d+)?\s*(?:hectares|sq\.?\s*m|square\s+meters|acres))",
-                "title_number": r"(?:title|deed)\s+(?:number|#|no\.?|certificate)?\s+(?:is|:)?\s*([A-Za-z0-9-_/]+)" 
-            }
-        }
-        
-        # Legal references patterns
-        self.legal_references = {
-            "constitution": r"(?:Constitution|Constitutional)\s+(?:of\s+Cameroon)?\s*(?:Article|Art\.?)?\s+(\d+)",
-            "penal_code": r"(?:Penal\s+Code|Criminal\s+Code)\s+(?:Article|Art\.?)?\s+(\d+)",
-            "civil_code": r"(?:Civil\s+Code)\s+(?:Article|Art\.?)?\s+(\d+)",
-            "labor_code": r"(?:Labor|Labour)\s+(?:Code)\s+(?:Article|Art\.?)?\s+(\d+)",
+    # Define patterns for various document types
+    patterns = {
+        "contract": {
+            "parties": r"BETWEEN\s+(.+?)\s+AND\s+(.+?)(?:\n|,|;)",
+            "effective_date": r"effective\s+(?:date|on)(?:\s+of)?\s+([A-Za-z]+\s+\d{1,2},\s+\d{4}|\d{1,2}\s+[A-Za-z]+,?\s+\d{4}|\d{1,2}/\d{1,2}/\d{4}|\d{1,2}-\d{1,2}-\d{4})",
+            "termination": r"(?:terminat(?:e|ion)|expire|end)(?:s|d)?\s+(?:on|at|upon)?\s+([A-Za-z]+\s+\d{1,2},\s+\d{4}|\d{1,2}\s+[A-Za-z]+,?\s+\d{4}|\d{1,2}/\d{1,2}/\d{4}|\d{1,2}-\d{1,2}-\d{4})",
+            "payment": r"(?:payment|fee|compensation|amount)\s+of\s+(?:XAF|FCFA|CFA)?\s*([\d,\.]+)(?:\s*(?:XAF|FCFA|CFA))?"
+        },
+        "complaint": {
+            "plaintiff": r"(?:plaintiff|complainant|claimant)(?:\s*:|\s+is)\s+(.+?)(?:\n|,|;)",
+            "defendant": r"(?:defendant|respondent)(?:\s*:|\s+is)\s+(.+?)(?:\n|,|;)",
+            "relief_sought": r"(?:relief\s+sought|requesting|demands|seeks)(?:\s*:)?\s+(.+?)(?:\.|\n)",
+            "claim_amount": r"(?:claim|damages)\s+(?:in\s+the\s+amount\s+of|of)\s+(?:XAF|FCFA|CFA)?\s*([\d,\.]+)(?:\s*(?:XAF|FCFA|CFA))?"
+        },
+        "property": {
+            "location": r"(?:located|situated)\s+at\s+(.+?)(?:\n|,|;|\.)",
+            "owner": r"(?:owned|property\s+of)\s+(?:by)?\s+(.+?)(?:\n|,|;|\.)",
+            "dimensions": r"(?:dimensions|area|measurement|size)\s+(?:of)?\s+(\d+(?:\.\d+)?\s*(?:hectares|sq\.?\s*m|square\s+meters|acres))",
+            "title_number": r"(?:title|deed)\s+(?:number|#|no\.?|certificate)?\s+(?:is|:)?\s*([A-Za-z0-9-_/]+)" 
         }
-        
-        # Issues and risks to identify
-        self.risk_patterns = {
-            "ambiguity": [
-                r"(?:undefined|vague|ambiguous|not\s+(?:clear|precise))",
-                r"(?:open\s+to\s+interpretation)"
-            ],
-            "legality": [
-                r"(?:contrary|against|violates?|non-compliant)\s+(?:to|with)\s+(?:law|regulations?|code)",
-                r"(?:illegal|unlawful|not\s+legal)",
-                r"(?:exceeds?|beyond)\s+(?:legal|statutory)\s+(?:limit|maximum|minimum)"
-            ],
-            "missing_elements": [
-                r"(?:missing|lacks?|without|no)\s+(?:clause|provision|section|article)",
-                r"(?:does\s+not|doesn't|fails\s+to)\s+(?:specify|state|mention|include)"
-            ]
+    }
+    
+    # Legal references patterns
+    legal_references = {
+        "constitution": r"(?:Constitution|Constitutional)\s+(?:of\s+Cameroon)?\s*(?:Article|Art\.?)?\s+(\d+)",
+        "penal_code": r"(?:Penal\s+Code|Criminal\s+Code)\s+(?:Article|Art\.?)?\s+(\d+)",
+        "civil_code": r"(?:Civil\s+Code)\s+(?:Article|Art\.?)?\s+(\d+)",
+        "labor_code": r"(?:Labor|Labour)\s+(?:Code)\s+(?:Article|Art\.?)?\s+(\d+)",
+    }
+    
+    # Issues and risks to identify
+    risk_patterns = {
+        "ambiguity": [
+            r"(?:undefined|vague|ambiguous|not\s+(?:clear|precise))",
+            r"(?:open\s+to\s+interpretation)"
+        ],
+        "legality": [
+            r"(?:contrary|against|violates?|non-compliant)\s+(?:to|with)\s+(?:law|regulations?|code)",
+            r"(?:illegal|unlawful|not\s+legal)",
+            r"(?:exceeds?|beyond)\s+(?:legal|statutory)\s+(?:limit|maximum|minimum)"
+        ],
+        "missing_elements": [
+            r"(?:missing|lacks?|without|no)\s+(?:clause|provision|section|article)",
+            r"(?:does\s+not|doesn't|fails\s+to)\s+(?:specify|state|mention|include)"
+        ]
+    }
+    
+    # Document type signatures, checked in order; "owned\s+by" matches what
+    # "owned by" matched in a whitespace-collapsed copy of the text
+    document_signatures = {
+        "contract": r"agreement|contract|terms|between|parties|hereby",
+        "complaint": r"complaint|claim|plaintiff|defendant|court|lawsuit",
+        "property": r"deed|property|land|parcel|title|owned\s+by|situated",
+    }
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.compile_patterns()
+    
+    @classmethod
+    def compile_patterns(cls):
+        """Compile the pattern tables of this class; call again after changing them"""
+        cls._metadata_patterns = {
+            doc_type: [(key, re.compile(pattern, re.IGNORECASE)) for key, pattern in fields.items()]
+            for doc_type, fields in cls.patterns.items()
         }
+        # Each scan has a case-sensitive version for lowercased text and an
+        # IGNORECASE one for text containing CASE_FOLD_EXCEPTIONS
+        cls._signature_scans = [(doc_type, compile_lowercase(pattern)) for doc_type, pattern in cls.document_signatures.items()]
+        cls._signature_scans_ignorecase = [
+            (doc_type, re.compile(pattern, re.IGNORECASE)) for doc_type, pattern in cls.document_signatures.items()
+        ]
+        cls._reference_scans = [(law, compile_lowercase(pattern)) for law, pattern in cls.legal_references.items()]
+        cls._reference_scans_ignorecase = [
+            (law, re.compile(pattern, re.IGNORECASE)) for law, pattern in cls.legal_references.items()
+        ]
+        cls._risk_scans = [
+            (risk_type, compile_lowercase(pattern))
+            for risk_type, patterns in cls.risk_patterns.items() for pattern in patterns
+        ]
+        cls._risk_scans_ignorecase = [
+            (risk_type, re.compile(pattern, re.IGNORECASE))
+            for risk_type, patterns in cls.risk_patterns.items() for pattern in patterns
+        ]
+    
+    def lowercase_copy(self, text: str) -> Optional[str]:
+        """Lowercased copy of the text for the case-sensitive scans, or None if it needs IGNORECASE scans"""
+        if has_case_fold_exceptions(text):
+            return None
+        return text.lower()
     
-    def detect_document_type(self, text: str) -> str:
-        """Determine the type of legal document based on content analysis"""
-        # Convert to lowercase and remove excess whitespace
-        normalized_text = " ".join(text.lower().split())
+    def detect_document_type(self, text: str, lowered: Optional[str] = None) -> str:
+        """Determine the type of legal document based on content analysis
+
+        Searches `lowered`, the lowercase copy, if given; otherwise the text
+        itself, without copying it.
+        """
+        target, signatures = self._signature_target(text, lowered)
         
         # Check for document type signatures
-        if re.search(r"agreement|contract|terms|between|parties|hereby", normalized_text):
-            return "contract"
-        elif re.search(r"complaint|claim|plaintiff|defendant|court|lawsuit", normalized_text):
-            return "complaint"
-        elif re.search(r"deed|property|land|parcel|title|owned by|situated", normalized_text):
-            return "property"
-        else:
-            return "unknown"
+        for doc_type, signature in signatures:
+            if signature.search(target):
+                return doc_type
+        return "unknown"
+    
+    def _signature_target(self, text: str, lowered: Optional[str]):
+        """The text to search for document signatures, and the compiled signatures to use"""
+        if lowered is not None:
+            return lowered, self._signature_scans
+        if has_case_fold_exceptions(text):
+            # Convert to lowercase and remove excess whitespace, as the signatures expect
+            return " ".join(text.lower().split()), self._signature_scans
+        return text, self._signature_scans_ignorecase
     
-    def extract_metadata(self, text: str, doc_type: Optional[str] = None) -> Dict:
+    def extract_metadata(self, text: str, doc_type: Optional[str] = None, lowered: Optional[str] = None) -> Dict:
         """Extract relevant metadata from the document"""
+        if lowered is None:
+            lowered = self.lowercase_copy(text)
         if not doc_type:
-            doc_type = self.detect_document_type(text)
+            doc_type = self.detect_document_type(text, lowered)
         
         metadata = {"document_type": doc_type}
         
         # Find matches based on document type
-        if doc_type in self.patterns:
-            for key, pattern in self.patterns[doc_type].items():
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    metadata[key] = match.group(1).strip()
+        for key, pattern in self._metadata_patterns.get(doc_type, []):
+            match = pattern.search(text)
+            if match:
+                metadata[key] = match.group(1).strip()
         
-        # Extract legal references
+        # Extract legal references; each pattern captures the reference in group 1
+        target, scans = (text, self._reference_scans_ignorecase) if lowered is None else (lowered, self._reference_scans)
         legal_refs = {}
-        for law, pattern in self.legal_references.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for law, pattern in scans:
+            matches = [text[match.start(1):match.end(1)] for match in pattern.finditer(target)]
             if matches:
                 legal_refs[law] = matches
         
@@ -93,33 +193,38 @@ class DocumentProcessor:
             
         return metadata
     
-    def identify_risks(self, text: str) -> List[Dict]:
+    def identify_risks(self, text: str, lowered: Optional[str] = None) -> List[Dict]:
         """Identify potential legal risks or issues in the document"""
-        risks = []
+        if lowered is None:
+            lowered = self.lowercase_copy(text)
+        target, scans = (text, self._risk_scans_ignorecase) if lowered is None else (lowered, self._risk_scans)
         
-        for risk_type, patterns in self.risk_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    # Get context (surrounding text)
-                    start = max(0, match.start() - 50)
-                    end = min(len(text), match.end() + 50)
-                    context = text[start:end].replace('\n', ' ').strip()
-                    
-                    risks.append({
-                        "type": risk_type,
-                        "match": match.group(0),
-                        "context": context,
-                        "position": match.start()
-                    })
+        # One scan per pattern, merged in position order; ties keep pattern order
+        risks = []
+        for risk_type, match in merge_by_position(
+            zip(itertools.repeat(risk_type), pattern.finditer(target)) for risk_type, pattern in scans
+        ):
+            # Get context (surrounding text)
+            start = max(0, match.start() - RISK_CONTEXT)
+            end = min(len(text), match.end() + RISK_CONTEXT)
+            context = text[start:end].replace('\n', ' ').strip()
+            
+            risks.append({
+                "type": risk_type,
+                "match": text[match.start():match.end()],
+                "context": context,
+                "position": match.start()
+            })
         
-        return sorted(risks, key=lambda r: r["position"])
+        return risks
     
     def analyze_document(self, text: str) -> Dict:
         """Perform comprehensive document analysis"""
-        doc_type = self.detect_document_type(text)
-        metadata = self.extract_metadata(text, doc_type)
-        risks = self.identify_risks(text)
+        # Every scan below shares one lowercased copy of the document
+        lowered = self.lowercase_copy(text)
+        doc_type = self.detect_document_type(text, lowered)
+        metadata = self.extract_metadata(text, doc_type, lowered)
+        risks = self.identify_risks(text, lowered)
         
         # Generate relevant laws reference based on document type
         relevant_laws = self.get_relevant_laws(doc_type)
@@ -131,6 +236,117 @@ class DocumentProcessor:
             "relevant_laws": relevant_laws
         }
     
+    def analyze_stream(self, chunks: Iterable[str], overlap: int = STREAM_OVERLAP) -> Iterator[Dict]:
+        """Analyze a document read as a sequence of text chunks, yielding results as they are found
+
+        The text is scanned in windows that share `overlap` characters with
+        the next one, so a match across a chunk edge is found once, and
+        memory is bounded by the window size rather than the document size.
+        Yields {"event": "reference"} and {"event": "risk"} items in position
+        order, then a final {"event": "summary"} with the document type,
+        metadata, relevant laws and counts. The risks, references and
+        metadata are those analyze_document would give for the whole text.
+        """
+        order = list(self.document_signatures)
+        best_type = len(order)  # index in `order` of the best type found so far
+        metadata = {}  # (doc_type, key) -> first value found
+        metadata_from = {}  # (doc_type, key) -> position the next search starts at
+        scans = [("reference", law) for law, _ in self._reference_scans] + [("risk", risk_type) for risk_type, _ in self._risk_scans]
+        next_start = [0] * len(scans)
+        reference_counts = {}
+        risk_count = 0
+        
+        buffer, offset, committed = "", 0, 0
+        chunks = iter(chunks)
+        final = False
+        while not final:
+            chunk = next(chunks, None)
+            if chunk is None:
+                final = True
+            else:
+                buffer += chunk
+            end = offset + len(buffer)
+            # Matches starting before safe_end are complete; later ones are left for the next window
+            safe_end = end if final else end - overlap
+            if safe_end <= committed:
+                continue
+            
+            lowered = self.lowercase_copy(buffer)
+            
+            # Document type: only types that would beat the best one found so far are still searched
+            target, signatures = self._signature_target(buffer, lowered)
+            for index, (doc_type, signature) in enumerate(signatures[:best_type]):
+                if signature.search(target):
+                    best_type = index
+                    break
+            
+            # Metadata: the first match of each field, for every type that can still win
+            for doc_type in order[:best_type + 1]:
+                for key, pattern in self._metadata_patterns.get(doc_type, []):
+                    field = (doc_type, key)
+                    if field in metadata:
+                        continue
+                    match = pattern.search(buffer, max(metadata_from.get(field, 0), offset) - offset)
+                    if match and match.start() + offset < safe_end:
+                        metadata[field] = match.group(1).strip()
+                    else:
+                        metadata_from[field] = safe_end
+            
+            # References and risks starting in [committed, safe_end), merged in position order
+            target, compiled = (buffer, self._reference_scans_ignorecase + self._risk_scans_ignorecase) if lowered is None else (
+                lowered, self._reference_scans + self._risk_scans
+            )
+            window = merge_by_position(
+                self._window_matches(index, pattern, target, offset, max(next_start[index], committed), safe_end, next_start)
+                for index, (_, pattern) in enumerate(compiled)
+            )
+            for index, match in window:
+                kind, label = scans[index]
+                position = match.start() + offset
+                if kind == "reference":
+                    reference_counts[label] = reference_counts.get(label, 0) + 1
+                    yield {"event": "reference", "law": label, "reference": buffer[match.start(1):match.end(1)], "position": position}
+                else:
+                    risk_count += 1
+                    context = buffer[max(0, match.start() - RISK_CONTEXT):match.end() + RISK_CONTEXT]
+                    yield {
+                        "event": "risk",
+                        "type": label,
+                        "match": buffer[match.start():match.end()],
+                        "context": context.replace('\n', ' ').strip(),
+                        "position": position,
+                    }
+            
+            # Keep the overlap, and the context before it, for the next window
+            committed = safe_end
+            keep_from = max(offset, committed - RISK_CONTEXT)
+            buffer = buffer[keep_from - offset:]
+            offset = keep_from
+        
+        doc_type = order[best_type] if best_type < len(order) else "unknown"
+        summary_metadata = {"document_type": doc_type}
+        for key, _ in self._metadata_patterns.get(doc_type, []):
+            if (doc_type, key) in metadata:
+                summary_metadata[key] = metadata[(doc_type, key)]
+        yield {
+            "event": "summary",
+            "document_type": doc_type,
+            "metadata": summary_metadata,
+            "relevant_laws": self.get_relevant_laws(doc_type),
+            "reference_counts": reference_counts,
+            "risk_count": risk_count,
+            "characters": offset + len(buffer),
+        }
+    
+    @staticmethod
+    def _window_matches(index, pattern, target, offset, start, stop, next_start):
+        """(index, match) for matches of one pattern starting in [start, stop), recording where the next one may start"""
+        for match in pattern.finditer(target, start - offset):
+            if match.start() + offset >= stop:
+                break
+            next_start[index] = match.end() + offset
+            yield index, match
+    
     def get_relevant_laws(self, doc_type: str) -> List[str]:
         """Return relevant laws based on document type"""
         laws_by_type = {
@@ -152,4 +368,30 @@ class DocumentProcessor:
             ]
         }
         
-        return laws_by_type.get(doc_type, ["Cameroon Civil Code", "Cameroon Penal Code"])
\ No newline at end of file
+        return laws_by_type.get(doc_type, ["Cameroon Civil Code", "Cameroon Penal Code"])
+
+DocumentProcessor.compile_patterns()
+
+
+def iter_file_chunks(file: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE, encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a binary file object into text chunks, reading chunk_size bytes at a time"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    while True:
+        data = file.read(chunk_size)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_mapped_chunks(path: str, chunk_size: int = STREAM_CHUNK_SIZE, encoding: str = "utf-8") -> Iterator[str]:
+    """Decode a file on disk into text chunks through a read-only memory map"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from iter_file_chunks(mapped, chunk_size, encoding)
@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import csv
+import difflib
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from decoding_policy import percentile
+from retrieval import DEFAULT_DATASET_PATH, VARIATION_SUFFIX
+
+# The app module and event loop of this worker process, set by init_worker
+app = None
+loop = None
+
+
+async def no_search(query, max_results=5):
+    """Offline stand-in for duckduckgo_search: no results, as if DuckDuckGo were unreachable"""
+    return []
+
+
+def load_app(args):
+    """Import the app configured for offline evaluation and load the model in this process"""
+    global app
+
+    # Every row must run the full pipeline, offline, one question at a time
+    os.environ.update(
+        HF_HUB_OFFLINE="1",
+        TRANSFORMERS_OFFLINE="1",
+        ANSWER_CACHE_SIZE="0",
+        ANSWER_CACHE_FILE="",
+        SPECULATIVE_SEARCH="0",
+        MODEL_BATCH_WAIT_MS="0",
+    )
+    import app as app_module
+
+    app = app_module
+    app.duckduckgo_search = no_search
+    if args.no_retrieval:
+        app.RETRIEVAL_INDEX = None
+    if not args.no_model:
+        app.load_model()
+    return app
+
+
+def init_worker(threads):
+    global loop
+    loop = asyncio.new_event_loop()
+    if app.MODEL is not None and app.INFERENCE_BACKEND != "onnx":
+        import torch
+
+        torch.set_num_threads(threads)
+
+
+def answer_row(row, question, language):
+    """Answer one dataset question through the same routing as /ask"""
+    start = time.perf_counter()
+    response, route = loop.run_until_complete(app.answer_question(question, language))
+    latency_ms = (time.perf_counter() - start) * 1000
+    return {
+        "row": row,
+        "route": route,
+        "source": response.get("source"),
+        "answer": response.get("answer", ""),
+        "latency_ms": round(latency_ms, 2),
+    }
+
+
+def read_rows(path, limit):
+    """Stream (row number, question, reference answer, category) from the dataset CSV"""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row_number, row in enumerate(csv.DictReader(f)):
+            if limit and row_number >= limit:
+                break
+            question = VARIATION_SUFFIX.sub("", row.get("question") or "").strip()
+            if question:
+                yield row_number, question, (row.get("answer") or "").strip(), (row.get("category") or "").strip() or "(none)"
+
+
+def answer_similarity(answer, reference):
+    """Word-level similarity of an answer to the reference, ignoring markdown headings"""
+    body = " ".join(line for line in answer.splitlines() if not line.lstrip().startswith("#"))
+    return difflib.SequenceMatcher(None, body.lower().split(), reference.lower().split()).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the dataset through the answering pipeline offline and score the answers")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    parser.add_argument("--output", default="evaluation.jsonl", help="Per-row results, one JSON object per line")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--limit", type=int, default=0, help="Only evaluate the first N rows")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--no-retrieval", action="store_true", help="Skip the curated dataset answers, which would otherwise match most rows")
+    parser.add_argument("--no-model", action="store_true", help="Evaluate routing only, without loading the model")
+    args = parser.parse_args()
+
+    # Load once here; forked workers share the weights copy-on-write, as with gunicorn preload
+    load_app(args)
+    if not args.no_model and app.MODEL is None:
+        print(f"Model not loaded ({app.MODEL_LOAD_ERROR}); questions needing it get the fallback routes")
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+
+    latencies = []
+    routes = Counter()
+    similarity = defaultdict(list)
+    references = {}
+    start = time.perf_counter()
+
+    with open(args.output, "w", encoding="utf-8") as out, ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=init_worker,
+        initargs=(threads,),
+    ) as pool:
+        rows = read_rows(args.dataset, args.limit)
+        pending = set()
+        exhausted = False
+
+        while pending or not exhausted:
+            # Keep a couple of rows queued per worker without reading the whole file
+            while not exhausted and len(pending) < args.workers * 2:
+                row = next(rows, None)
+                if row is None:
+                    exhausted = True
+                    break
+                row_number, question, reference, category = row
+                references[row_number] = (question, reference, category)
+                pending.add(pool.submit(answer_row, row_number, question, args.language))
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                question, reference, category = references.pop(result["row"])
+                score = answer_similarity(result["answer"], reference)
+                similarity[category].append(score)
+                latencies.append(result["latency_ms"])
+                routes[result["route"]] += 1
+                out.write(json.dumps({
+                    "row": result["row"],
+                    "question": question,
+                    "category": category,
+                    "route": result["route"],
+                    "source": result["source"],
+                    "latency_ms": result["latency_ms"],
+                    "similarity": round(score, 4),
+                    "answer": result["answer"],
+                    "reference": reference,
+                }, ensure_ascii=False) + "\n")
+
+    elapsed = time.perf_counter() - start
+    if not latencies:
+        print("No rows evaluated")
+        return
+
+    print(f"{len(latencies)} rows in {elapsed:.1f}s with {args.workers} workers: {len(latencies) / elapsed:.1f} rows/s")
+    print(
+        f"Latency p50 {percentile(latencies, 50):.1f} ms   p95 {percentile(latencies, 95):.1f} ms   "
+        f"p99 {percentile(latencies, 99):.1f} ms"
+    )
+    print("Routes: " + ", ".join(f"{route} {count}" for route, count in routes.most_common()))
+    print(f"\n{'category':<32} {'rows':>6} {'similarity':>10}")
+    for category, scores in sorted(similarity.items()):
+        print(f"{category[:32]:<32} {len(scores):>6} {statistics.mean(scores):>10.3f}")
+    overall = [score for scores in similarity.values() for score in scores]
+    print(f"{'all':<32} {len(overall):>6} {statistics.mean(overall):>10.3f}")
+    print(f"\nPer-row results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
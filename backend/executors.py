@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """Raised when a bounded pool has no free worker or queue slot"""
+
+    def __init__(self, pool_name: str, retry_after: int):
+        super().__init__(f"Pool '{pool_name}' is at capacity")
+        self.pool_name = pool_name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """Thread pool that rejects new work instead of queueing without limit
+
+    At most `max_workers` tasks run at once and at most `max_queue` more may
+    wait for a worker. Submitting beyond that raises PoolSaturatedError right
+    away so the caller can shed load instead of hanging.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, retry_after: int = 1):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-pool")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+        logger.info(f"Pool '{name}' configured: workers={self.max_workers}, queue_limit={self.max_queue}")
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Submit work to the pool or raise PoolSaturatedError if it is full"""
+        if not self._slots.acquire(blocking=False):
+            logger.warning(f"Pool '{self.name}' saturated, rejecting request")
+            raise PoolSaturatedError(self.name, self.retry_after)
+
+        with self._pending_lock:
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def reserve(self):
+        """Take a slot for work that waits elsewhere, or raise PoolSaturatedError if the pool is full
+
+        Returns a function that gives the slot back; calling it again does nothing.
+        """
+        if not self._slots.acquire(blocking=False):
+            logger.warning(f"Pool '{self.name}' saturated, rejecting request")
+            raise PoolSaturatedError(self.name, self.retry_after)
+
+        with self._pending_lock:
+            self._pending += 1
+
+        held = threading.Lock()
+        held.acquire()
+
+        def release():
+            # Only the first call finds the lock held
+            try:
+                held.release()
+            except RuntimeError:
+                return
+            self._release()
+
+        return release
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking function on the pool and await its result"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def in_flight(self) -> int:
+        """Number of tasks currently running or waiting in this pool"""
+        return self._pending
+
+    def _release(self):
+        with self._pending_lock:
+            self._pending -= 1
+        self._slots.release()
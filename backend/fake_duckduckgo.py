@@ -0,0 +1,254 @@
+import argparse
+import asyncio
+import html
+import os
+import random
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse
+
+from decoding_policy import percentile
+from search_client import DEFAULT_DUCKDUCKGO_URL, SEARCH_HEADERS, SearchClient, SearchPoolTimeout
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "duckduckgo")
+
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    """Read every recorded result page, keyed by file name without extension"""
+    fixtures = {}
+    for name in sorted(os.listdir(fixtures_dir)):
+        if name.endswith(".html"):
+            with open(os.path.join(fixtures_dir, name), encoding="utf-8") as f:
+                fixtures[name[:-len(".html")]] = f.read()
+    return fixtures
+
+
+def choose_fixture(query, fixtures):
+    """Pick the page whose name appears in the query, or the default page"""
+    query = query.lower()
+    for name in fixtures:
+        if name != "default" and name in query:
+            return fixtures[name]
+    return fixtures["default"]
+
+
+def create_app(fixtures, delay_ms=0.0, jitter_ms=0.0):
+    """Stand-in for html.duckduckgo.com that answers from recorded pages after a simulated delay"""
+    app = FastAPI(title="Fake DuckDuckGo")
+    state = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "connections": set()}
+
+    async def search(request: Request, q: str = ""):
+        state["requests"] += 1
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        if request.client:
+            state["connections"].add((request.client.host, request.client.port))
+        try:
+            delay = delay_ms + random.uniform(-jitter_ms, jitter_ms)
+            if delay > 0:
+                await asyncio.sleep(delay / 1000)
+            return HTMLResponse(choose_fixture(q, fixtures).replace("{query}", html.escape(q)))
+        finally:
+            state["in_flight"] -= 1
+
+    app.add_api_route("/html/", search, methods=["GET", "POST"])
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "requests": state["requests"],
+            "in_flight": state["in_flight"],
+            "max_in_flight": state["max_in_flight"],
+            "connections": len(state["connections"]),
+        }
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        state.update(requests=0, max_in_flight=0, connections=set())
+        return {"status": "reset"}
+
+    return app
+
+
+def start_in_thread(app, port):
+    """Run the fake server on a background thread and wait until it accepts connections"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def run_searches(url, searches, concurrency, max_connections, pooled):
+    """Fire `searches` queries with `concurrency` callers; return latencies in ms and client stats"""
+    queries = [f"{topic} question {i} Cameroon law legal" for i, topic in
+               zip(range(searches), ["land", "labour", "marriage", "noresults"] * searches)]
+    client = SearchClient(url, max_connections=max_connections)
+    callers = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(query):
+        async with callers:
+            start = time.perf_counter()
+            if pooled:
+                try:
+                    await client.fetch(query)
+                except SearchPoolTimeout:
+                    pass
+            else:
+                # Baseline: a fresh client, and so a fresh connection, per search
+                async with httpx.AsyncClient(headers=SEARCH_HEADERS, timeout=client.timeout) as fresh:
+                    await fresh.get(url, params={"q": query})
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(query) for query in queries))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return latencies, elapsed, client.stats()
+
+
+def bench(args):
+    app = create_app(load_fixtures(args.fixtures), args.delay_ms, args.jitter_ms)
+    server, thread = start_in_thread(app, args.port)
+    url = f"http://127.0.0.1:{args.port}/html/"
+    print(
+        f"{args.searches} searches, {args.concurrency} concurrent callers, "
+        f"max {args.max_connections} connections, server delay {args.delay_ms} ± {args.jitter_ms} ms"
+    )
+    try:
+        for pooled in (False, True):
+            httpx.post(f"http://127.0.0.1:{args.port}/stats/reset")
+            latencies, elapsed, client_stats = asyncio.run(
+                run_searches(url, args.searches, args.concurrency, args.max_connections, pooled)
+            )
+            server_stats = httpx.get(f"http://127.0.0.1:{args.port}/stats").json()
+            print(
+                f"{'pooled' if pooled else 'fresh':<7} p50 {statistics.median(latencies):7.1f} ms   "
+                f"p95 {percentile(latencies, 95):7.1f} ms   p99 {percentile(latencies, 99):7.1f} ms   "
+                f"{args.searches / elapsed:7.1f} searches/s   connections {server_stats['connections']:4d}   "
+                f"max in flight {server_stats['max_in_flight']:3d}   "
+                f"timeouts {client_stats['timeouts'] + client_stats['pool_timeouts'] if pooled else '-'}"
+            )
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+async def run_pool_timeout_check(app, url):
+    """Exhaust a one-connection search client and check the search cache is left alone"""
+    from search_cache import SearchCache
+
+    app.SEARCH_CLIENT = SearchClient(url, max_connections=1, pool_timeout=0.05)
+    # fresh_ttl=0 makes every stored result stale at once, so it gets refreshed
+    app.SEARCH_CACHE = SearchCache(fresh_ttl=0.0, stale_ttl=3600.0, negative_ttl=60.0)
+    failures = []
+
+    stale_key = app.SEARCH_CACHE.make_key("stale question Cameroon law legal", 5)
+    app.SEARCH_CACHE.put(stale_key, [{"title": "old", "link": "https://example.org", "snippet": "old"}])
+    before = app.SEARCH_CACHE._entries[stale_key]
+
+    # Hold the only connection while the refresh and a new search try to get one
+    holder = asyncio.create_task(app.SEARCH_CLIENT.fetch("holder"))
+    await asyncio.sleep(0.05)
+    if not app.SEARCH_CACHE.begin_refresh(stale_key):
+        failures.append("could not claim the refresh")
+    await app.refresh_search_results(stale_key, "stale question Cameroon law legal", 5)
+    results = await app.duckduckgo_search("new question")
+    await holder
+
+    stats = app.SEARCH_CACHE.stats()
+    if app.SEARCH_CLIENT.pool_timeouts != 2:
+        failures.append(f"expected 2 pool timeouts, got {app.SEARCH_CLIENT.pool_timeouts}")
+    if app.SEARCH_CACHE._entries.get(stale_key) != before:
+        failures.append("refresh changed the stale entry's expiry")
+    if stats["failed_refreshes"] != 0:
+        failures.append(f"refresh counted as failed ({stats['failed_refreshes']})")
+    if not app.SEARCH_CACHE.begin_refresh(stale_key):
+        failures.append("refresh claim was not released")
+    new_key = app.SEARCH_CACHE.make_key("new question Cameroon law legal", 5)
+    if results or new_key in app.SEARCH_CACHE._entries:
+        failures.append("pool timeout on a new search was cached")
+
+    await app.SEARCH_CLIENT.aclose()
+    return failures
+
+
+def check_pool_timeout(args):
+    """Fail unless a search that finds no free connection leaves the search cache unchanged"""
+    import logging
+
+    import app as api
+
+    logging.getLogger(api.__name__).setLevel(logging.ERROR)
+    fake = create_app(load_fixtures(args.fixtures), delay_ms=300.0)
+    server, thread = start_in_thread(fake, args.port)
+    try:
+        failures = asyncio.run(run_pool_timeout_check(api, f"http://127.0.0.1:{args.port}/html/"))
+    finally:
+        server.should_exit = True
+        thread.join()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        raise SystemExit(f"{len(failures)} pool timeout check(s) failed")
+    print("Pool timeouts leave the search cache unchanged")
+
+
+def record(args):
+    """Save the live result page for a query as a fixture (needs network access)"""
+    response = httpx.get(DEFAULT_DUCKDUCKGO_URL, params={"q": args.query}, headers=SEARCH_HEADERS, timeout=10, follow_redirects=True)
+    response.raise_for_status()
+    path = os.path.join(args.fixtures, f"{args.name}.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(response.text)
+    print(f"Saved {len(response.text)} bytes to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for DuckDuckGo's HTML search, serving recorded pages")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Serve recorded pages; point DUCKDUCKGO_URL at http://HOST:PORT/html/")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8900)
+    serve_parser.add_argument("--delay-ms", type=float, default=150.0, help="Simulated response time")
+    serve_parser.add_argument("--jitter-ms", type=float, default=50.0)
+
+    bench_parser = subparsers.add_parser("bench", help="Measure search latency through the pooled client against the fake server")
+    bench_parser.add_argument("--port", type=int, default=8900)
+    bench_parser.add_argument("--searches", type=int, default=200)
+    bench_parser.add_argument("--concurrency", type=int, default=32)
+    bench_parser.add_argument("--max-connections", type=int, default=8)
+    bench_parser.add_argument("--delay-ms", type=float, default=150.0)
+    bench_parser.add_argument("--jitter-ms", type=float, default=50.0)
+
+    check_parser = subparsers.add_parser("check-pool-timeout", help="Check that local pool timeouts are not cached as failed searches")
+    check_parser.add_argument("--port", type=int, default=8901)
+
+    record_parser = subparsers.add_parser("record", help="Record a live DuckDuckGo page as a new fixture")
+    record_parser.add_argument("query")
+    record_parser.add_argument("--name", required=True, help="Fixture name; queries containing it are answered with this page")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        app = create_app(load_fixtures(args.fixtures), args.delay_ms, args.jitter_ms)
+        uvicorn.run(app, host=args.host, port=args.port)
+    elif args.command == "bench":
+        bench(args)
+    elif args.command == "check-pool-timeout":
+        check_pool_timeout(args)
+    else:
+        record(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Multi-worker serving with one shared copy of the model weights
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The app is imported and the model loaded once in the gunicorn master, then
+the workers are forked from it. The weight tensors are never written after
+loading, so the workers keep sharing the master's pages copy-on-write instead
+of each holding and loading a private copy.
+"""
+import gc
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:7860")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn_worker.UvicornWorker"
+# PRELOAD_APP=0 makes every worker import the app and load its own copy (for comparison)
+preload_app = os.environ.get("PRELOAD_APP", "1") == "1"
+# A worker is restarted when it has not checked in for this long while handling
+# requests. The longest request step is generate: a full batch of 8 questions at
+# 4 beams and 256 tokens takes about 30 s on one CPU thread, and it competes with
+# the event loop for that CPU, so allow twice that. Model loading does not count,
+# it runs in the master (or a background thread with PRELOAD_APP=0).
+timeout = int(os.environ.get("WORKER_TIMEOUT", "60"))
+# Each worker starts its own document batch pool; share the CPUs between them
+os.environ.setdefault("DOCUMENT_BATCH_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+
+def when_ready(server):
+    """Load the model in the master before any worker is forked"""
+    if not server.cfg.preload_app:
+        # Each worker loads its own copy at startup instead
+        return
+
+    import app
+
+    app.load_model()
+    # Move everything allocated so far out of the garbage collector's reach, so
+    # collections in the workers do not write to (and so copy) the shared pages
+    gc.freeze()
+    server.log.info(f"Model loaded in master, forking {server.cfg.workers} workers")
+
+
+def post_fork(server, worker):
+    """Split the CPU threads between workers instead of each using them all"""
+    import torch
+
+    threads = int(os.environ.get("TORCH_THREADS", "0")) or max(1, (os.cpu_count() or 1) // server.cfg.workers)
+    torch.set_num_threads(threads)
+    server.log.info(f"Worker {worker.pid} using {threads} torch threads")
@@ -0,0 +1,90 @@
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Sequence, Set
+
+
+def trie_pattern(terms: Iterable[str]) -> str:
+    """Regex alternation of the terms, factored into a trie so shared prefixes are tested once
+
+    Optional suffixes are greedy, so at any position the pattern matches the
+    longest term that starts there.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatches:
+    """The terms found in one text, and the categories they belong to"""
+
+    def __init__(self, text: str, terms: Set[str], matcher: "KeywordMatcher"):
+        self.text = text
+        self.terms = terms
+        self.matcher = matcher
+        self.categories = set()
+        for term in terms:
+            self.categories |= matcher.term_categories[term]
+
+    def has(self, category: str) -> bool:
+        """Whether any term of the category occurs in the text"""
+        return category in self.categories
+
+    def contains(self, term: str) -> bool:
+        return term in self.terms
+
+    def first(self, terms: Sequence[str]) -> Optional[str]:
+        """The first of `terms`, in the given order, that occurs in the text"""
+        for term in terms:
+            if term in self.terms:
+                return term
+        return None
+
+
+class KeywordMatcher:
+    """Find all terms of several named term lists in a single scan of a text
+
+    All terms are compiled into one trie-shaped alternation that matches the
+    longest term starting at a position. The shorter terms contained in that
+    match (a prefix such as "kill" in "killing", or "africa" inside "south
+    africa") are added from a table computed at construction, and the next
+    search starts one character after the match, so overlapping terms are
+    found too. The result is the same set of terms separate `term in text`
+    checks would find.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.categories = {name: tuple(terms) for name, terms in categories.items()}
+        self.term_categories: Dict[str, Set[str]] = defaultdict(set)
+        for name, terms in self.categories.items():
+            for term in terms:
+                if term:
+                    self.term_categories[term].add(name)
+
+        terms = sorted(self.term_categories, key=len, reverse=True)
+        self.pattern = re.compile(trie_pattern(terms))
+
+        # For each term, every term occurring inside it, itself included
+        self.contained = {term: frozenset(other for other in terms if other in term) for term in terms}
+
+    def scan(self, text: str) -> KeywordMatches:
+        """Find every term in `text`, which should already be lowercased"""
+        found = set()
+        search = self.pattern.search
+        match = search(text)
+        while match is not None:
+            found |= self.contained[match.group()]
+            # Terms may overlap, so look again from the next character rather than after the match
+            match = search(text, match.start() + 1)
+        return KeywordMatches(text, found, self)
@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+QUESTIONS = [
+    "What are the duties of a company director?",
+    "How is a customary marriage registered?",
+    "What does the labour code say about overtime?",
+    "Who can appeal a decision of the lower court?",
+]
+
+
+def memory_kb(pid):
+    """Rss, Pss and Uss (private clean + private dirty) of one process, in kB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def child_pids(pid):
+    """Direct children of a process, found by scanning /proc"""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, so split after its closing parenthesis
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def get(url, timeout=5):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def ask(base_url, question):
+    request = urllib.request.Request(
+        f"{base_url}/ask",
+        data=json.dumps({"question": question, "language": "en"}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        response.read()
+
+
+def wait_until_ready(base_url, workers, timeout):
+    """Wait until every worker reports ready
+
+    Requests land on whichever worker accepts first, so several consecutive
+    ready answers per worker are required.
+    """
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        streak = streak + 1 if get(f"{base_url}/readyz") == 200 else 0
+        if streak >= 4 * workers:
+            return True
+        time.sleep(0.1 if streak else 0.5)
+    return False
+
+
+def measure(workers, preload, port, requests, timeout):
+    """Start gunicorn with `workers` workers, exercise the model and report memory"""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}", PRELOAD_APP="1" if preload else "0")
+    command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.monotonic()
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_until_ready(base_url, workers, timeout):
+            raise SystemExit(f"Workers did not become ready within {timeout}s")
+        ready_s = time.monotonic() - start
+
+        for i in range(requests * workers):
+            ask(base_url, QUESTIONS[i % len(QUESTIONS)] + f" ({i})")
+        time.sleep(1)
+
+        master = memory_kb(server.pid)
+        per_worker = [memory_kb(pid) for pid in child_pids(server.pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+    total_pss = master["pss"] + sum(m["pss"] for m in per_worker)
+    count = len(per_worker)
+    return {
+        "workers": count,
+        "ready_s": ready_s,
+        "rss": sum(m["rss"] for m in per_worker) / count,
+        "pss": sum(m["pss"] for m in per_worker) / count,
+        "uss": sum(m["uss"] for m in per_worker) / count,
+        "total_pss": total_pss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report per-worker memory of gunicorn with the model preloaded in the master vs. loaded in every worker"
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=4, help="/ask requests per worker before measuring")
+    parser.add_argument("--port", type=int, default=7861)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--mode", choices=["preload", "per-worker", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["preload", "per-worker"] if args.mode == "both" else [args.mode]
+    print(f"{'mode':<11} {'workers':>7} {'ready s':>8} {'RSS/worker':>11} {'PSS/worker':>11} {'USS/worker':>11} {'total PSS':>10}")
+    for mode in modes:
+        for workers in args.workers:
+            result = measure(workers, mode == "preload", args.port, args.requests, args.timeout)
+            print(
+                f"{mode:<11} {result['workers']:>7} {result['ready_s']:>8.1f} "
+                f"{result['rss'] / 1024:>8.1f} MB {result['pss'] / 1024:>8.1f} MB "
+                f"{result['uss'] / 1024:>8.1f} MB {result['total_pss'] / 1024:>7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
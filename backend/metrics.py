@@ -0,0 +1,173 @@
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+# Seconds; covers keyword routing (sub-millisecond) up to slow generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """A named metric with a fixed list of label names, rendered in Prometheus text format"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels)
+            lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text else f"{name} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    """Monotonic count per label combination"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name, tuple(zip(self.labelnames, labels)), value
+
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count of observations per label combination"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, *labels) -> "Timer":
+        """Context manager observing the seconds spent inside it"""
+        return Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, ([*state[0]], state[1], state[2])) for labels, state in self._values.items())
+        for labels, (counts, total, count) in values:
+            base = tuple(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", base + (("le", _format_value(bound) if bound == math.inf else repr(float(bound))),), cumulative
+            yield f"{self.name}_sum", base, total
+            yield f"{self.name}_count", base, count
+
+
+class Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class CallbackMetric(Metric):
+    """Gauge or counter whose value is read from a function when metrics are scraped
+
+    The function returns a number, or a dict mapping label value tuples to
+    numbers. Nothing is recorded on the hot path.
+    """
+
+    def __init__(self, name: str, documentation: str, fn: Callable[[], Union[float, Dict[tuple, float]]],
+                 labelnames: Sequence[str] = (), metric_type: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+        self.type = metric_type
+
+    def samples(self):
+        value = self.fn()
+        if isinstance(value, dict):
+            for labels, number in sorted(value.items()):
+                yield self.name, tuple(zip(self.labelnames, labels)), number
+        else:
+            yield self.name, (), value
+
+
+class Registry:
+    """The metrics served by /metrics, in registration order"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, fn, labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, fn, labelnames, "gauge"))
+
+    def counter_callback(self, name: str, documentation: str, fn, labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, fn, labelnames, "counter"))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One broken callback must not take down the whole scrape
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return "\n".join(lines) + "\n"
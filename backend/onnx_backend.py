@@ -0,0 +1,563 @@
+import argparse
+import inspect
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import torch
+from torch import nn
+
+logger = logging.getLogger(__name__)
+
+ENCODER_FILE = "encoder.onnx"
+DECODER_FILE = "decoder_with_past.onnx"
+CONFIG_FILE = "onnx_config.json"
+# Written by `check`; the API only serves an export whose every tier passed
+PARITY_FILE = "parity.json"
+
+# Beam search may pick a different hypothesis on near-ties in float arithmetic,
+# so beam tiers must agree on this fraction of questions rather than all of them
+DEFAULT_MIN_BEAM_PARITY = 0.9
+
+
+# ----- EXPORT -----
+
+class EncoderWithCrossCache(nn.Module):
+    """T5 encoder that also projects the cross-attention keys/values for every decoder layer
+
+    Cross-attention keys and values depend only on the encoder output, so they
+    are computed once here instead of on every decoding step.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.encoder = model.get_encoder()
+        self.decoder_blocks = model.decoder.block
+        self.num_heads = model.config.num_heads
+        self.d_kv = model.config.d_kv
+
+    def _split_heads(self, states):
+        batch, length, _ = states.shape
+        return states.view(batch, length, self.num_heads, self.d_kv).transpose(1, 2)
+
+    def forward(self, input_ids, attention_mask):
+        hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        cross = []
+        for block in self.decoder_blocks:
+            attention = block.layer[1].EncDecAttention
+            cross.append(self._split_heads(attention.k(hidden)))
+            cross.append(self._split_heads(attention.v(hidden)))
+        return (hidden, *cross)
+
+
+class DecoderStepWithPast(nn.Module):
+    """One T5 decoding step with explicit self- and cross-attention key/value tensors
+
+    Inputs are the newest token, the encoder attention mask, then for each
+    layer the past self-attention key and value (length T, which may be 0)
+    followed by that layer's cross-attention key and value. Outputs are the
+    next-token logits and the self-attention key/value for length T + 1.
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        config = model.config
+        self.embed_tokens = model.decoder.embed_tokens
+        self.blocks = model.decoder.block
+        self.final_layer_norm = model.decoder.final_layer_norm
+        self.lm_head = model.lm_head
+        self.num_layers = config.num_decoder_layers
+        self.num_heads = config.num_heads
+        self.d_kv = config.d_kv
+        self.num_buckets = config.relative_attention_num_buckets
+        self.max_distance = config.relative_attention_max_distance
+        self.scale_output = getattr(config, "scale_decoder_outputs", config.tie_word_embeddings)
+        self.output_scale = config.d_model ** -0.5
+        self.relative_attention_bias = self.blocks[0].layer[0].SelfAttention.relative_attention_bias
+        self.relative_position_bucket = type(self.blocks[0].layer[0].SelfAttention)._relative_position_bucket
+
+    def _split_heads(self, states):
+        batch, length, _ = states.shape
+        return states.view(batch, length, self.num_heads, self.d_kv).transpose(1, 2)
+
+    def _merge_heads(self, states):
+        batch, _, length, _ = states.shape
+        return states.transpose(1, 2).reshape(batch, length, self.num_heads * self.d_kv)
+
+    def _position_bias(self, past_length):
+        # The new token sits at position `past_length` and attends to positions 0..past_length
+        memory_position = torch.arange(past_length + 1, dtype=torch.long)
+        relative_position = memory_position - past_length
+        buckets = self.relative_position_bucket(
+            relative_position, bidirectional=False, num_buckets=self.num_buckets, max_distance=self.max_distance
+        )
+        return self.relative_attention_bias(buckets).transpose(0, 1)[None, :, None, :]
+
+    @staticmethod
+    def _attend(query, key, value, bias):
+        # T5 does not scale attention scores by 1/sqrt(d_kv)
+        scores = torch.matmul(query, key.transpose(-1, -2)) + bias
+        weights = torch.softmax(scores.float(), dim=-1).type_as(scores)
+        return torch.matmul(weights, value)
+
+    def forward(self, decoder_input_ids, encoder_attention_mask, *cache):
+        hidden = self.embed_tokens(decoder_input_ids)
+        past_length = cache[0].shape[2]
+        self_bias = self._position_bias(past_length)
+        cross_bias = (1.0 - encoder_attention_mask[:, None, None, :].to(hidden.dtype)) * torch.finfo(hidden.dtype).min
+
+        presents = []
+        for i, block in enumerate(self.blocks):
+            past_key, past_value, cross_key, cross_value = cache[4 * i:4 * i + 4]
+
+            layer = block.layer[0]
+            normed = layer.layer_norm(hidden)
+            attention = layer.SelfAttention
+            key = torch.cat([past_key, self._split_heads(attention.k(normed))], dim=2)
+            value = torch.cat([past_value, self._split_heads(attention.v(normed))], dim=2)
+            context = self._attend(self._split_heads(attention.q(normed)), key, value, self_bias)
+            hidden = hidden + attention.o(self._merge_heads(context))
+            presents.extend([key, value])
+
+            layer = block.layer[1]
+            attention = layer.EncDecAttention
+            query = self._split_heads(attention.q(layer.layer_norm(hidden)))
+            context = self._attend(query, cross_key, cross_value, cross_bias)
+            hidden = hidden + attention.o(self._merge_heads(context))
+
+            layer = block.layer[2]
+            hidden = hidden + layer.DenseReluDense(layer.layer_norm(hidden))
+
+        hidden = self.final_layer_norm(hidden)
+        if self.scale_output:
+            hidden = hidden * self.output_scale
+        logits = self.lm_head(hidden)[:, -1, :]
+        return (logits, *presents)
+
+
+def export_model(model_dir, output_dir, opset=17):
+    """Export a T5 checkpoint as an encoder graph and a past-key-value decoder graph"""
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_dir).eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    config = model.config
+    num_layers = config.num_decoder_layers
+    os.makedirs(output_dir, exist_ok=True)
+    # A parity result belongs to the graphs it was measured on
+    if os.path.exists(os.path.join(output_dir, PARITY_FILE)):
+        os.remove(os.path.join(output_dir, PARITY_FILE))
+
+    input_ids = torch.tensor([[100, 200, 300, 1], [100, 200, 1, 0]], dtype=torch.long)
+    attention_mask = (input_ids != config.pad_token_id).long()
+    attention_mask[:, 0] = 1
+
+    cross_names = [f"cross_{kind}_{i}" for i in range(num_layers) for kind in ("key", "value")]
+    # torch >= 2.5 needs dynamo=False for the TorchScript exporter; older versions only have that one
+    export_options = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            EncoderWithCrossCache(model),
+            (input_ids, attention_mask),
+            os.path.join(output_dir, ENCODER_FILE),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["encoder_hidden_states", *cross_names],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "encoder_length"},
+                "attention_mask": {0: "batch", 1: "encoder_length"},
+                "encoder_hidden_states": {0: "batch", 1: "encoder_length"},
+                **{name: {0: "batch", 2: "encoder_length"} for name in cross_names},
+            },
+            opset_version=opset,
+            **export_options,
+        )
+
+        encoder_outputs = EncoderWithCrossCache(model)(input_ids, attention_mask)
+        cross = encoder_outputs[1:]
+        past_length = 3
+        batch = input_ids.shape[0]
+        cache, cache_names, present_names = [], [], []
+        for i in range(num_layers):
+            for kind in ("key", "value"):
+                cache.append(torch.zeros(batch, config.num_heads, past_length, config.d_kv))
+                cache_names.append(f"past_{kind}_{i}")
+                present_names.append(f"present_{kind}_{i}")
+            cache.extend(cross[2 * i:2 * i + 2])
+            cache_names.extend([f"cross_key_{i}", f"cross_value_{i}"])
+
+        torch.onnx.export(
+            DecoderStepWithPast(model),
+            (torch.tensor([[0], [0]], dtype=torch.long), attention_mask, *cache),
+            os.path.join(output_dir, DECODER_FILE),
+            input_names=["decoder_input_ids", "encoder_attention_mask", *cache_names],
+            output_names=["logits", *present_names],
+            dynamic_axes={
+                "decoder_input_ids": {0: "batch"},
+                "encoder_attention_mask": {0: "batch", 1: "encoder_length"},
+                **{name: {0: "batch", 2: "past_length"} for name in cache_names if name.startswith("past_")},
+                **{name: {0: "batch", 2: "encoder_length"} for name in cache_names if name.startswith("cross_")},
+                "logits": {0: "batch"},
+                **{name: {0: "batch", 2: "present_length"} for name in present_names},
+            },
+            opset_version=opset,
+            **export_options,
+        )
+
+    with open(os.path.join(output_dir, CONFIG_FILE), "w") as f:
+        json.dump({
+            "num_layers": num_layers,
+            "num_heads": config.num_heads,
+            "d_kv": config.d_kv,
+            "decoder_start_token_id": config.decoder_start_token_id,
+            "eos_token_id": config.eos_token_id,
+            "pad_token_id": config.pad_token_id,
+        }, f, indent=2)
+    tokenizer.save_pretrained(output_dir)
+
+
+# ----- RUNTIME -----
+
+def log_softmax(logits):
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    return shifted - np.log(np.exp(shifted).sum(axis=-1, keepdims=True))
+
+
+def ban_repeated_ngrams(log_probs, sequences, ngram_size):
+    """Mask tokens that would repeat an n-gram already present in each sequence"""
+    if ngram_size <= 0 or sequences.shape[1] + 1 < ngram_size:
+        return log_probs
+    for row, sequence in enumerate(sequences.tolist()):
+        prefix = sequence[len(sequence) - ngram_size + 1:]
+        for i in range(len(sequence) - ngram_size + 1):
+            if sequence[i:i + ngram_size - 1] == prefix:
+                log_probs[row, sequence[i + ngram_size - 1]] = -np.inf
+    return log_probs
+
+
+class OnnxSeq2SeqModel:
+    """Run an exported T5 model on ONNX Runtime with a `generate` compatible with app.py
+
+    Supports greedy decoding, sampling and beam search with
+    no_repeat_ngram_size, returning a LongTensor of token ids like the
+    PyTorch model does, so generate_answers and generate_streaming work unchanged.
+    Beam search always stops early, so it needs early_stopping=True.
+    """
+
+    def __init__(self, onnx_dir, threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        providers = ["CPUExecutionProvider"]
+        self.encoder = ort.InferenceSession(os.path.join(onnx_dir, ENCODER_FILE), options, providers=providers)
+        self.decoder = ort.InferenceSession(os.path.join(onnx_dir, DECODER_FILE), options, providers=providers)
+        with open(os.path.join(onnx_dir, CONFIG_FILE)) as f:
+            self.config = json.load(f)
+
+        self.num_layers = self.config["num_layers"]
+        self.device = torch.device("cpu")
+        self.present_names = [output.name for output in self.decoder.get_outputs()[1:]]
+
+    def eval(self):
+        return self
+
+    def _encode(self, input_ids, attention_mask):
+        outputs = self.encoder.run(None, {"input_ids": input_ids, "attention_mask": attention_mask})
+        return outputs[1:]
+
+    def _decode_step(self, tokens, attention_mask, past, cross):
+        feeds = {"decoder_input_ids": tokens, "encoder_attention_mask": attention_mask}
+        for i in range(self.num_layers):
+            feeds[f"past_key_{i}"] = past[2 * i]
+            feeds[f"past_value_{i}"] = past[2 * i + 1]
+            feeds[f"cross_key_{i}"] = cross[2 * i]
+            feeds[f"cross_value_{i}"] = cross[2 * i + 1]
+        logits, *present = self.decoder.run(None, feeds)
+        return logits, present
+
+    def _empty_past(self, batch):
+        heads, d_kv = self.config["num_heads"], self.config["d_kv"]
+        return [np.zeros((batch, heads, 0, d_kv), dtype=np.float32) for _ in range(2 * self.num_layers)]
+
+    def generate(
+        self,
+        input_ids,
+        attention_mask=None,
+        max_length=20,
+        num_beams=1,
+        do_sample=False,
+        early_stopping=False,
+        no_repeat_ngram_size=0,
+        length_penalty=1.0,
+        streamer=None,
+        stopping_criteria=None,
+        **kwargs,
+    ):
+        if num_beams > 1 and early_stopping is not True:
+            raise ValueError(f"ONNX beam search only supports early_stopping=True, got {early_stopping!r}")
+
+        input_ids = np.asarray(input_ids.cpu() if torch.is_tensor(input_ids) else input_ids, dtype=np.int64)
+        if attention_mask is None:
+            attention_mask = (input_ids != self.config["pad_token_id"]).astype(np.int64)
+        else:
+            attention_mask = np.asarray(attention_mask.cpu() if torch.is_tensor(attention_mask) else attention_mask, dtype=np.int64)
+
+        if num_beams > 1:
+            sequences = self._beam_search(input_ids, attention_mask, max_length, num_beams, no_repeat_ngram_size, length_penalty)
+        else:
+            sequences = self._greedy(input_ids, attention_mask, max_length, do_sample, no_repeat_ngram_size, streamer, stopping_criteria)
+        return torch.from_numpy(sequences)
+
+    def _greedy(self, input_ids, attention_mask, max_length, do_sample, ngram_size, streamer, stopping_criteria):
+        batch = input_ids.shape[0]
+        cross = self._encode(input_ids, attention_mask)
+        past = self._empty_past(batch)
+        sequences = np.full((batch, 1), self.config["decoder_start_token_id"], dtype=np.int64)
+        finished = np.zeros(batch, dtype=bool)
+        if streamer is not None:
+            streamer.put(torch.from_numpy(sequences))
+
+        for _ in range(max_length - 1):
+            logits, past = self._decode_step(sequences[:, -1:], attention_mask, past, cross)
+            log_probs = ban_repeated_ngrams(log_softmax(logits), sequences, ngram_size)
+
+            if do_sample:
+                probs = np.exp(log_probs)
+                probs /= probs.sum(axis=-1, keepdims=True)
+                next_tokens = np.array([np.random.choice(len(p), p=p) for p in probs], dtype=np.int64)
+            else:
+                next_tokens = log_probs.argmax(axis=-1)
+
+            next_tokens = np.where(finished, self.config["pad_token_id"], next_tokens)
+            sequences = np.concatenate([sequences, next_tokens[:, None]], axis=1)
+            finished |= next_tokens == self.config["eos_token_id"]
+            if streamer is not None:
+                streamer.put(torch.from_numpy(next_tokens))
+
+            stop = finished.all()
+            if stopping_criteria is not None and not stop:
+                stop = bool(torch.as_tensor(stopping_criteria(torch.from_numpy(sequences), None)).all())
+            if stop:
+                break
+
+        if streamer is not None:
+            streamer.end()
+        return sequences
+
+    def _beam_search(self, input_ids, attention_mask, max_length, num_beams, ngram_size, length_penalty):
+        """Beam search with early stopping, scoring finished beams by log-prob / generated length"""
+        batch = input_ids.shape[0]
+        eos, pad = self.config["eos_token_id"], self.config["pad_token_id"]
+
+        # Every beam of an input shares that input's encoder output
+        attention_mask = np.repeat(attention_mask, num_beams, axis=0)
+        cross = [np.repeat(states, num_beams, axis=0) for states in self._encode(input_ids, np.asarray(attention_mask[::num_beams]))]
+        past = self._empty_past(batch * num_beams)
+
+        sequences = np.full((batch * num_beams, 1), self.config["decoder_start_token_id"], dtype=np.int64)
+        beam_scores = np.zeros((batch, num_beams), dtype=np.float32)
+        beam_scores[:, 1:] = -1e9  # all beams start identical, so only expand the first
+        finished = [[] for _ in range(batch)]  # (score, tokens) per input
+        done = np.zeros(batch, dtype=bool)
+
+        for step in range(max_length - 1):
+            cur_len = sequences.shape[1]
+            logits, past = self._decode_step(sequences[:, -1:], attention_mask, past, cross)
+            log_probs = ban_repeated_ngrams(log_softmax(logits), sequences, ngram_size)
+            vocab = log_probs.shape[-1]
+            scores = (log_probs + beam_scores.reshape(-1, 1)).reshape(batch, num_beams * vocab)
+            last_step = cur_len + 1 >= max_length
+
+            next_sequences = np.zeros((batch, num_beams, cur_len + 1), dtype=np.int64)
+            next_scores = np.full((batch, num_beams), -1e9, dtype=np.float32)
+            source_beams = np.zeros((batch, num_beams), dtype=np.int64)
+
+            for b in range(batch):
+                if done[b]:
+                    next_sequences[b, :, :cur_len] = sequences[b * num_beams:(b + 1) * num_beams]
+                    next_sequences[b, :, cur_len] = pad
+                    source_beams[b] = np.arange(num_beams) + b * num_beams
+                    continue
+
+                top = np.argsort(-scores[b])[:2 * num_beams]
+                kept = 0
+                for rank, flat in enumerate(top):
+                    beam, token = divmod(int(flat), vocab)
+                    score = float(scores[b, flat])
+                    row = b * num_beams + beam
+                    if token == eos or last_step:
+                        # Only the top num_beams candidates may finish a hypothesis
+                        if rank < num_beams:
+                            tokens = np.append(sequences[row], token)
+                            # Normalized by the generated length, this token included; that is
+                            # cur_len, as in transformers' BeamHypotheses
+                            finished[b].append((score / (cur_len ** length_penalty), tokens))
+                        if token == eos:
+                            continue
+                    if kept < num_beams:
+                        next_sequences[b, kept, :cur_len] = sequences[row]
+                        next_sequences[b, kept, cur_len] = token
+                        next_scores[b, kept] = score
+                        source_beams[b, kept] = row
+                        kept += 1
+
+                finished[b] = sorted(finished[b], key=lambda item: -item[0])[:num_beams]
+                if len(finished[b]) >= num_beams or last_step:
+                    done[b] = True
+
+            if done.all():
+                break
+
+            sequences = next_sequences.reshape(batch * num_beams, cur_len + 1)
+            beam_scores = next_scores
+            rows = source_beams.reshape(-1)
+            past = [states[rows] for states in past]
+
+        best = [max(hyps, key=lambda item: item[0])[1] if hyps else sequences[b * num_beams] for b, hyps in enumerate(finished)]
+        length = max(len(tokens) for tokens in best)
+        output = np.full((batch, length), pad, dtype=np.int64)
+        for b, tokens in enumerate(best):
+            output[b, :len(tokens)] = tokens
+        return output
+
+
+# ----- PARITY CHECK -----
+
+def check_parity(model_dir, onnx_dir, questions, tiers, threads, max_length=None):
+    """Compare PyTorch and ONNX Runtime generations on the same questions for each decoding tier
+
+    Returns {tier name: (identical answers, torch ms, onnx ms per question)}.
+    """
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    torch_model = AutoModelForSeq2SeqLM.from_pretrained(model_dir).eval()
+    onnx_model = OnnxSeq2SeqModel(onnx_dir, threads=threads)
+
+    results = {}
+    for tier in tiers:
+        beams = tier.num_beams
+        matches, torch_ms, onnx_ms = 0, 0.0, 0.0
+        for question in questions:
+            encoded = tokenizer("question: " + question, max_length=128, truncation=True, return_tensors="pt")
+            settings = dict(
+                max_length=max_length or tier.max_length, num_beams=beams, early_stopping=beams > 1, no_repeat_ngram_size=2
+            )
+
+            start = time.perf_counter()
+            with torch.no_grad():
+                expected = torch_model.generate(**encoded, **settings)
+            torch_ms += (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            actual = onnx_model.generate(**encoded, **settings)
+            onnx_ms += (time.perf_counter() - start) * 1000
+
+            expected_text = tokenizer.decode(expected[0], skip_special_tokens=True)
+            actual_text = tokenizer.decode(actual[0], skip_special_tokens=True)
+            if expected_text == actual_text:
+                matches += 1
+            else:
+                logger.info(f"Mismatch ({tier.name}) for '{question}':\n  torch: {expected_text}\n  onnx:  {actual_text}")
+
+        results[tier.name] = (matches, torch_ms / len(questions), onnx_ms / len(questions))
+        print(
+            f"{tier.name} (num_beams={beams}): {matches}/{len(questions)} identical, "
+            f"torch {torch_ms / len(questions):.1f} ms, onnx {onnx_ms / len(questions):.1f} ms per question"
+        )
+    return results
+
+
+def verify_parity(onnx_dir, tiers):
+    """Raise RuntimeError unless `check` recorded a pass for every tier on this export"""
+    path = os.path.join(onnx_dir, PARITY_FILE)
+    if not os.path.exists(path):
+        raise RuntimeError(f"No parity check recorded in {onnx_dir}; run `python onnx_backend.py check` first")
+    with open(path) as f:
+        record = json.load(f)
+    failed = []
+    for tier in tiers:
+        entry = record.get("tiers", {}).get(tier.name, {})
+        if not entry.get("passed") or entry.get("max_length") != tier.max_length:
+            failed.append(tier.name)
+    if failed:
+        raise RuntimeError(f"ONNX parity not established for {', '.join(failed)} in {path}")
+    return record
+
+
+def main():
+    from decoding_policy import DEFAULT_TIERS
+    from retrieval import DEFAULT_DATASET_PATH, load_dataset
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Export the legal model to ONNX and check it against PyTorch")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export encoder and decoder-with-past graphs")
+    export_parser.add_argument("--model", default="./legal_chatbot_model")
+    export_parser.add_argument("--output", default="./legal_chatbot_model_onnx")
+    export_parser.add_argument("--opset", type=int, default=17)
+
+    check_parser = subparsers.add_parser("check", help="Compare ONNX Runtime output with PyTorch on dataset questions")
+    check_parser.add_argument("--model", default="./legal_chatbot_model")
+    check_parser.add_argument("--onnx", default="./legal_chatbot_model_onnx")
+    check_parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    check_parser.add_argument("--samples", type=int, default=20)
+    check_parser.add_argument("--tiers", default=",".join(tier.name for tier in DEFAULT_TIERS),
+                              help="Decoding tiers to compare, as served by the decoding policy")
+    check_parser.add_argument("--max-length", type=int, default=None, help="Override each tier's max_length")
+    check_parser.add_argument("--min-beam-parity", type=float, default=DEFAULT_MIN_BEAM_PARITY,
+                              help="Fraction of identical answers each beam tier needs; greedy needs all")
+    check_parser.add_argument("--threads", type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_model(args.model, args.output, opset=args.opset)
+        print(f"Exported {args.model} to {args.output}")
+    else:
+        tiers_by_name = {tier.name: tier for tier in DEFAULT_TIERS}
+        names = [name.strip() for name in args.tiers.split(",") if name.strip()]
+        unknown = [name for name in names if name not in tiers_by_name]
+        if unknown:
+            parser.error(f"unknown tier(s) {', '.join(unknown)}; choose from {', '.join(tiers_by_name)}")
+        tiers = [tiers_by_name[name] for name in names]
+
+        questions = [doc["question"] for doc in load_dataset(args.dataset)][:args.samples]
+        results = check_parity(args.model, args.onnx, questions, tiers, args.threads, args.max_length)
+
+        # Greedy decoding must match exactly; beam search may differ on near-ties
+        path = os.path.join(args.onnx, PARITY_FILE)
+        record = {"checked_at": time.time(), "questions": len(questions), "tiers": {}}
+        if os.path.exists(path):
+            with open(path) as f:
+                record["tiers"] = json.load(f).get("tiers", {})
+        failures = []
+        for tier in tiers:
+            matches, torch_ms, onnx_ms = results[tier.name]
+            required = len(questions) if tier.num_beams == 1 else args.min_beam_parity * len(questions)
+            passed = matches >= required
+            record["tiers"][tier.name] = {
+                "num_beams": tier.num_beams,
+                "max_length": args.max_length or tier.max_length,
+                "identical": matches,
+                "questions": len(questions),
+                "torch_ms": round(torch_ms, 1),
+                "onnx_ms": round(onnx_ms, 1),
+                "passed": passed,
+            }
+            if not passed:
+                failures.append(f"{tier.name} {matches}/{len(questions)}")
+        with open(path, "w") as f:
+            json.dump(record, f, indent=2)
+        if failures:
+            raise SystemExit(f"Parity check failed: {', '.join(failures)} identical")
+
+
+if __name__ == "__main__":
+    main()
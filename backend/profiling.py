@@ -0,0 +1,203 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Request IDs end up in file names
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+# From Python 3.12 cProfile hooks sys.monitoring, which is interpreter-wide:
+# an enabled profiler records every thread, not just the one that enabled it
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+class RequestProfiler:
+    """Chooses which requests to profile and where their profiles are written
+
+    A request is profiled when it carries one of the allowlisted `tokens` in
+    its profiling header, or at random with probability `sample_rate`. Only
+    one request is profiled at a time; overlapping profiles would capture
+    each other's work, so a request that arrives while another is being
+    profiled is served without profiling.
+    """
+
+    def __init__(self, directory: str, sample_rate: float = 0.0, tokens: Iterable[str] = ()):
+        self.directory = directory
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.tokens = tuple(token for token in tokens if token)
+        self.enabled = self.sample_rate > 0 or bool(self.tokens)
+        self._busy = threading.Lock()
+        self.profiled = 0
+        self.skipped_busy = 0
+
+        if self.enabled:
+            logger.info(
+                f"Request profiling enabled: sample_rate={self.sample_rate}, "
+                f"header tokens={len(self.tokens)}, directory={self.directory}"
+            )
+
+    def is_allowlisted(self, token: str) -> bool:
+        return bool(token) and any(hmac.compare_digest(token.encode(), allowed.encode()) for allowed in self.tokens)
+
+    def start(self, request_id: str = "", token: str = "") -> Optional["RequestProfile"]:
+        """A profile for this request, or None if it is not selected or another request is being profiled"""
+        triggered = self.is_allowlisted(token)
+        if not triggered and not (self.sample_rate and random.random() < self.sample_rate):
+            return None
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return None
+        if not REQUEST_ID_PATTERN.match(request_id or ""):
+            request_id = uuid.uuid4().hex[:12]
+        return RequestProfile(self, request_id, triggered)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "header_tokens": len(self.tokens),
+            "directory": self.directory,
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped_busy,
+        }
+
+
+class RequestProfile:
+    """Python and torch profiles of one request
+
+    Await the pipeline through `run`, which enables cProfile only while this
+    request's coroutine is executing. Other requests served by the event
+    loop in between are left out of its profile. Call `generate` to run the
+    model call under cProfile and the torch operator profiler on its worker
+    thread. Before Python 3.12 that keeps the call profile to this request;
+    from 3.12 cProfile records every thread while it is on, so the profile
+    can include other requests' work on worker threads, and its summary
+    says so. `finish` writes the artifacts, named after the request ID and
+    route, and must always be called so the next request can be profiled.
+    It is slow: for a 256-token beam search on one CPU the operator table
+    takes about 30 s and the trace export another 15 s, so call it off the
+    request path.
+    """
+
+    def __init__(self, profiler: RequestProfiler, request_id: str, triggered: bool):
+        self.profiler = profiler
+        self.request_id = request_id
+        self.triggered = triggered
+        self.started = time.time()
+        self.python = cProfile.Profile()
+        self.generate_python = None
+        self.torch = None
+
+    async def run(self, coro):
+        """Await coro with the request profiler on only while coro itself runs"""
+        return await _ProfiledCoroutine(coro, self.python)
+
+    def generate(self, fn, *args):
+        """Call fn(*args), the model's generate step, with both profilers on this thread
+
+        fn must generate here rather than hand the question to a batcher's
+        thread. The torch profiler only records this thread. Before Python
+        3.12 so does cProfile; from 3.12 it also records batched calls on
+        other threads running meanwhile.
+        """
+        python = cProfile.Profile()
+        try:
+            python.enable()
+        except ValueError:
+            # Python 3.12+ allows one active profiler per process; this call
+            # goes unprofiled by cProfile, the torch profile still covers it
+            python = None
+
+        try:
+            from torch.profiler import ProfilerActivity, profile
+
+            with profile(activities=[ProfilerActivity.CPU]) as torch_profiler:
+                result = fn(*args)
+            self.torch = torch_profiler
+            return result
+        finally:
+            if python is not None:
+                python.disable()
+                self.generate_python = python
+
+    def finish(self, route: str) -> Optional[str]:
+        """Write the profiles and release the profiler; returns the path prefix of the artifacts"""
+        try:
+            os.makedirs(self.profiler.directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+            prefix = os.path.join(self.profiler.directory, f"{stamp}-{self.request_id}-{route}")
+
+            stats = pstats.Stats(self.python)
+            if self.generate_python is not None:
+                stats.add(self.generate_python)
+            stats.dump_stats(f"{prefix}.pstats")
+
+            summary = io.StringIO()
+            summary.write(f"request_id: {self.request_id}\nroute: {route}\n")
+            summary.write(f"trigger: {'header' if self.triggered else 'sample'}\n")
+            if PROFILES_ALL_THREADS:
+                summary.write("note: Python 3.12+ profiles every thread, so other requests' work can appear\n")
+            summary.write("\n")
+            stats.stream = summary
+            stats.sort_stats("cumulative").print_stats(40)
+            if self.torch is not None:
+                summary.write("\ntorch operators around MODEL.generate\n")
+                summary.write(self.torch.key_averages().table(sort_by="cpu_time_total", row_limit=30))
+                self.torch.export_chrome_trace(f"{prefix}.trace.json.gz")
+            with open(f"{prefix}.txt", "w", encoding="utf-8") as f:
+                f.write(summary.getvalue())
+
+            self.profiler.profiled += 1
+            logger.info(f"Profile of request {self.request_id} ({route}) written to {prefix}.*")
+            return prefix
+        except Exception as e:
+            logger.error(f"Could not write profile of request {self.request_id}: {str(e)}")
+            return None
+        finally:
+            self.profiler._busy.release()
+
+
+class _ProfiledCoroutine:
+    """Drives a coroutine one step at a time, profiling each step
+
+    The event loop runs other tasks whenever the coroutine waits; switching
+    the profiler off at each wait keeps their work out of this profile.
+    """
+
+    def __init__(self, coro, python: cProfile.Profile):
+        self.coro = coro
+        self.python = python
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            try:
+                self.python.enable()
+                enabled = True
+            except ValueError:
+                # Python 3.12+: the generate profiler is active on another
+                # thread and is recording this step too
+                enabled = False
+            try:
+                waiting_on = self.coro.send(value) if error is None else self.coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                if enabled:
+                    self.python.disable()
+            try:
+                value, error = (yield waiting_on), None
+            except BaseException as e:
+                # Cancellation and other errors thrown into the task go to the coroutine
+                value, error = None, e
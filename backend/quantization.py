@@ -0,0 +1,41 @@
+import io
+import logging
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_QUANTIZATION = ("int8",)
+
+
+def quantize_dynamic_int8(model):
+    """Return a copy of the model with its Linear layers dynamically quantized to int8
+
+    Weights are stored as int8 and activations are quantized on the fly, which
+    speeds up the matrix multiplications that dominate T5 inference on CPU.
+    Dynamic quantization only runs on CPU, so the model is moved there first.
+    """
+    model = model.to("cpu").eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def apply_quantization(model, mode):
+    """Apply the quantization selected by MODEL_QUANTIZATION, if any"""
+    mode = (mode or "").strip().lower()
+    if not mode or mode in ("none", "fp32"):
+        return model
+
+    if mode not in SUPPORTED_QUANTIZATION:
+        logger.warning(f"Unknown MODEL_QUANTIZATION '{mode}', using fp32 model")
+        return model
+
+    model = quantize_dynamic_int8(model)
+    logger.info("Model quantized to int8 (compare_quantization.py reports the size and latency change)")
+    return model
+
+
+def serialized_size_mb(model) -> float:
+    """Size of the model's state dict when saved, including packed quantized weights"""
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
@@ -0,0 +1,262 @@
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASET_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "data",
+    "legal_cam-dataset - Untitled spreadsheet - cameroon_legal_political_canon_v1_structured (1).csv",
+)
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_index")
+
+# Dataset questions are repeated with suffixes like "(variation 3)" or "(ver 12)"
+VARIATION_SUFFIX = re.compile(r"\s*\((?:variation|variant|version|ver)\s*\d+\)\s*$", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset([
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "do", "does", "did",
+    "can", "could", "what", "who", "whom", "which", "when", "where", "how", "why",
+    "i", "me", "my", "we", "our", "you", "your", "it", "its", "they", "their",
+    "of", "in", "on", "at", "to", "for", "by", "with", "from", "and", "or", "there",
+    "this", "that", "these", "those", "any", "under", "about", "as", "if", "into",
+])
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def clean_reference(reference: str) -> str:
+    """Normalize an article reference, dropping placeholders such as 'Varies'"""
+    reference = (reference or "").strip().rstrip(",.;").strip()
+    if reference.lower() in ("", "varies", "n/a", "none"):
+        return ""
+    return reference
+
+
+def dataset_fingerprint(path: str) -> Dict:
+    """Size and SHA-256 of the dataset file, saved with the index to detect edits"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return {"size": os.path.getsize(path), "sha256": digest.hexdigest()}
+
+
+def read_index_source(index_dir: str) -> Optional[Dict]:
+    """The dataset fingerprint a saved index was built from, or None if it was not recorded"""
+    try:
+        with open(os.path.join(index_dir, "source.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_dataset(path: str) -> List[Dict]:
+    """Read the Q&A CSV and collapse question variations into unique documents"""
+    docs = []
+    seen = set()
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            question = VARIATION_SUFFIX.sub("", row.get("question") or "").strip()
+            answer = (row.get("answer") or "").strip()
+            if not question or not answer or (question, answer) in seen:
+                continue
+            seen.add((question, answer))
+            docs.append({
+                "question": question,
+                "answer": answer,
+                "category": (row.get("category") or "").strip(),
+                "article_reference": clean_reference(row.get("article_reference")),
+            })
+
+    return docs
+
+
+class RetrievalIndex:
+    """TF-IDF index over curated questions stored as term-major sparse arrays
+
+    Postings are kept in CSR layout by term: the documents containing term t
+    are `postings_docs[indptr[t]:indptr[t + 1]]` with their L2-normalized
+    TF-IDF weights in `postings_weights`. Scoring a query touches only the
+    postings of its own terms, and the arrays are saved as .npy files so
+    workers can memory-map them instead of rebuilding.
+    """
+
+    ARRAY_FILES = ("idf", "indptr", "postings_docs", "postings_weights")
+
+    def __init__(self, vocab: Dict[str, int], idf, indptr, postings_docs, postings_weights, docs: List[Dict]):
+        self.vocab = vocab
+        self.idf = idf
+        self.indptr = indptr
+        self.postings_docs = postings_docs
+        self.postings_weights = postings_weights
+        self.docs = docs
+        self.max_idf = float(np.max(idf)) if len(idf) else 1.0
+
+    @classmethod
+    def build(cls, docs: List[Dict]) -> "RetrievalIndex":
+        """Build the index from a list of dataset documents"""
+        doc_terms = [Counter(tokenize(doc["question"])) for doc in docs]
+
+        vocab = {}
+        for terms in doc_terms:
+            for term in terms:
+                vocab.setdefault(term, len(vocab))
+
+        n_docs = len(docs)
+        df = np.zeros(len(vocab), dtype=np.float64)
+        for terms in doc_terms:
+            for term in terms:
+                df[vocab[term]] += 1
+        idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+
+        # Sublinear TF-IDF weights per document, normalized to unit length
+        postings = [[] for _ in vocab]
+        for doc_id, terms in enumerate(doc_terms):
+            weights = {term: (1 + math.log(count)) * idf[vocab[term]] for term, count in terms.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                postings[vocab[term]].append((doc_id, weight / norm))
+
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(p) for p in postings])
+        postings_docs = np.array([d for p in postings for d, _ in p], dtype=np.int32)
+        postings_weights = np.array([w for p in postings for _, w in p], dtype=np.float32)
+
+        return cls(vocab, idf.astype(np.float32), indptr, postings_docs, postings_weights, docs)
+
+    def save(self, index_dir: str, source: Optional[Dict] = None):
+        """Write the arrays as .npy files plus JSON vocabulary and documents, and the dataset fingerprint if given"""
+        os.makedirs(index_dir, exist_ok=True)
+        for name in self.ARRAY_FILES:
+            np.save(os.path.join(index_dir, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(index_dir, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+        with open(os.path.join(index_dir, "docs.json"), "w", encoding="utf-8") as f:
+            json.dump(self.docs, f, ensure_ascii=False)
+        if source is not None:
+            with open(os.path.join(index_dir, "source.json"), "w", encoding="utf-8") as f:
+                json.dump(source, f)
+
+    @classmethod
+    def load(cls, index_dir: str) -> "RetrievalIndex":
+        """Load a saved index, memory-mapping the arrays read-only"""
+        arrays = {
+            name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r")
+            for name in cls.ARRAY_FILES
+        }
+        with open(os.path.join(index_dir, "vocab.json"), "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        with open(os.path.join(index_dir, "docs.json"), "r", encoding="utf-8") as f:
+            docs = json.load(f)
+        return cls(vocab, docs=docs, **arrays)
+
+    def search(self, query: str, top_k: int = 1) -> List[Tuple[float, Dict]]:
+        """Return the top_k documents by cosine similarity to the query"""
+        tokens = tokenize(query)
+        terms = Counter(t for t in tokens if t in self.vocab)
+        if not terms:
+            return []
+
+        term_ids = [self.vocab[t] for t in terms]
+        query_weights = np.array(
+            [(1 + math.log(count)) for count in terms.values()], dtype=np.float32
+        ) * self.idf[term_ids]
+
+        # Unknown query terms still count toward the query norm so they lower confidence
+        unknown = len(tokens) - sum(terms.values())
+        norm = math.sqrt(float(np.dot(query_weights, query_weights)) + unknown * self.max_idf ** 2)
+        query_weights /= norm
+
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for term_id, weight in zip(term_ids, query_weights):
+            start, end = self.indptr[term_id], self.indptr[term_id + 1]
+            # Doc ids are unique within one postings list, so fancy-index add is safe
+            scores[self.postings_docs[start:end]] += self.postings_weights[start:end] * weight
+
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[i]), self.docs[i]) for i in best if scores[i] > 0]
+
+
+def load_or_build_index(index_dir: str = DEFAULT_INDEX_DIR, dataset_path: str = DEFAULT_DATASET_PATH) -> Optional[RetrievalIndex]:
+    """Load a saved index, building and saving it from the dataset if needed
+
+    A saved index is rebuilt when the dataset is reachable and differs from
+    the one it was built from. Without the dataset, as in the Docker image,
+    the saved index is used as is.
+    """
+    try:
+        dataset_available = os.path.exists(dataset_path)
+        source = dataset_fingerprint(dataset_path) if dataset_available else None
+
+        if os.path.exists(os.path.join(index_dir, "vocab.json")):
+            if source is None or read_index_source(index_dir) == source:
+                index = RetrievalIndex.load(index_dir)
+                logger.info(f"Retrieval index loaded from {index_dir} ({len(index.docs)} documents)")
+                return index
+            logger.info(f"Dataset changed since the retrieval index in {index_dir} was built, rebuilding")
+
+        if not dataset_available:
+            logger.warning(f"Retrieval index not found and dataset missing: {dataset_path}")
+            return None
+
+        index = RetrievalIndex.build(load_dataset(dataset_path))
+        index.save(index_dir, source)
+        logger.info(f"Retrieval index built from dataset and saved to {index_dir} ({len(index.docs)} documents)")
+        return index
+
+    except Exception as e:
+        logger.error(f"Error loading retrieval index: {str(e)}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the legal dataset retrieval index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build the index from the dataset CSV")
+    build_parser.add_argument("--dataset", default=DEFAULT_DATASET_PATH)
+    build_parser.add_argument("--output", default=DEFAULT_INDEX_DIR)
+
+    query_parser = subparsers.add_parser("query", help="Query a saved index")
+    query_parser.add_argument("question")
+    query_parser.add_argument("--index", default=DEFAULT_INDEX_DIR)
+    query_parser.add_argument("--top-k", type=int, default=3)
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        docs = load_dataset(args.dataset)
+        index = RetrievalIndex.build(docs)
+        index.save(args.output, dataset_fingerprint(args.dataset))
+        print(f"Indexed {len(docs)} unique questions ({len(index.vocab)} terms) into {args.output}")
+    else:
+        index = RetrievalIndex.load(args.index)
+        start = time.perf_counter()
+        results = index.search(args.question, top_k=args.top_k)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        for score, doc in results:
+            print(f"{score:.3f}  [{doc['category']}] {doc['question']}")
+        print(f"Search took {elapsed_us:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
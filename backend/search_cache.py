@@ -0,0 +1,135 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class SearchCache:
+    """Bounded LRU cache of search results with stale-while-revalidate
+
+    Results younger than `fresh_ttl` are served as they are. Results older
+    than that but younger than `stale_ttl` are still served, and the caller
+    is told to refresh them in the background; `begin_refresh` makes sure
+    only one refresh per query runs at a time. Empty results, which is also
+    what a failed search returns, are cached for `negative_ttl` only, so a
+    dead upstream is not hit on every request but recovers quickly.
+    """
+
+    def __init__(self, max_entries: int = 512, fresh_ttl: float = 3600.0, stale_ttl: float = 86400.0, negative_ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = max(stale_ttl, fresh_ttl)
+        self.negative_ttl = negative_ttl
+
+        # key -> (results, fresh_until, stale_until)
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(search_query: str, max_results: int) -> str:
+        normalized = re.sub(r"\s+", " ", search_query.strip().lower())
+        return f"{max_results}\x1f{normalized}"
+
+    def get(self, key: str) -> Tuple[Optional[List[dict]], str]:
+        """Return (results, FRESH | STALE | MISS); results are None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is None or entry[2] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None, MISS
+
+            results, fresh_until, _ = entry
+            self._entries.move_to_end(key)
+            if fresh_until > now:
+                if results:
+                    self.hits += 1
+                else:
+                    self.negative_hits += 1
+                return results, FRESH
+
+            self.stale_hits += 1
+            return results, STALE
+
+    def put(self, key: str, results: List[dict]):
+        """Store search results; empty results are kept only for the negative TTL"""
+        if self.max_entries <= 0:
+            return
+
+        now = time.time()
+        if results:
+            entry = (results, now + self.fresh_ttl, now + self.stale_ttl)
+        else:
+            entry = ([], now + self.negative_ttl, now + self.negative_ttl)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def begin_refresh(self, key: str) -> bool:
+        """Claim the background refresh of a stale entry; False if one is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def end_refresh(self, key: str, results: List[dict]):
+        """Store refreshed results, or keep serving the stale ones if the refresh came back empty"""
+        if results:
+            self.put(key, results)
+        else:
+            with self._lock:
+                self.failed_refreshes += 1
+                entry = self._entries.get(key)
+                if entry is not None:
+                    # Back off for the negative TTL before trying to refresh again
+                    stored, _, stale_until = entry
+                    self._entries[key] = (stored, min(time.time() + self.negative_ttl, stale_until), stale_until)
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def cancel_refresh(self, key: str):
+        """Release a refresh that never reached the upstream, leaving the stale entry as it was"""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.negative_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "failed_refreshes": self.failed_refreshes,
+                "refreshing": len(self._refreshing),
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.stale_hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+                "ttls": {"fresh": self.fresh_ttl, "stale": self.stale_ttl, "negative": self.negative_ttl},
+            }
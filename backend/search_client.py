@@ -0,0 +1,124 @@
+import logging
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DUCKDUCKGO_URL = "https://html.duckduckgo.com/html/"
+
+SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class SearchPoolTimeout(Exception):
+    """Raised when no pooled connection freed up within `pool_timeout`
+
+    This is local saturation, not a failed search: DuckDuckGo was never asked,
+    so callers must not cache it as an empty result.
+    """
+
+
+class SearchClient:
+    """Shared async HTTP client for DuckDuckGo result pages
+
+    One pooled httpx client is reused for every search, so connections stay
+    alive between searches instead of paying TCP and TLS setup each time. At
+    most `max_connections` requests are outbound at once; further searches
+    wait up to `pool_timeout` seconds for a connection, then SearchPoolTimeout
+    is raised. Connect and read
+    timeouts are separate so an unreachable host fails fast while a slow
+    response still gets time to arrive.
+
+    The httpx client is created on first use, inside the event loop (and
+    worker process) that uses it.
+    """
+
+    def __init__(
+        self,
+        url: str = DEFAULT_DUCKDUCKGO_URL,
+        max_connections: int = 8,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 5.0,
+        pool_timeout: float = 2.0,
+        keepalive_expiry: float = 30.0,
+    ):
+        self.url = url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=read_timeout, pool=pool_timeout)
+
+        self._client = None
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.pool_timeouts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        logger.info(
+            f"Search client configured: url={url}, max_connections={max_connections}, "
+            f"connect_timeout={connect_timeout}s, read_timeout={read_timeout}s, pool_timeout={pool_timeout}s"
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=SEARCH_HEADERS,
+                limits=self.limits,
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+        return self._client
+
+    async def fetch(self, query: str) -> Optional[str]:
+        """Fetch the result page for a query, or None if the search failed
+
+        Raises SearchPoolTimeout if every connection stayed busy for `pool_timeout`.
+        """
+        client = self._get_client()
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            response = await client.get(self.url, params={"q": query})
+            if response.status_code != 200:
+                self.errors += 1
+                logger.error(f"DuckDuckGo search failed with status: {response.status_code}")
+                return None
+            return response.text
+        except httpx.PoolTimeout:
+            self.pool_timeouts += 1
+            logger.warning("DuckDuckGo search found no free connection in the pool")
+            raise SearchPoolTimeout(f"No free search connection within {self.timeout.pool}s")
+        except httpx.TimeoutException as e:
+            self.timeouts += 1
+            logger.warning(f"DuckDuckGo search timed out ({type(e).__name__})")
+            return None
+        except httpx.HTTPError as e:
+            self.errors += 1
+            logger.error(f"DuckDuckGo search error: {type(e).__name__}: {str(e)}")
+            return None
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "pool_timeouts": self.pool_timeouts,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
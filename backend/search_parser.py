@@ -0,0 +1,184 @@
+from html.parser import HTMLParser
+from typing import List
+
+from bs4 import BeautifulSoup
+
+# Elements that never have an end tag
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+# Inside a result, the first element matching the earliest rule wins, as in
+# parse_search_results_bs4: (class name or None, tag name or None)
+TITLE_RULES = (("result__title", None), ("result__a", None), (None, "h2"), ("title", None))
+SNIPPET_RULES = (("result__snippet", None), ("snippet", None), ("result__body", None), ("result-snippet", None))
+
+CONTAINER_CLASS = "result__body"
+# Containers of the other layouts parse_search_results_bs4 understands
+FALLBACK_CLASSES = {"result", "results_links", "web-result"}
+
+
+def parse_search_results_bs4(html, max_results=5):
+    """Extract titles and snippets from a DuckDuckGo result page with a full BeautifulSoup tree"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    results = []
+
+    # Try multiple selector patterns to find results
+    selectors = ['.result__body', '.result', '.results_links', '.web-result']
+
+    for selector in selectors:
+        search_results = soup.select(selector)
+        if search_results:
+            for result in search_results[:max_results]:
+                # Try different selectors for title and snippet
+                title_element = (
+                    result.select_one('.result__title') or
+                    result.select_one('.result__a') or
+                    result.select_one('h2') or
+                    result.select_one('.title')
+                )
+
+                snippet_element = (
+                    result.select_one('.result__snippet') or
+                    result.select_one('.snippet') or
+                    result.select_one('.result__body') or
+                    result.select_one('.result-snippet')
+                )
+
+                if not title_element or not snippet_element:
+                    continue
+
+                title = title_element.get_text() if title_element else ""
+                snippet = snippet_element.get_text() if snippet_element else ""
+
+                if len(snippet.strip()) > 20:  # Only include substantial results
+                    results.append({
+                        "title": title.strip(),
+                        "snippet": snippet.strip()
+                    })
+            break
+
+    return results
+
+
+class _EnoughResults(Exception):
+    """Raised inside the parser to stop reading the page early"""
+
+
+class ResultExtractor(HTMLParser):
+    """Streaming extractor for `.result__body` containers on DuckDuckGo result pages
+
+    Only the text of candidate title and snippet elements inside a container
+    is collected; everything else on the page is skipped without building a
+    tree. Parsing stops as soon as `max_results` containers have been read.
+    """
+
+    def __init__(self, max_results: int):
+        super().__init__(convert_charrefs=True)
+        self.max_results = max_results
+        self.containers = 0
+        self.results = []
+        self.other_layout = False
+
+        self._stack = None  # open tags inside the current container
+        self._captures = []  # (stack depth, text parts) of elements whose text is being collected
+        self._found = {}  # (rule kind, rule index) -> text parts of the first matching element
+
+    def handle_starttag(self, tag, attrs):
+        classes = ()
+        for name, value in attrs:
+            if name == "class" and value:
+                classes = value.split()
+                break
+
+        if self._stack is None:
+            if CONTAINER_CLASS in classes:
+                self._stack = [tag]
+                self._captures = []
+                self._found = {}
+            elif not self.other_layout and FALLBACK_CLASSES.intersection(classes):
+                self.other_layout = True
+            return
+
+        # Record the first element matching each title and snippet rule
+        depth = len(self._stack)
+        for kind, rules in (("title", TITLE_RULES), ("snippet", SNIPPET_RULES)):
+            for index, (class_name, tag_name) in enumerate(rules):
+                if (kind, index) in self._found:
+                    continue
+                if (class_name and class_name in classes) or (tag_name and tag == tag_name):
+                    parts = []
+                    self._found[(kind, index)] = parts
+                    if tag not in VOID_ELEMENTS:
+                        self._captures.append((depth, parts))
+
+        if tag not in VOID_ELEMENTS:
+            self._stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if self._stack is None:
+            return
+        # Close the innermost matching tag, implicitly closing anything left open inside it
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth] == tag:
+                self._close_to(depth)
+                break
+
+    def _close_to(self, depth):
+        del self._stack[depth:]
+        self._captures = [capture for capture in self._captures if capture[0] < depth]
+        if depth == 0:
+            self._finish_container()
+
+    def close(self):
+        super().close()
+        # A container left open at the end of the page still counts, as it does for BeautifulSoup
+        if self._stack is not None:
+            self._finish_container()
+
+    def handle_data(self, data):
+        for _, parts in self._captures:
+            parts.append(data)
+
+    def _first(self, kind, rules):
+        for index in range(len(rules)):
+            parts = self._found.get((kind, index))
+            if parts is not None:
+                return "".join(parts)
+        return None
+
+    def _finish_container(self):
+        self._stack = None
+        self.containers += 1
+
+        title = self._first("title", TITLE_RULES)
+        snippet = self._first("snippet", SNIPPET_RULES)
+        if title is not None and snippet is not None and len(snippet.strip()) > 20:
+            self.results.append({"title": title.strip(), "snippet": snippet.strip()})
+
+        if self.containers >= self.max_results:
+            raise _EnoughResults()
+
+
+def parse_search_results(html, max_results=5) -> List[dict]:
+    """Extract titles and snippets from a DuckDuckGo result page
+
+    Uses the streaming extractor, which stops after `max_results` results.
+    Pages without `.result__body` containers but with containers of another
+    layout fall back to the BeautifulSoup parser and its alternative selectors.
+    """
+    if max_results <= 0:
+        return []
+
+    extractor = ResultExtractor(max_results)
+    try:
+        extractor.feed(html)
+        extractor.close()
+    except _EnoughResults:
+        pass
+
+    if extractor.containers == 0 and extractor.other_layout:
+        return parse_search_results_bs4(html, max_results)
+    return extractor.results
@@ -0,0 +1,91 @@
+import logging
+import threading
+from typing import Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Retrieval similarity band edges; questions far from the curated dataset are
+# the ones the fine-tuned model tends to answer poorly
+SIMILARITY_BANDS = (0.2, 0.4, 0.6)
+
+
+class FallbackPredictor:
+    """Predict whether the model's answer will be rejected as low quality
+
+    Questions are bucketed by language, retrieval similarity band and whether
+    they touch a topic whose answers is_low_quality_answer checks, which
+    makes a rejection more likely; the caller works out the topic from the
+    question's keyword matches. Each bucket keeps an exponentially weighted
+    rate of low-quality model answers, starting from `prior` with the weight
+    of `prior_weight` observations, and is updated with every model answer. When the rate for a question's bucket reaches
+    `threshold`, search is worth starting alongside generation. The prior
+    sits below the default threshold, so buckets are answered model-first
+    until their own answers show a high rejection rate.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        prior: float = 0.25,
+        prior_weight: float = 4.0,
+        decay: float = 0.05,
+    ):
+        self.threshold = threshold
+        self.prior = prior
+        self.prior_weight = prior_weight
+        self.decay = decay
+
+        # bucket -> [rate, observations]
+        self._buckets: Dict[Hashable, list] = {}
+        self._lock = threading.Lock()
+        self.decisions = {"hedged": 0, "sequential": 0}
+        self.outcomes = {"predicted_fallback": 0, "predicted_fallback_correct": 0, "missed_fallback": 0}
+
+    def bucket(self, language: str, similarity: float, topic_checked: bool) -> Tuple[str, int, bool]:
+        band = sum(similarity >= edge for edge in SIMILARITY_BANDS)
+        return language, band, topic_checked
+
+    def predict(self, bucket: Hashable) -> float:
+        """Estimated probability that the model answer is rejected"""
+        with self._lock:
+            state = self._buckets.get(bucket)
+            return state[0] if state else self.prior
+
+    def should_hedge(self, bucket: Hashable) -> Tuple[bool, float]:
+        probability = self.predict(bucket)
+        hedge = probability >= self.threshold
+        with self._lock:
+            self.decisions["hedged" if hedge else "sequential"] += 1
+        return hedge, probability
+
+    def record(self, bucket: Hashable, low_quality: bool, hedged: bool):
+        """Update the bucket with whether the model answer was rejected"""
+        with self._lock:
+            rate, seen = self._buckets.get(bucket, [self.prior, self.prior_weight])
+            # Average over the first observations, then weight recent ones more
+            weight = max(1.0 / (seen + 1), self.decay)
+            self._buckets[bucket] = [rate + weight * (float(low_quality) - rate), seen + 1]
+
+            if hedged:
+                self.outcomes["predicted_fallback"] += 1
+                self.outcomes["predicted_fallback_correct"] += int(low_quality)
+            elif low_quality:
+                self.outcomes["missed_fallback"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "decisions": dict(self.decisions),
+                "outcomes": dict(self.outcomes),
+                "buckets": [
+                    {
+                        "language": language,
+                        "similarity_band": band,
+                        "topic_checked": topic_checked,
+                        "fallback_rate": round(rate, 3),
+                        "observations": int(seen - self.prior_weight),
+                    }
+                    for (language, band, topic_checked), (rate, seen) in sorted(self._buckets.items())
+                ],
+            }
@@ -0,0 +1,50 @@
+import asyncio
+
+import torch
+from transformers import StoppingCriteria, TextStreamer
+
+
+class AsyncTextStreamer(TextStreamer):
+    """TextStreamer that hands decoded text from the generate thread to an asyncio consumer
+
+    `generate` runs on a worker thread and calls `put`/`end` there; each
+    finalized chunk of text is pushed onto an asyncio queue owned by the
+    event loop, and iterating the streamer with `async for` yields the chunks
+    until generation ends.
+    """
+
+    def __init__(self, tokenizer, loop: asyncio.AbstractEventLoop, **decode_kwargs):
+        # skip_prompt drops the decoder start token that seq2seq generate emits first
+        super().__init__(tokenizer, skip_prompt=True, **decode_kwargs)
+        self.loop = loop
+        self.queue = asyncio.Queue()
+        self.cancelled = False
+
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        if text:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, text)
+        if stream_end:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+    def cancel(self):
+        """Ask the running generate call to stop at the next token"""
+        self.cancelled = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        text = await self.queue.get()
+        if text is None:
+            raise StopAsyncIteration
+        return text
+
+
+class CancelledByStreamer(StoppingCriteria):
+    """Stop generation once the streaming client has gone away"""
+
+    def __init__(self, streamer: AsyncTextStreamer):
+        self.streamer = streamer
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.streamer.cancelled, dtype=torch.bool, device=input_ids.device)